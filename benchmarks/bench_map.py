@@ -0,0 +1,103 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# benchmarks/bench_map.py
+# Compares map output size, build time and script parse time across render modes.
+# Usage: python -m benchmarks.bench_map [--sizes 1000 10000 100000] [--folium-max 10000]
+import argparse
+import logging
+import pathlib
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+from pin_grid_spy import map_generator
+
+# Compiles every inline <script> of a page with V8 and prints the elapsed milliseconds
+NODE_PARSE_SNIPPET = """
+const fs = require('fs');
+const html = fs.readFileSync(process.argv[1], 'utf8');
+const scripts = [...html.matchAll(/<script>([\\s\\S]*?)<\\/script>/g)].map(m => m[1]);
+const start = process.hrtime.bigint();
+for (const s of scripts) { new Function(s); }
+console.log(Number(process.hrtime.bigint() - start) / 1e6);
+"""
+
+def synthetic_records(count: int, seed: int = 0):
+    """Random image records scattered over a city-sized area."""
+    rng = random.Random(seed)
+    models = [f"Camera {i}" for i in range(12)]
+    return [
+        {
+            "original_path": f"/evidence/device_{i % 37:02d}/DCIM/IMG_{i:07d}.jpg",
+            "thumbnail_rel_path": f"thumbnails/IMG_{i:07d}_thumb.jpg",
+            "latitude": 40.5 + rng.random() * 0.4,
+            "longitude": -74.2 + rng.random() * 0.5,
+            "datetime": (f"2023:{rng.randint(1, 12):02d}:{rng.randint(1, 28):02d} "
+                         f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00"),
+            "model": rng.choice(models),
+        }
+        for i in range(count)
+    ]
+
+def script_parse_ms(html_path: pathlib.Path):
+    """JavaScript compile time of the page's inline scripts, or None without Node.js."""
+    node = shutil.which("node")
+    if not node:
+        return None
+    result = subprocess.run([node, "-e", NODE_PARSE_SNIPPET, str(html_path)],
+                            capture_output=True, text=True, check=False)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark map render modes.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--modes", nargs="+", default=["folium", "data", "clustered", "canvas"])
+    parser.add_argument("--folium-max", type=int, default=10000,
+                        help="Skip the per-marker folium mode above this many points (it is very slow).")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'points':>8}  {'mode':<8}{'build s':>10}{'size KiB':>12}{'B/point':>10}{'JS parse ms':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            records = synthetic_records(size)
+            for mode in args.modes:
+                if mode == "folium" and size > args.folium_max:
+                    print(f"{size:>8}  {mode:<8}{'skipped':>10}")
+                    continue
+                output_file = pathlib.Path(tmp) / f"{mode}_{size}" / "map.html"
+                start = time.perf_counter()
+                map_generator.create_map(records, output_file, incremental=False, render_mode=mode)
+                elapsed = time.perf_counter() - start
+                nbytes = output_file.stat().st_size
+                parse_ms = script_parse_ms(output_file)
+                parse_text = f"{parse_ms:.1f}" if parse_ms is not None else "n/a"
+                print(f"{size:>8}  {mode:<8}{elapsed:>10.2f}{nbytes / 1024:>12.1f}"
+                      f"{nbytes / max(size, 1):>10.0f}{parse_text:>13}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# benchmarks/bench_pipeline.py
+# Times each ingestion stage (scan, EXIF, GPS conversion per record and in
+# bulk, thumbnail, full processing run, map render) on a synthetic
+# geotagged corpus and writes a JSON report. Reports from two commits can
+# be compared with --compare, which exits with status 1 when a stage got
+# slower than --threshold.
+# Usage: python -m benchmarks.bench_pipeline [--count 200] [--report report.json] [--compare baseline.json]
+import argparse
+import datetime
+import json
+import logging
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pin_grid_spy import config, image_processor, map_generator, scanner, utils
+from benchmarks.synthetic import BYTE_ORDERS, EXIF_LAYOUTS, IMAGE_FORMATS, generate_corpus
+
+REPORT_VERSION = 1
+STAGES = ("scan", "exif", "gps", "gps_bulk", "thumbnail", "process", "map")
+
+def _percentile(sorted_values: list, fraction: float):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def stage_result(items: int, runs: list, per_item: list = None):
+    """Summarizes one stage: best total of `runs` (seconds) and, if timed per item, median/p95 in ms."""
+    seconds = min(runs)
+    result = {"items": items, "seconds": round(seconds, 6),
+              "items_per_s": round(items / seconds, 1) if seconds > 0 else None}
+    if per_item:
+        per_item = sorted(per_item)
+        result["median_ms"] = round(statistics.median(per_item) * 1000, 4)
+        result["p95_ms"] = round(_percentile(per_item, 0.95) * 1000, 4)
+    return result
+
+def timed(func, items: list, repeat: int):
+    """Calls func(item) for every item, `repeat` times. Returns (totals per run, per-item timings, last results)."""
+    runs, per_item = [], []
+    for _ in range(repeat):
+        results = []
+        start = time.perf_counter()
+        for item in items:
+            item_start = time.perf_counter()
+            results.append(func(item))
+            per_item.append(time.perf_counter() - item_start)
+        runs.append(time.perf_counter() - start)
+    return runs, per_item, results
+
+def timed_batch(func, repeat: int):
+    """Calls func() `repeat` times. Returns (totals per run, last result)."""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append(time.perf_counter() - start)
+    return runs, result
+
+def read_tags(path: pathlib.Path):
+    with open(path, "rb") as fh:
+        return image_processor.read_exif_tags(fh)
+
+def run_stages(corpus_dir: pathlib.Path, work_dir: pathlib.Path, repeat: int, executor: str, map_points: int):
+    """Runs every stage over the corpus and returns {stage: result}."""
+    stages = {}
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        paths = list(scanner.scan_images(corpus_dir))
+        runs.append(time.perf_counter() - start)
+    stages["scan"] = stage_result(len(paths), runs)
+
+    runs, per_item, tags = timed(read_tags, paths, repeat)
+    stages["exif"] = stage_result(len(paths), runs, per_item)
+
+    # A single conversion is far below the timer resolution, and so is a
+    # perf_counter() pair around it: time whole batches of the corpus instead
+    batch = tags * 50
+    runs, coords = timed_batch(lambda: [utils.get_decimal_coords(item) for item in batch], repeat)
+    stages["gps"] = stage_result(len(batch), runs)
+    missing = sum(lat is None for lat, _ in coords)
+    if missing:
+        logging.warning(f"{missing} conversions returned no coordinates.")
+    runs, _ = timed_batch(lambda: utils.get_decimal_coords_bulk(batch), repeat)
+    stages["gps_bulk"] = stage_result(len(batch), runs)
+
+    thumb_dir = work_dir / "thumbnail_stage"
+    thumb_dir.mkdir()
+    names = iter(range(len(paths) * repeat))
+    runs, per_item, _ = timed(lambda path: image_processor.create_thumbnail(
+        path, thumb_dir / f"{next(names)}{path.suffix}"), paths, repeat)
+    stages["thumbnail"] = stage_result(len(paths), runs, per_item)
+
+    runs = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        records = image_processor.process_directory(corpus_dir, work_dir / f"process_{run}" / "thumbnails",
+                                                    executor=executor, use_cache=False)
+        runs.append(time.perf_counter() - start)
+    stages["process"] = stage_result(len(paths), runs)
+    stages["process"]["records"] = len(records)
+
+    # The map is rendered from the processed records, repeated up to `map_points` to show scaling
+    map_records = [records[i % len(records)] for i in range(max(map_points, len(records)))] if records else []
+    runs = []
+    for run in range(repeat):
+        start = time.perf_counter()
+        map_generator.create_map(map_records, work_dir / f"map_{run}" / config.DEFAULT_MAP_FILENAME,
+                                 incremental=False)
+        runs.append(time.perf_counter() - start)
+    stages["map"] = stage_result(len(map_records), runs)
+    return stages
+
+def git_commit():
+    """The current commit hash, or None outside a git checkout."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                cwd=pathlib.Path(__file__).parent)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+def compare(report: dict, baseline: dict, threshold: float):
+    """Prints per-item time ratios against a baseline report. Returns the stages slower than `threshold`."""
+    if baseline.get("corpus") != report["corpus"]:
+        print("Warning: the baseline was measured on a different corpus; ratios are not comparable.")
+    print(f"\n{'stage':<12}{'baseline us':>14}{'current us':>14}{'ratio':>9}")
+    regressions = []
+    for stage, result in report["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old or not old["items"] or not result["items"]:
+            continue
+        old_us = old["seconds"] / old["items"] * 1e6
+        new_us = result["seconds"] / result["items"] * 1e6
+        ratio = new_us / old_us if old_us else float("inf")
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{stage:<12}{old_us:>14.2f}{new_us:>14.2f}{ratio:>8.2f}x{flag}")
+        if flag:
+            regressions.append(stage)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion stages on a synthetic geotagged corpus.")
+    parser.add_argument("--count", type=int, default=200, help="Number of synthetic images.")
+    parser.add_argument("--width", type=int, default=1600, help="Source image width.")
+    parser.add_argument("--height", type=int, default=1200, help="Source image height.")
+    parser.add_argument("--formats", nargs="+", choices=tuple(IMAGE_FORMATS), default=["jpeg"],
+                        help="Image formats, used in turn.")
+    parser.add_argument("--layout", choices=EXIF_LAYOUTS, default="camera", help="EXIF layout.")
+    parser.add_argument("--byte-order", choices=tuple(BYTE_ORDERS), default="II", help="EXIF byte order.")
+    parser.add_argument("--makernote-bytes", type=int, default=0, help="MakerNote padding per image.")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1, help="Share of byte-identical copies.")
+    parser.add_argument("--executor", choices=image_processor.EXECUTOR_MODES, default=config.PROCESSING_EXECUTOR,
+                        help="Executor of the full processing run.")
+    parser.add_argument("--map-points", type=int, default=10000, help="Points rendered in the map stage.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage; the best is reported.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", help="Write the JSON report to this file.")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against.")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Slowdown ratio per item above which --compare reports a regression.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    corpus = {
+        "count": args.count, "size": [args.width, args.height], "formats": args.formats, "layout": args.layout,
+        "byte_order": args.byte_order, "makernote_bytes": args.makernote_bytes,
+        "duplicate_ratio": args.duplicate_ratio, "seed": args.seed, "map_points": args.map_points,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = pathlib.Path(tmp)
+        print(f"Generating {args.count} synthetic {args.width}x{args.height} images...")
+        generate_corpus(work_dir / "corpus", args.count, (args.width, args.height), args.formats, args.layout,
+                        args.byte_order, args.makernote_bytes, args.duplicate_ratio, seed=args.seed)
+        stages = run_stages(work_dir / "corpus", work_dir, args.repeat, args.executor, args.map_points)
+
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "executor": args.executor,
+        "corpus": corpus,
+        "stages": stages,
+    }
+    print(f"{'stage':<12}{'items':>8}{'seconds':>10}{'items/s':>12}{'median ms':>12}{'p95 ms':>10}")
+    for stage, result in stages.items():
+        print(f"{stage:<12}{result['items']:>8}{result['seconds']:>10.3f}{result['items_per_s'] or 0:>12.1f}"
+              f"{result.get('median_ms', ''):>12}{result.get('p95_ms', ''):>10}")
+    if args.report:
+        pathlib.Path(args.report).write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Report written to {args.report}")
+    if args.compare:
+        baseline = json.loads(pathlib.Path(args.compare).read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# benchmarks/bench_thumbnails.py
+# Compares the thumbnail engine modes on large synthetic JPEGs, then the
+# on-disk size of the thumbnail formats and of a sprite sheet atlas.
+# Usage: python -m benchmarks.bench_thumbnails [--count 10] [--width 6000 --height 4000]
+import argparse
+import logging
+import pathlib
+import statistics
+import tempfile
+import time
+
+from pin_grid_spy import config, image_processor, thumbnail_atlas
+from benchmarks.synthetic import write_jpeg
+
+# (label, thumbnail mode, use embedded EXIF thumbnail)
+CASES = [
+    ("quality", "quality", False),
+    ("fast (draft decode)", "fast", False),
+    ("fast (embedded thumbnail)", "fast", True),
+]
+
+def run_case(sources: list, work_dir: pathlib.Path, mode: str, use_embedded: bool, repeat: int):
+    """Returns per-image timings (seconds) for one engine configuration."""
+    timings = []
+    config.THUMBNAIL_USE_EMBEDDED = use_embedded
+    for run in range(repeat):
+        for index, source in enumerate(sources):
+            thumb_path = work_dir / f"{mode}_{use_embedded}_{run}_{index}.jpg"
+            start = time.perf_counter()
+            image_processor.create_thumbnail(source, thumb_path, mode=mode)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def size_report(sources: list, work_dir: pathlib.Path):
+    """Prints file count and bytes per thumbnail format and for the packed atlas."""
+    print(f"\n{'output':<28}{'files':>12}{'KiB':>12}{'vs jpeg':>10}")
+    baseline = None
+    for fmt, suffix in (("jpeg", ".jpg"), ("webp", ".webp"), ("avif", ".avif")):
+        out_dir = work_dir / f"format_{fmt}"
+        thumbs = [out_dir / f"thumb_{index}{suffix}" for index in range(len(sources))]
+        for source, thumb_path in zip(sources, thumbs):
+            image_processor.create_thumbnail(source, thumb_path, mode="fast")
+        total = sum(path.stat().st_size for path in thumbs)
+        baseline = baseline or total
+        print(f"{fmt + ' (quality ' + str(config.THUMBNAIL_QUALITY) + ')':<28}{len(thumbs):>12}"
+              f"{total / 1024:>12.1f}{total / baseline:>9.2f}x")
+        if fmt == "jpeg":
+            rel_paths = [path.relative_to(work_dir).as_posix() for path in thumbs]
+
+    for fmt in thumbnail_atlas.ATLAS_FORMATS:
+        _, stats = thumbnail_atlas.pack_atlas(rel_paths, work_dir, f"atlas_{fmt}", fmt=fmt)
+        print(f"{fmt + ' atlas':<28}{stats['sheets']:>12}{stats['sheet_bytes'] / 1024:>12.1f}"
+              f"{stats['sheet_bytes'] / baseline:>9.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark thumbnail engine modes.")
+    parser.add_argument("--count", type=int, default=10, help="Number of synthetic JPEGs.")
+    parser.add_argument("--width", type=int, default=6000, help="Source image width (24MP default).")
+    parser.add_argument("--height", type=int, default=4000, help="Source image height.")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the image set per mode.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = pathlib.Path(tmp)
+        print(f"Generating {args.count} synthetic {args.width}x{args.height} JPEGs...")
+        sources = [
+            write_jpeg(work_dir / f"source_{i}.jpg", (args.width, args.height), embedded_size=(320, 213), seed=i)
+            for i in range(args.count)
+        ]
+
+        baseline = None
+        print(f"{'mode':<28}{'median ms':>12}{'mean ms':>12}{'speedup':>10}")
+        for label, mode, use_embedded in CASES:
+            timings = run_case(sources, work_dir, mode, use_embedded, args.repeat)
+            median = statistics.median(timings)
+            baseline = baseline or median
+            print(f"{label:<28}{median * 1000:>12.2f}{statistics.mean(timings) * 1000:>12.2f}"
+                  f"{baseline / median:>9.1f}x")
+        size_report(sources, work_dir)
+
+if __name__ == "__main__":
+    main()
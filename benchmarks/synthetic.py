@@ -0,0 +1,215 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# benchmarks/synthetic.py
+# Helpers that synthesize test images locally for the benchmark scripts:
+# photo-like pixels, EXIF blocks (with GPS, camera tags and MakerNote
+# padding in either byte order) and whole geotagged corpora.
+import io
+import math
+import pathlib
+import random
+import shutil
+import struct
+
+from PIL import Image
+
+EXIF_LAYOUTS = ("minimal", "camera") # GPS only, or camera tags + MakerNote + GPS in the usual IFD order
+BYTE_ORDERS = {"II": "<", "MM": ">"}
+IMAGE_FORMATS = {"jpeg": ".jpg", "png": ".png"}
+_MAX_APP1_PAYLOAD = 65533 # A JPEG APP1 segment holds at most this many bytes
+# TIFF field types -> (struct format char per value, values per count)
+_FIELD_FORMATS = {1: "B", 2: "s", 3: "H", 4: "L", 5: "LL", 7: "s"}
+
+def build_exif(embedded_thumbnail: bytes = None):
+    """
+    Builds a minimal little-endian EXIF (APP1) payload. When
+    `embedded_thumbnail` (JPEG bytes) is given it is stored in IFD1, the
+    way cameras store their preview image.
+    """
+    # IFD0 with a single Orientation entry
+    ifd0 = struct.pack('<H', 1) + struct.pack('<HHII', 0x0112, 3, 1, 1)
+    if embedded_thumbnail is None:
+        ifd0 += struct.pack('<I', 0)
+        return b'Exif\x00\x00' + b'II*\x00' + struct.pack('<I', 8) + ifd0
+
+    ifd1_offset = 8 + len(ifd0) + 4
+    ifd0 += struct.pack('<I', ifd1_offset)
+    data_offset = ifd1_offset + 2 + 2 * 12 + 4
+    ifd1 = (
+        struct.pack('<H', 2)
+        + struct.pack('<HHII', 0x0201, 4, 1, data_offset)
+        + struct.pack('<HHII', 0x0202, 4, 1, len(embedded_thumbnail))
+        + struct.pack('<I', 0)
+    )
+    return b'Exif\x00\x00' + b'II*\x00' + struct.pack('<I', 8) + ifd0 + ifd1 + embedded_thumbnail
+
+def make_photo(size: tuple, seed: int = 0):
+    """Returns a photo-like RGB test image (fractal detail compresses like a real photo)."""
+    offset = seed * 0.01
+    box = (-2.0 + offset, -1.2, 0.8 + offset, 1.2)
+    return Image.effect_mandelbrot(size, box, 64).convert('RGB')
+
+def write_jpeg(path, size: tuple, embedded_size: tuple = None, seed: int = 0, quality: int = 90, exif: bytes = None):
+    """Writes a synthetic JPEG, optionally with an embedded EXIF thumbnail of `embedded_size`."""
+    img = make_photo(size, seed)
+    if exif is None:
+        embedded = None
+        if embedded_size:
+            buffer = io.BytesIO()
+            img.resize(embedded_size).save(buffer, 'JPEG', quality=80)
+            embedded = buffer.getvalue()
+        exif = build_exif(embedded)
+    img.save(path, 'JPEG', quality=quality, exif=exif)
+    return path
+
+def _dms_rationals(value: float):
+    """Degrees, minutes and seconds (1/1000 s) of an absolute coordinate, as RATIONAL pairs."""
+    value = abs(value)
+    degrees = int(value)
+    minutes = int((value - degrees) * 60)
+    millis = round(((value - degrees) * 60 - minutes) * 60 * 1000)
+    return [(degrees, 1), (minutes, 1), (millis, 1000)]
+
+def _field(order: str, field_type: int, value):
+    """Encodes one IFD value: returns (count, bytes)."""
+    if field_type == 2:
+        data = value.encode("ascii") + b"\x00"
+        return len(data), data
+    if field_type == 7:
+        return len(value), bytes(value)
+    if field_type == 5:
+        return len(value), struct.pack(order + "LL" * len(value), *(n for pair in value for n in pair))
+    return len(value), struct.pack(order + _FIELD_FORMATS[field_type] * len(value), *value)
+
+def _ifd_size(entries: list, order: str):
+    """Bytes an IFD takes including its out-of-line values (padded to even offsets)."""
+    extra = 0
+    for _, field_type, value in entries:
+        data = _field(order, field_type, value)[1]
+        if len(data) > 4:
+            extra += len(data) + len(data) % 2
+    return 2 + 12 * len(entries) + 4 + extra
+
+def _pack_ifd(entries: list, order: str, offset: int, next_ifd: int = 0):
+    """Packs an IFD placed at `offset`, its out-of-line values right after the entry table."""
+    table = struct.pack(order + "H", len(entries))
+    data_offset = offset + 2 + 12 * len(entries) + 4
+    data = b""
+    for tag, field_type, value in sorted(entries, key=lambda entry: entry[0]):
+        count, payload = _field(order, field_type, value)
+        if len(payload) > 4:
+            table += struct.pack(order + "HHLL", tag, field_type, count, data_offset + len(data))
+            data += payload + b"\x00" * (len(payload) % 2)
+        else:
+            table += struct.pack(order + "HHL", tag, field_type, count) + payload.ljust(4, b"\x00")
+    return table + struct.pack(order + "L", next_ifd) + data
+
+def build_geotagged_exif(lat: float, lon: float, layout: str = "camera", byte_order: str = "II",
+                         makernote_bytes: int = 0, model: str = "Synthetic Cam",
+                         date_time: str = "2024:05:17 12:30:00"):
+    """
+    Builds an EXIF (APP1) payload with a GPS position. "minimal" holds only
+    the GPS IFD; "camera" adds Make/Model/Orientation, an Exif IFD with
+    DateTimeOriginal and a MakerNote of `makernote_bytes` opaque bytes, laid
+    out like camera files: IFD0, Exif IFD, MakerNote, then the GPS IFD, so a
+    reader has to get past the MakerNote to reach the position.
+    """
+    if layout not in EXIF_LAYOUTS:
+        raise ValueError(f"Unknown EXIF layout '{layout}'. Expected one of {EXIF_LAYOUTS}.")
+    order = BYTE_ORDERS[byte_order]
+    gps = [
+        (0x0000, 1, [2, 3, 0, 0]), # GPSVersionID
+        (0x0001, 2, "N" if lat >= 0 else "S"),
+        (0x0002, 5, _dms_rationals(lat)),
+        (0x0003, 2, "E" if lon >= 0 else "W"),
+        (0x0004, 5, _dms_rationals(lon)),
+    ]
+    ifd0 = [(0x8825, 4, [0])]
+    exif_ifd = None
+    if layout == "camera":
+        ifd0 += [(0x010F, 2, "Synthetic"), (0x0110, 2, model), (0x0112, 3, [1]), (0x8769, 4, [0])]
+        exif_ifd = [(0x9003, 2, date_time)]
+        if makernote_bytes:
+            exif_ifd.append((0x927C, 7, random.Random(makernote_bytes).randbytes(makernote_bytes)))
+
+    # Sizes do not depend on the pointer values, so the offsets can be laid out first
+    exif_offset = 8 + _ifd_size(ifd0, order)
+    gps_offset = exif_offset + (_ifd_size(exif_ifd, order) if exif_ifd else 0)
+    ifd0 = [(tag, 4, [gps_offset if tag == 0x8825 else exif_offset]) if tag in (0x8769, 0x8825)
+            else (tag, field_type, value) for tag, field_type, value in ifd0]
+    tiff = byte_order.encode("ascii") + struct.pack(order + "HL", 42, 8) + _pack_ifd(ifd0, order, 8)
+    if exif_ifd:
+        tiff += _pack_ifd(exif_ifd, order, exif_offset)
+    tiff += _pack_ifd(gps, order, gps_offset)
+    return b"Exif\x00\x00" + tiff
+
+def write_png(path, size: tuple, seed: int = 0, exif: bytes = None):
+    """Writes a synthetic PNG, with `exif` (APP1 payload) stored as its eXIf chunk."""
+    img = make_photo(size, seed)
+    img.save(path, "PNG", exif=exif or b"", compress_level=1)
+    return path
+
+def generate_corpus(directory, count: int, size: tuple = (1600, 1200), formats=("jpeg",), layout: str = "camera",
+                    byte_order: str = "II", makernote_bytes: int = 0, duplicate_ratio: float = 0.0,
+                    folders: int = 4, seed: int = 0):
+    """
+    Writes `count` geotagged images below `directory`, spread over `folders`
+    camera-style subfolders, and returns a manifest of dicts with "path",
+    "latitude", "longitude" and "duplicate_of" (the path the file was
+    copied from, or None).
+
+    Formats alternate through `formats` ("jpeg", "png"). A share of
+    `duplicate_ratio` of the files are byte-identical copies of earlier
+    files, as when the same photo is exported twice. Positions are random
+    around a city centre; everything is reproducible from `seed`.
+    """
+    unknown = set(formats) - set(IMAGE_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown image formats {sorted(unknown)}. Expected some of {tuple(IMAGE_FORMATS)}.")
+    directory = pathlib.Path(directory)
+    rng = random.Random(seed)
+    duplicate_count = min(max(count - 1, 0), math.floor(count * duplicate_ratio))
+    duplicates = set(rng.sample(range(1, count), duplicate_count)) if duplicate_count else set()
+    manifest = []
+    for index in range(count):
+        fmt = formats[index % len(formats)]
+        folder = directory / "DCIM" / f"{100 + index % max(folders, 1)}CAMRA"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"IMG_{index:06d}{IMAGE_FORMATS[fmt]}"
+        if index in duplicates:
+            source = rng.choice([entry for entry in manifest[-64:] if entry["duplicate_of"] is None] or manifest)
+            path = path.with_suffix(pathlib.Path(source["path"]).suffix)
+            shutil.copyfile(source["path"], path)
+            manifest.append({**source, "path": str(path), "duplicate_of": source["path"]})
+            continue
+        lat, lon = 40.5 + rng.random() * 0.4, -74.2 + rng.random() * 0.5
+        exif = build_geotagged_exif(lat, lon, layout, byte_order, makernote_bytes,
+                                    model=f"Synthetic Cam {index % 7}")
+        if fmt == "jpeg":
+            if len(exif) - 2 > _MAX_APP1_PAYLOAD:
+                raise ValueError(f"EXIF block of {len(exif)} bytes does not fit a JPEG APP1 segment; "
+                                 f"lower makernote_bytes.")
+            write_jpeg(path, size, seed=seed * 100003 + index, exif=exif)
+        else:
+            write_png(path, size, seed=seed * 100003 + index, exif=exif)
+        manifest.append({"path": str(path), "latitude": lat, "longitude": lon, "duplicate_of": None})
+    return manifest
@@ -19,7 +19,10 @@ INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <--------------
 """
 
 # main.py
+import contextlib
+import json
 import logging
+import pathlib
 import sys
 import argparse # Keep argparse for command-line flags like verbose
 
@@ -37,22 +40,72 @@ log = logging.getLogger(__name__)
 
 # Import project modules *after* logging is configured
 try:
-    # Import the run function from the gui module
-    from pin_grid_spy import gui, config
+    # The GUI module is imported only when the GUI is started, so batch runs work without a display
+    from pin_grid_spy import config, image_processor, instrumentation, pipeline
 except ImportError as e:
     log.error(f"Import Error: {e}. Make sure you are running from the project root directory "
               "and the 'pin_grid_spy' package is accessible.")
     sys.exit(1)
 
+EXIT_CODES = {"complete": 0, "error": 1, "interrupted": 130}
+
+
+def run_batch(args):
+    """Runs the headless batch pipeline, writes its JSON summary and returns the exit code."""
+    # Logs go to stderr so that stdout carries only the summary
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and getattr(handler, "stream", None) is sys.stdout:
+            handler.setStream(sys.stderr)
+    input_dir = pathlib.Path(args.input or config.DEFAULT_INPUT_DIR)
+    output_dir = pathlib.Path(args.output or config.DEFAULT_OUTPUT_DIR)
+    log.info(f"--- Starting Pin Grid Spy batch run: {input_dir} -> {output_dir} ---")
+    try:
+        summary = pipeline.run_batch(input_dir, output_dir, restart=args.restart,
+                                     checkpoint_interval=args.checkpoint_interval,
+                                     executor=args.executor, workers=args.workers)
+    except (OSError, ValueError) as e:
+        log.error(f"Batch run failed: {e}")
+        summary = {"status": "error", "input_dir": str(input_dir), "output_dir": str(output_dir), "error": str(e)}
+    summary_file = pathlib.Path(args.summary) if args.summary else output_dir / config.BATCH_SUMMARY_FILENAME
+    try:
+        pipeline.write_summary(summary, summary_file)
+    except OSError as e:
+        log.error(f"Could not write the summary to {summary_file}: {e}")
+    print(json.dumps(summary))
+    return EXIT_CODES[summary["status"]]
+
 
 def main():
-    parser = argparse.ArgumentParser(description="Run Pin Grid Spy GUI.")
+    parser = argparse.ArgumentParser(
+        description="Run Pin Grid Spy. Starts the GUI, or a headless batch run with -i/-o or --batch.")
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="Enable verbose debug logging."
     )
-    # Add other CLI args if needed in the future (e.g., load specific session)
+    parser.add_argument("-i", "--input",
+                        help=f"Input image directory for a batch run (default: {config.DEFAULT_INPUT_DIR}).")
+    parser.add_argument("-o", "--output",
+                        help=f"Output directory for a batch run (default: {config.DEFAULT_OUTPUT_DIR}).")
+    parser.add_argument("--batch", action="store_true", help="Run headless with the default input/output directories.")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an earlier batch run.")
+    parser.add_argument("--executor", choices=image_processor.EXECUTOR_MODES,
+                        help=f"Worker pool for a batch run (default: {config.PROCESSING_EXECUTOR}).")
+    parser.add_argument("--workers", type=int, help="Worker count for a batch run (default: one per CPU core).")
+    parser.add_argument("--checkpoint-interval", type=float,
+                        help=f"Seconds between checkpoints (default: {config.BATCH_CHECKPOINT_INTERVAL}).")
+    parser.add_argument("--summary", help=f"Where to write the JSON summary "
+                                          f"(default: {config.BATCH_SUMMARY_FILENAME} in the output directory).")
+    parser.add_argument("--metrics", help="Record per-stage timings and write them to this file "
+                                          "(Prometheus text for .prom/.txt, JSON otherwise).")
+    parser.add_argument("--profile", help="Profile the whole run and write the result to this file. "
+                                          "Images are then processed in-process (--executor serial, one "
+                                          "tile export worker) so that the profile covers the work.")
+    parser.add_argument("--profiler", choices=instrumentation.PROFILERS, default="cprofile",
+                        help="Profiler for --profile (pyinstrument must be installed separately and "
+                             "only sees the main thread, not the pipeline and background job threads).")
+    parser.add_argument("--event-log",
+                        help="Append every image outcome (path, status, reason) to this JSON Lines file.")
     args = parser.parse_args()
 
     if args.verbose:
@@ -61,10 +114,30 @@ def main():
             handler.setLevel(logging.DEBUG)
         log.debug("Verbose logging enabled.")
 
-    log.info("--- Starting Pin Grid Spy GUI ---")
-    # Call the run function from the gui module
-    gui.run()
-    log.info("--- Pin Grid Spy GUI Closed ---")
+    if args.event_log:
+        config.PROGRESS_EVENT_LOG = pathlib.Path(args.event_log)
+    if args.metrics:
+        instrumentation.enable()
+    if args.profile:
+        # Profilers cannot see into pool processes
+        args.executor = config.PROCESSING_EXECUTOR = "serial"
+        config.MAP_TILES_WORKERS = 1
+    profiling = instrumentation.profile(args.profile, args.profiler) if args.profile else contextlib.nullcontext()
+    exit_code = 0
+    try:
+        with profiling:
+            if args.batch or args.input or args.output:
+                exit_code = run_batch(args)
+            else:
+                from pin_grid_spy import gui
+                log.info("--- Starting Pin Grid Spy GUI ---")
+                # Call the run function from the gui module
+                gui.run()
+                log.info("--- Pin Grid Spy GUI Closed ---")
+    finally:
+        if args.metrics:
+            instrumentation.write_report(args.metrics)
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
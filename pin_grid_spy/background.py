@@ -0,0 +1,246 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/background.py
+# Background jobs for the GUI. A job runs on its own thread and reports
+# back through a `post(event, value)` callable; the GUI passes
+# window.write_event_value, which is safe to call from any thread and wakes
+# up the window.read() loop. Results are batched (at most one post per
+# config.GUI_UPDATE_INTERVAL seconds) so that large runs do not flood the
+# event loop. Jobs know nothing about PySimpleGUI and can be tested with
+# any callable.
+import abc
+import logging
+import pathlib
+import threading
+import time
+
+from . import config, image_processor, instrumentation, scanner
+
+log = logging.getLogger(__name__)
+
+PROCESS_BATCH_EVENT = "-PROCESS-BATCH-"
+PROCESS_DONE_EVENT = "-PROCESS-DONE-"
+SCAN_BATCH_EVENT = "-SCAN-BATCH-"
+SCAN_DONE_EVENT = "-SCAN-DONE-"
+
+def format_duration(seconds: float):
+    """Formats seconds as H:MM:SS (or M:SS under an hour)."""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class ProgressMeter:
+    """Tracks completed items against a total and derives the rate and ETA."""
+
+    def __init__(self, total: int, clock=time.perf_counter):
+        self.total = total
+        self.done = 0
+        self._clock = clock
+        self._start = clock()
+
+    def advance(self, count: int = 1):
+        self.done += count
+
+    @property
+    def elapsed(self):
+        return self._clock() - self._start
+
+    @property
+    def rate(self):
+        """Items per second since the start."""
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Estimated seconds to completion, or None before the first item."""
+        rate = self.rate
+        return (self.total - self.done) / rate if rate > 0 else None
+
+    def summary(self):
+        eta = self.eta
+        return (f"{self.done}/{self.total} images, {self.rate:.1f} img/s, "
+                f"ETA {format_duration(eta) if eta is not None else '--:--'}")
+
+
+class BackgroundJob(abc.ABC):
+    """Base class of the jobs: runs `_run` on a daemon thread that can be asked to stop."""
+
+    thread_name = "pgs-job"
+
+    def __init__(self, post, update_interval: float = None):
+        self.post = post
+        self.update_interval = config.GUI_UPDATE_INTERVAL if update_interval is None else update_interval
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._profiled_run, name=self.thread_name, daemon=True)
+
+    @abc.abstractmethod
+    def _run(self):
+        """The job body, run on the job's thread; checks `cancelled` between items."""
+
+    def _profiled_run(self):
+        with instrumentation.profile_thread():
+            self._run()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Asks the job to stop at the next item."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout: float = None):
+        self._thread.join(timeout)
+
+
+class ProcessingJob(BackgroundJob):
+    """
+    Processes a list of image files on a background thread with
+    `image_processor.iter_process_files` (and so on its worker pool).
+
+    Posts PROCESS_BATCH_EVENT with {"results": [(path, record, status), ...],
+    "done", "total", "rate", "eta", "summary"} as images complete, and
+    PROCESS_DONE_EVENT with {"done", "total", "with_gps", "elapsed",
+    "cancelled", "error"} once at the end, also after a cancel or an error.
+    Cancelling drops the queued images; the running chunks finish.
+    """
+
+    thread_name = "pgs-processing"
+
+    def __init__(self, image_paths: list, thumb_dir, post, update_interval: float = None, **process_kwargs):
+        self.image_paths = list(image_paths)
+        self.thumb_dir = thumb_dir
+        self.process_kwargs = process_kwargs
+        super().__init__(post, update_interval)
+
+    def _post_batch(self, meter: ProgressMeter, batch: list):
+        self.post(PROCESS_BATCH_EVENT, {
+            "results": batch,
+            "done": meter.done,
+            "total": meter.total,
+            "rate": meter.rate,
+            "eta": meter.eta,
+            "summary": meter.summary(),
+        })
+
+    def _run(self):
+        meter = ProgressMeter(len(self.image_paths))
+        with_gps = 0
+        error = None
+        batch = []
+        last_post = time.perf_counter()
+        log.info(f"Background processing of {meter.total} images started.")
+        try:
+            results = image_processor.iter_process_files(self.image_paths, self.thumb_dir, **self.process_kwargs)
+            try:
+                for path, record, status in results:
+                    batch.append((path, record, status))
+                    meter.advance()
+                    with_gps += record is not None
+                    if self._cancel.is_set():
+                        break
+                    if time.perf_counter() - last_post >= self.update_interval:
+                        self._post_batch(meter, batch)
+                        batch, last_post = [], time.perf_counter()
+            finally:
+                results.close() # Cancels queued chunks when stopping early
+        except Exception as e:
+            log.error(f"Background processing failed: {e}", exc_info=True)
+            error = str(e)
+        if batch:
+            self._post_batch(meter, batch)
+        log.info(f"Background processing {'cancelled' if self.cancelled else 'finished'}: "
+                 f"{meter.done}/{meter.total} images, {with_gps} with GPS data in {meter.elapsed:.2f}s.")
+        self.post(PROCESS_DONE_EVENT, {
+            "done": meter.done,
+            "total": meter.total,
+            "with_gps": with_gps,
+            "elapsed": meter.elapsed,
+            "cancelled": self.cancelled,
+            "error": error,
+        })
+
+
+class DirectoryScanJob(BackgroundJob):
+    """
+    Enumerates the supported images below one or more directories on a
+    background thread with `scanner.scan_images` (recursive by default).
+
+    Posts SCAN_BATCH_EVENT with {"job", "paths": [...], "found", "directory"} as
+    images are found, at most once per update interval, and SCAN_DONE_EVENT
+    with {"job", "roots", "found", "elapsed", "cancelled", "error"} once at
+    the end, also after a cancel or an error.
+    """
+
+    thread_name = "pgs-scan"
+
+    def __init__(self, roots: list, post, update_interval: float = None, **scan_kwargs):
+        self.roots = [pathlib.Path(root) for root in roots]
+        self.scan_kwargs = {"recursive": True, **scan_kwargs}
+        super().__init__(post, update_interval)
+
+    def _run(self):
+        start = time.perf_counter()
+        found = 0
+        error = None
+        batch = []
+        root = None
+        last_post = start
+        log.info(f"Background scan of {len(self.roots)} directories started.")
+        try:
+            for root in self.roots:
+                for path in scanner.scan_images(root, **self.scan_kwargs):
+                    if self._cancel.is_set():
+                        break
+                    batch.append(path)
+                    found += 1
+                    if time.perf_counter() - last_post >= self.update_interval:
+                        self.post(SCAN_BATCH_EVENT, {"job": self, "paths": batch, "found": found, "directory": root})
+                        batch, last_post = [], time.perf_counter()
+                if self._cancel.is_set():
+                    break
+        except Exception as e:
+            log.error(f"Background scan failed: {e}", exc_info=True)
+            error = str(e)
+        if batch:
+            self.post(SCAN_BATCH_EVENT, {"job": self, "paths": batch, "found": found, "directory": root})
+        elapsed = time.perf_counter() - start
+        log.info(f"Background scan {'cancelled' if self.cancelled else 'finished'}: "
+                 f"{found} images found in {elapsed:.2f}s.")
+        self.post(SCAN_DONE_EVENT, {
+            "job": self,
+            "roots": self.roots,
+            "found": found,
+            "elapsed": elapsed,
+            "cancelled": self.cancelled,
+            "error": error,
+        })
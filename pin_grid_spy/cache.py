@@ -0,0 +1,201 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/cache.py
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+
+from . import config, thumbnail_store
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    thumb_dir    TEXT NOT NULL,
+    path         TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    mtime_ns     INTEGER NOT NULL,
+    content_hash TEXT,
+    record       TEXT,
+    PRIMARY KEY (thumb_dir, path)
+)
+"""
+
+def file_identity(path: pathlib.Path):
+    """Returns the (size, mtime_ns) pair used to detect changed files."""
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+def content_hash(path: pathlib.Path):
+    """Returns a BLAKE2b hex digest of the file contents."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def content_hash_bytes(data):
+    """Same digest as `content_hash`, for contents already in memory (bytes or mmap)."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+class MetadataCache:
+    """
+    SQLite index of previously processed images, stored in the output
+    directory. Rows are keyed by source path and validated against the
+    file's size and mtime (and optionally a content hash), so unchanged
+    files resolve without re-reading EXIF or regenerating thumbnails.
+    Images that were skipped (no GPS, unreadable) are cached as well.
+    """
+
+    def __init__(self, db_path: pathlib.Path, thumb_dir: pathlib.Path, use_hash: bool = None):
+        self.db_path = pathlib.Path(db_path)
+        self.thumb_dir = pathlib.Path(thumb_dir)
+        self.use_hash = config.METADATA_CACHE_USE_HASH if use_hash is None else use_hash
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute(_SCHEMA)
+        self._thumb_key = str(self.thumb_dir)
+        self._seen = set()
+        self._pending_writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def for_thumb_dir(cls, thumb_dir: pathlib.Path, use_hash: bool = None):
+        """Opens the cache that lives next to the given thumbnail directory."""
+        thumb_dir = pathlib.Path(thumb_dir)
+        return cls(thumb_dir.parent / config.METADATA_CACHE_FILENAME, thumb_dir, use_hash)
+
+    def lookup(self, path: pathlib.Path):
+        """
+        Returns (hit, record, identity). `record` may be None on a hit when
+        the image was previously skipped. `identity` should be passed back
+        to `store` after processing a miss.
+        """
+        path_str = str(path)
+        self._seen.add(path_str)
+        try:
+            identity = file_identity(path)
+        except OSError:
+            self.misses += 1
+            return False, None, None
+
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, content_hash, record FROM images WHERE thumb_dir = ? AND path = ?",
+            (self._thumb_key, path_str)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return False, None, identity
+
+        size, mtime_ns, stored_hash, record_json = row
+        if (size, mtime_ns) != identity:
+            # Identity changed; with hashing enabled an identical copy (e.g. new mtime) still counts.
+            if not (self.use_hash and stored_hash and size == identity[0] and stored_hash == content_hash(path)):
+                self.misses += 1
+                return False, None, identity
+            self._conn.execute(
+                "UPDATE images SET mtime_ns = ? WHERE thumb_dir = ? AND path = ?",
+                (identity[1], self._thumb_key, path_str)
+            )
+
+        record = json.loads(record_json) if record_json else None
+        if record and ("phash" not in record
+                       or record["thumbnail_rel_path"] != self._expected_thumbnail(path, record)):
+            # Written by an older version (no content-addressed thumbnail or
+            # perceptual hash) or with another THUMBNAIL_FORMAT
+            log.debug("Cached record does not match the current settings, reprocessing: %s", path)
+            self.misses += 1
+            return False, None, identity
+        if record and not (self.thumb_dir.parent / record["thumbnail_rel_path"]).exists():
+            log.debug("Cached thumbnail missing, reprocessing: %s", path)
+            self.misses += 1
+            return False, None, identity
+
+        self.hits += 1
+        return True, record, identity
+
+    def _expected_thumbnail(self, path: pathlib.Path, record: dict):
+        """Returns the thumbnail_rel_path the current settings would give `record`, or None."""
+        digest = record.get("content_hash")
+        if not digest:
+            return None
+        suffix = thumbnail_store.thumbnail_suffix(pathlib.Path(path).suffix)
+        return thumbnail_store.thumbnail_rel_path(self.thumb_dir,
+                                                  thumbnail_store.thumbnail_path(self.thumb_dir, digest, suffix))
+
+    def store(self, path: pathlib.Path, record, identity):
+        """Records the processing result (dict or None) for `path`."""
+        if identity is None:
+            return
+        path_str = str(path)
+        self._seen.add(path_str)
+        digest = None
+        if self.use_hash:
+            digest = record.get("content_hash") if record else None
+            digest = digest or content_hash(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO images (thumb_dir, path, size, mtime_ns, content_hash, record) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (self._thumb_key, path_str, identity[0], identity[1], digest,
+             json.dumps(record) if record else None)
+        )
+        self._pending_writes += 1
+        if self._pending_writes >= config.METADATA_CACHE_COMMIT_INTERVAL:
+            self.commit()
+
+    def prune(self, root: pathlib.Path):
+        """
+        Deletes entries under `root` that were not looked up or stored
+        since this cache was opened (deleted, renamed or moved files).
+        Returns the number of removed entries.
+        """
+        root_str = str(root).rstrip(os.sep) + os.sep
+        stale = [
+            (self._thumb_key, path) for (path,) in self._conn.execute(
+                "SELECT path FROM images WHERE thumb_dir = ?", (self._thumb_key,)
+            )
+            if path.startswith(root_str) and path not in self._seen
+        ]
+        self._conn.executemany("DELETE FROM images WHERE thumb_dir = ? AND path = ?", stale)
+        self.commit()
+        if stale:
+            log.info(f"Pruned {len(stale)} stale cache entries under {root}")
+        return len(stale)
+
+    def commit(self):
+        self._conn.commit()
+        self._pending_writes = 0
+
+    def close(self):
+        self.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
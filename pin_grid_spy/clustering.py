@@ -0,0 +1,158 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/clustering.py
+# Build-time, grid-based point clustering for the map. For every zoom level
+# the points are binned into square cells of config.MAP_CLUSTER_CELL_PX
+# screen pixels (in Web Mercator), which is what Leaflet.markercluster
+# approximates in the browser on every page load. Because a cell at zoom z
+# covers exactly four cells at zoom z + 1, the levels form a hierarchy
+# without storing explicit parent links. Each level is grouped by 256 px map
+# tile so the browser can look up just the clusters inside the viewport.
+# `export_cluster_tree` writes one script per zoom level next to the map, so
+# the page loads only the level it is showing instead of the whole tree:
+#   level_<z>.js          PinGridSpy.loadClusterLevel(z, {...}); clusters for z <= maxZoom
+#   level_<maxZoom+1>.js  the tile index over the individual points
+import json
+import logging
+import math
+import pathlib
+
+import numpy as np
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+TILE_SIZE = 256
+_MAX_LATITUDE_SIN = 0.9999 # Clamp near the poles, as Web Mercator does
+
+def project(lats, lons, zoom: int):
+    """Projects WGS84 coordinates to Web Mercator world pixels at `zoom`."""
+    world = TILE_SIZE * (2 ** zoom)
+    siny = np.clip(np.sin(np.radians(lats)), -_MAX_LATITUDE_SIN, _MAX_LATITUDE_SIN)
+    x = (np.asarray(lons) + 180.0) / 360.0 * world
+    y = (0.5 - np.log((1 + siny) / (1 - siny)) / (4 * math.pi)) * world
+    return x, y
+
+def tile_index(tile_x, tile_y):
+    """
+    Sorts items by map tile. Returns (order, tiles) where `order` lists item
+    indices grouped by tile and `tiles` maps "x,y" to a [start, end) slice
+    of `order`.
+    """
+    if len(tile_x) == 0:
+        return np.zeros(0, dtype=np.int64), {}
+    keys = (tile_x.astype(np.int64) << 32) | tile_y.astype(np.int64)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    unique_keys, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+    tiles = {
+        f"{int(key >> 32)},{int(key & 0xFFFFFFFF)}": [int(start), int(start + count)]
+        for key, start, count in zip(unique_keys, starts, counts)
+    }
+    return order, tiles
+
+def cluster_level(lats, lons, zoom: int, cell_px: int):
+    """
+    Clusters the points for one zoom level. Returns a dict of columnar
+    arrays (centroid lat/lon, member count, and the point index for
+    single-point clusters, -1 otherwise) ordered by map tile, plus the tile
+    lookup table.
+    """
+    x, y = project(lats, lons, zoom)
+    cell_x = np.floor(x / cell_px).astype(np.int64)
+    cell_y = np.floor(y / cell_px).astype(np.int64)
+    cell_keys = (cell_x << 32) | cell_y
+    unique_cells, inverse, counts = np.unique(cell_keys, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+
+    centroid_lat = np.bincount(inverse, weights=lats) / counts
+    centroid_lon = np.bincount(inverse, weights=lons) / counts
+    first_point = np.empty(len(unique_cells), dtype=np.int64)
+    first_point[inverse[::-1]] = np.arange(len(lats) - 1, -1, -1) # First member of each cell
+    point = np.where(counts == 1, first_point, -1)
+
+    cells_per_tile = TILE_SIZE // cell_px
+    order, tiles = tile_index((unique_cells >> 32) // cells_per_tile,
+                               (unique_cells & 0xFFFFFFFF) // cells_per_tile)
+    return {
+        "lat": np.round(centroid_lat[order], 6).tolist(),
+        "lon": np.round(centroid_lon[order], 6).tolist(),
+        "count": counts[order].tolist(),
+        "point": point[order].tolist(),
+        "tiles": tiles,
+    }
+
+def build_cluster_tree(lats, lons, max_zoom: int = None, cell_px: int = None):
+    """
+    Precomputes clusters for zoom levels 0..`max_zoom` (default
+    config.MAP_CLUSTER_MAX_ZOOM). Above `max_zoom` the map shows individual
+    points; for those zooms the tree holds a tile index over the raw points
+    at `max_zoom + 1` ("pointOrder" / "pointTiles").
+    """
+    max_zoom = config.MAP_CLUSTER_MAX_ZOOM if max_zoom is None else max_zoom
+    cell_px = cell_px or config.MAP_CLUSTER_CELL_PX
+    if TILE_SIZE % cell_px:
+        raise ValueError(f"Cluster cell size must divide {TILE_SIZE}, got {cell_px}.")
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+
+    levels = [cluster_level(lats, lons, zoom, cell_px) for zoom in range(max_zoom + 1)]
+    x, y = project(lats, lons, max_zoom + 1)
+    point_order, point_tiles = tile_index(np.floor(x / TILE_SIZE).astype(np.int64),
+                                           np.floor(y / TILE_SIZE).astype(np.int64))
+    log.info(f"Precomputed clusters for {len(lats)} points over zoom 0-{max_zoom}: "
+             f"{sum(len(level['count']) for level in levels)} clusters in total.")
+    return {
+        "maxZoom": max_zoom,
+        "tileSize": TILE_SIZE,
+        "levels": levels,
+        "pointOrder": point_order.tolist(),
+        "pointTiles": point_tiles,
+    }
+
+def _level_script(zoom: int, payload: dict):
+    """One level as a script (browsers block fetch() of JSON on file:// pages)."""
+    return "PinGridSpy.loadClusterLevel(%d, %s);\n" % (
+        zoom, json.dumps(payload, separators=(',', ':')).replace("</", "<\\/"))
+
+def export_cluster_tree(tree: dict, clusters_dir: pathlib.Path):
+    """
+    Writes each level of `tree` to clusters_dir/level_<z>.js, and the point
+    tile index used above maxZoom to level_<maxZoom+1>.js, replacing the
+    files of a previous export. Returns the small header the map embeds:
+    {"maxZoom", "tileSize"}.
+    """
+    clusters_dir = pathlib.Path(clusters_dir)
+    clusters_dir.mkdir(parents=True, exist_ok=True)
+    for stale in clusters_dir.glob("level_*.js"):
+        stale.unlink()
+    nbytes = 0
+    for zoom, level in enumerate(tree["levels"]):
+        script = _level_script(zoom, level)
+        (clusters_dir / f"level_{zoom}.js").write_text(script, encoding='utf-8')
+        nbytes += len(script)
+    script = _level_script(tree["maxZoom"] + 1, {"order": tree["pointOrder"], "tiles": tree["pointTiles"]})
+    (clusters_dir / f"level_{tree['maxZoom'] + 1}.js").write_text(script, encoding='utf-8')
+    nbytes += len(script)
+    log.info(f"Wrote {tree['maxZoom'] + 2} cluster level files ({nbytes / 1024:.0f} KiB) to {clusters_dir}.")
+    return {"maxZoom": tree["maxZoom"], "tileSize": tree["tileSize"]}
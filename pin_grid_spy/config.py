@@ -33,12 +33,97 @@ DEFAULT_MAP_FILENAME = "map.html"
 
 # --- Image Processing ---
 THUMBNAIL_SIZE = (200, 200)  # (width, height) in pixels
+THUMBNAIL_MODE = "fast"      # "fast" (JPEG draft decode + bilinear) or "quality" (Lanczos)
+THUMBNAIL_USE_EMBEDDED = True  # In "fast" mode, reuse the EXIF thumbnail when it is large enough
+THUMBNAIL_QUALITY_REDUCING_GAP = 3.0  # Draft headroom used by "quality" mode (see Image.thumbnail)
+THUMBNAIL_MANIFEST_FILENAME = "manifest.jsonl"  # Source path -> thumbnail map, in the thumbnail directory
+THUMBNAIL_FORMAT = "source"  # "source" (JPEG/PNG, as the input), "webp" or "avif" (falls back to WebP if unsupported)
+THUMBNAIL_QUALITY = 75       # Encoder quality for JPEG/WebP/AVIF thumbnails (0-100)
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
+EXIF_READER = "fast"         # "fast" (header-only reader, exifread fallback) or "exifread"
+
+# --- Directory Scanning ---
+SCAN_RECURSIVE = True        # Descend into subdirectories
+SCAN_SYMLINKS = "files"      # "skip", "files" (follow symlinked files) or "follow" (also directories)
+SCAN_INCLUDE = []            # Glob patterns; if set, only matching files are processed
+SCAN_EXCLUDE = []            # Glob patterns for files/directories to skip (e.g. ".git", "*/cache/*")
+
+# --- Parallel Processing ---
+PROCESSING_EXECUTOR = "process"   # "process", "thread" or "serial"
+PROCESSING_WORKERS = None         # None = one worker per CPU core
+PROCESSING_CHUNK_SIZE = 16        # Images handed to a worker per task
+PROCESSING_MAX_IN_FLIGHT = 4      # Pending chunks allowed per worker (bounds memory)
+
+# --- Metadata Cache ---
+METADATA_CACHE_ENABLED = True
+METADATA_CACHE_FILENAME = "metadata_cache.sqlite"  # Stored in the output directory
+METADATA_CACHE_USE_HASH = False     # Also match files by content hash (reads whole file)
+METADATA_CACHE_COMMIT_INTERVAL = 500
+
+# --- GPS Validation ---
+GPS_REJECT_NULL_ISLAND = True  # Treat (0, 0) fixes (placeholders written by some phones) as missing GPS data
+GPS_NULL_ISLAND_TOLERANCE_DEG = 1e-6 # Coordinates this close to (0, 0) count as null island
+
+# --- Near-Duplicate Detection ---
+DEDUP_HASH_DISTANCE = 6      # Max differing bits of the 64-bit dHash for two images to be near-duplicates
+DEDUP_MAX_METERS = 100       # Near-duplicates must also be this close together (0 = ignore location)
+
+# --- Spatial Index ---
+SPATIAL_INDEX_CELL_DEG = 0.01  # Grid cell size in degrees (~1.1 km of latitude) for bbox/radius/nearest queries
+
+# --- Progress Reporting ---
+PROGRESS_INTERVAL = 10.0       # Seconds between progress summary lines (per-image lines are DEBUG only)
+PROGRESS_EVENT_LOG = None      # JSON Lines file that every image outcome is appended to (None = off)
+PROGRESS_MAX_ERROR_LOGS = 20   # Unexpected exceptions logged at ERROR per reason (and process); later ones at DEBUG
+
+# --- Instrumentation ---
+INSTRUMENTATION_ENABLED = False  # Record per-stage timing histograms (main.py --metrics enables it)
+INSTRUMENTATION_BUCKETS_PER_DECADE = 20 # Histogram resolution: ~12% wide buckets from 1 us to 1000 s
+
+# --- GUI ---
+GUI_UPDATE_INTERVAL = 0.25     # Seconds between batched result/progress updates from background jobs
+GUI_FILE_LIST_ROWS = 15        # Visible rows of the file list; only these rows are rendered
+GUI_SCROLL_ROWS = 3            # File list rows scrolled per mouse wheel step
+
+# --- Batch Mode ---
+BATCH_QUEUE_SIZE = 256         # Paths/results buffered between pipeline stages (bounds memory)
+BATCH_CHECKPOINT_INTERVAL = 30.0 # Seconds between checkpoints of a batch run
+BATCH_CHECKPOINT_FILENAME = "batch.pgsession" # Checkpoint session in the output directory; resumed by the next run
+BATCH_SUMMARY_FILENAME = "batch_summary.json" # Run summary in the output directory
+BATCH_SUMMARY_MAX_FAILURES = 100 # Failed paths listed in the summary (all are counted)
+
+# --- Sessions ---
+SESSION_FILE_EXTENSION = ".pgsession" # SQLite file with the records, file list and settings of a case
+SESSION_PAGE_SIZE = 2048       # Records read per page when a loaded session is accessed
+SESSION_PAGE_CACHE = 16        # Pages kept in memory
+SESSION_SETTINGS = ["THUMBNAIL_SIZE", "THUMBNAIL_FORMAT", "THUMBNAIL_QUALITY", "MAP_RENDER_MODE",
+                    "MAP_GROUP_NEAR_DUPLICATES", "MAP_THUMBNAIL_ATLAS"] # Config values saved with a session
 
 # --- Map Generation ---
 DEFAULT_MAP_LOCATION = [20, 0]  # Default center latitude/longitude if no images
 DEFAULT_MAP_ZOOM = 2            # Default zoom level
 GOOGLE_MAPS_URL_TEMPLATE = "https://www.google.com/maps?q={lat},{lon}"
+MAP_RENDER_MODE = "auto"        # "auto", "data" (compact JSON payload, popups built in JS), "clustered",
+                                # "canvas", "tiles" or "folium"
+MAP_CANVAS_THRESHOLD = 50000    # "auto" switches to MAP_LARGE_RENDER_MODE above this many points
+MAP_LARGE_RENDER_MODE = "clustered" # "clustered" (clusters precomputed per zoom), "canvas" (all points, canvas markers)
+                                    # or "tiles" (tile pyramid on disk, see MAP_TILES_*)
+MAP_CLUSTER_MAX_ZOOM = 16       # Highest zoom with precomputed clusters; individual points are shown above it
+MAP_CLUSTER_CELL_PX = 64        # Cluster grid cell size in screen pixels (must divide 256)
+MAP_CLUSTERS_DIRNAME = "map_clusters" # Per-zoom cluster level scripts (relative to the map file) for "clustered"
+MAP_CANVAS_STYLE = {"radius": 4, "color": "#c0392b", "weight": 1, "fillOpacity": 0.7}
+MAP_INCREMENTAL = False         # Keep markers in chunked data files next to a stable map shell
+MAP_DATA_DIRNAME = "map_data"   # Data directory (relative to the map file) for incremental mode
+MAP_DATA_CHUNKS = 64            # Number of hash buckets the points are split into
+MAP_GROUP_NEAR_DUPLICATES = False # One marker per near-duplicate group (see DEDUP_*) instead of one per image
+MAP_THUMBNAIL_ATLAS = False     # Pack popup thumbnails into sprite sheets instead of one file per image
+MAP_ATLAS_DIRNAME = "thumbnail_atlas" # Sprite sheet directory (relative to the map file)
+MAP_ATLAS_FORMAT = "webp"       # Sprite sheet format: "webp", "avif" or "jpeg"
+MAP_ATLAS_GRID = (16, 16)       # Thumbnail cells per sheet (columns, rows); cells are THUMBNAIL_SIZE
+MAP_TILES_DIRNAME = "map_tiles" # Tile pyramid directory (relative to the map file) for the "tiles" mode
+MAP_TILES_MAX_ZOOM = 15         # Deepest pre-rendered zoom; its vector tiles carry the individual points
+MAP_TILES_WORKERS = None        # Processes rendering zoom levels in parallel (None = one per CPU core)
+MAP_TILES_DENSITY_SATURATION = 50  # Points per pixel neighbourhood drawn at full density colour
 
 # --- Sidebar ---
 SIDEBAR_CSS_PATH = "static/leaflet-sidebar.min.css" # Relative to output html
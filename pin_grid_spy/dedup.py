@@ -0,0 +1,202 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/dedup.py
+# Near-duplicate detection (burst shots, re-saved or resized copies) with a
+# 64-bit difference hash (dHash) per image. Candidate pairs are found with a
+# multi-index hash table: the hash is split into `max_distance + 1` bit
+# chunks, and by the pigeonhole principle two hashes that differ in at most
+# `max_distance` bits agree exactly on at least one chunk. Only hashes
+# sharing a chunk value are compared, instead of all n^2 pairs.
+import logging
+import math
+
+import numpy as np
+from PIL import Image
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+HASH_BITS = 64
+_POPCOUNT8 = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+_EARTH_RADIUS_M = 6371000.0
+_METERS_PER_DEGREE = _EARTH_RADIUS_M * math.pi / 180
+_FULL_BLOCK = 2048 # Buckets up to this size are compared as one matrix, larger ones in row blocks
+
+def dhash(img: Image.Image):
+    """
+    Returns the 64-bit difference hash of `img` as 16 hex digits: the image
+    is reduced to 9x8 grey pixels and each bit records whether a pixel is
+    brighter than its left neighbour. Robust to rescaling and recompression.
+    """
+    img.draft("L", (36, 32)) # JPEGs can decode straight to a small greyscale image
+    small = img.convert("L").resize((9, 8), Image.Resampling.BOX)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return np.packbits(bits).tobytes().hex()
+
+def hamming(hashes_a, hashes_b):
+    """Element-wise number of differing bits between two uint64 arrays."""
+    xor = np.bitwise_xor(hashes_a, hashes_b)
+    if hasattr(np, "bitwise_count"): # NumPy >= 2.0
+        return np.bitwise_count(xor)
+    xor = np.ascontiguousarray(xor, dtype=np.uint64)
+    return _POPCOUNT8[xor.view(np.uint8)].reshape(xor.shape + (8,)).sum(axis=-1)
+
+def _chunk_bounds(chunks: int):
+    """Splits the hash bits into `chunks` contiguous (shift, width) ranges."""
+    bounds, start = [], 0
+    for index in range(chunks):
+        width = HASH_BITS // chunks + (1 if index < HASH_BITS % chunks else 0)
+        bounds.append((start, width))
+        start += width
+    return bounds
+
+def _bucket_pairs(hashes, members, max_distance: int):
+    """Yields (i, j) index pairs within `members` whose hashes are within `max_distance` bits."""
+    for start in range(0, len(members), _FULL_BLOCK):
+        rows = members[start:start + _FULL_BLOCK]
+        distances = hamming(hashes[rows][:, None], hashes[members][None, :])
+        row_index, col_index = np.nonzero(distances <= max_distance)
+        keep = rows[row_index] < members[col_index]
+        yield from zip(rows[row_index[keep]].tolist(), members[col_index[keep]].tolist())
+
+def near_duplicate_pairs(hashes, max_distance: int):
+    """
+    Returns the set of index pairs (i < j) of `hashes` (uint64 array of
+    distinct values) that differ in at most `max_distance` bits.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    pairs = set()
+    if max_distance <= 0 or len(hashes) < 2:
+        return pairs
+    for shift, width in _chunk_bounds(min(max_distance + 1, HASH_BITS)):
+        keys = (hashes >> np.uint64(shift)) & np.uint64((1 << width) - 1)
+        order = np.argsort(keys, kind='stable')
+        _, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        for start, count in zip(starts[counts > 1], counts[counts > 1]):
+            pairs.update(_bucket_pairs(hashes, order[start:start + count], max_distance))
+    return pairs
+
+def _distance_m(a: dict, b: dict):
+    """Approximate ground distance between two records (equirectangular, fine at these scales)."""
+    lat_a, lat_b = math.radians(a['latitude']), math.radians(b['latitude'])
+    dx = math.radians(b['longitude'] - a['longitude']) * math.cos((lat_a + lat_b) / 2)
+    return _EARTH_RADIUS_M * math.hypot(dx, lat_b - lat_a)
+
+def _location_cell(record: dict, step: float):
+    """(latitude band, longitude cell) of a record on a grid of `step` degrees."""
+    return math.floor(record['latitude'] / step), math.floor(record['longitude'] / step)
+
+def _nearby_cells(cells: dict, cell: tuple, step: float):
+    """
+    Yields the entries of `cells` ({(band, cell): items}) that can hold
+    points within `step` degrees of latitude (the distance limit) of a
+    point in `cell`. Longitude cells shrink towards the poles, so the
+    search widens with the latitude of each band.
+    """
+    band, lon_cell = cell
+    for near_band in (band - 1, band, band + 1):
+        edge = min(90.0, (max(abs(near_band), abs(near_band + 1)) + 1) * step)
+        cos_edge = math.cos(math.radians(edge))
+        reach = math.ceil(1 / cos_edge) if cos_edge > 1e-9 else None # None: every longitude
+        if reach is None or 2 * reach + 1 > len(cells):
+            yield from (items for (b, c), items in cells.items()
+                        if b == near_band and (reach is None or abs(c - lon_cell) <= reach))
+        else:
+            yield from (cells[key] for key in ((near_band, c) for c in range(lon_cell - reach, lon_cell + reach + 1))
+                        if key in cells)
+
+def group_near_duplicates(image_data_list: list, max_distance: int = None, max_meters: float = None):
+    """
+    Groups image records whose perceptual hashes ("phash") differ in at
+    most `max_distance` bits (default config.DEDUP_HASH_DISTANCE). Returns
+    a list of groups (lists of records) in the order of each group's first
+    record; records without a hash form their own group.
+
+    Hash similarity is followed transitively, so a burst that drifts
+    slowly ends up in one group. Location is not: every member of a group
+    is at most `max_meters` (default config.DEDUP_MAX_METERS) from the
+    group's first record, so a chain of nearby shots cannot stretch a
+    group further than that. A `max_meters` of 0 groups images wherever
+    they were taken.
+    """
+    max_distance = config.DEDUP_HASH_DISTANCE if max_distance is None else max_distance
+    max_meters = (config.DEDUP_MAX_METERS if max_meters is None else max_meters) or None
+
+    parent = list(range(len(image_data_list)))
+    grouped = {} # root -> indices of its group, for groups of more than one record
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            return
+        root, other = min(root_a, root_b), max(root_a, root_b) # The root is the group's first record
+        joining = grouped.get(other, [other])
+        if max_meters is not None and any(
+                _distance_m(image_data_list[root], image_data_list[index]) > max_meters for index in joining):
+            return
+        parent[other] = root
+        grouped.setdefault(root, [root]).extend(joining)
+        grouped.pop(other, None)
+
+    # Identical hashes are grouped directly; the index only sees distinct values
+    by_hash = {}
+    for index, record in enumerate(image_data_list):
+        if record.get('phash'):
+            by_hash.setdefault(int(record['phash'], 16), []).append(index)
+    step = max_meters / _METERS_PER_DEGREE if max_meters is not None else None
+    for members in by_hash.values():
+        if step is None:
+            for other in members[1:]:
+                union(members[0], other)
+            continue
+        # One anchor per distinct place this exact hash was seen at, bucketed by location
+        # cell so that a common hash (blank frames) only meets the anchors around it
+        anchors = {}
+        for index in members:
+            record = image_data_list[index]
+            cell = _location_cell(record, step)
+            near = min((a for cell_anchors in _nearby_cells(anchors, cell, step) for a in cell_anchors
+                        if _distance_m(image_data_list[a], record) <= max_meters), default=None)
+            if near is None:
+                anchors.setdefault(cell, []).append(index)
+            else:
+                union(near, index)
+
+    distinct = list(by_hash)
+    for i, j in sorted(near_duplicate_pairs(np.array(distinct, dtype=np.uint64), max_distance)):
+        for a in by_hash[distinct[i]]:
+            for b in by_hash[distinct[j]]:
+                union(a, b)
+
+    groups = {}
+    for index, record in enumerate(image_data_list):
+        groups.setdefault(find(index), []).append(record)
+    result = list(groups.values())
+    log.info(f"Grouped {len(image_data_list)} images into {len(result)} near-duplicate groups "
+             f"(hash distance <= {max_distance}, within {max_meters or 'any'} m).")
+    return result
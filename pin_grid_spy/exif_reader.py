@@ -0,0 +1,205 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/exif_reader.py
+# Lightweight, header-only EXIF reader for the handful of tags Pin Grid Spy
+# needs (GPS position, DateTimeOriginal, Model). It reads only the first
+# Exif APP1 segment of a JPEG (or the eXIf chunk of a PNG) and walks the
+# TIFF structure directly to the required entries, instead of parsing every
+# tag (MakerNotes included) like exifread does.
+import logging
+import struct
+
+log = logging.getLogger(__name__)
+
+JPEG_SOI = b'\xff\xd8'
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+EXIF_HEADER = b'Exif\x00\x00'
+
+# TIFF field types -> (struct format char, size in bytes)
+_TYPE_FORMATS = {
+    1: ('B', 1),   # BYTE
+    2: ('s', 1),   # ASCII
+    3: ('H', 2),   # SHORT
+    4: ('L', 4),   # LONG
+    5: ('LL', 8),  # RATIONAL
+    7: ('B', 1),   # UNDEFINED
+    9: ('l', 4),   # SLONG
+    10: ('ll', 8), # SRATIONAL
+}
+
+# Tag ids we need, keyed by IFD, mapped to exifread-compatible names
+_IFD0_TAGS = {0x0110: 'Image Model'}
+_EXIF_IFD_TAGS = {0x9003: 'EXIF DateTimeOriginal'}
+_GPS_IFD_TAGS = {
+    0x0001: 'GPS GPSLatitudeRef',
+    0x0002: 'GPS GPSLatitude',
+    0x0003: 'GPS GPSLongitudeRef',
+    0x0004: 'GPS GPSLongitude',
+}
+_EXIF_IFD_POINTER = 0x8769
+_GPS_IFD_POINTER = 0x8825
+
+
+class ExifFormatError(Exception):
+    """Raised when the EXIF structure cannot be parsed by the fast reader."""
+
+
+class Tag:
+    """Minimal stand-in for exifread's IfdTag: exposes `.values`."""
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = values
+
+    def __str__(self):
+        return str(self.values)
+
+    def __repr__(self):
+        return f"Tag({self.values!r})"
+
+
+def _find_jpeg_exif(fh):
+    """Returns the TIFF payload of the first Exif APP1 segment, or b'' if there is none."""
+    while True:
+        marker = fh.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return b''
+        code = marker[1]
+        if code == 0xFF: # Fill byte; the marker code follows
+            fh.seek(-1, 1)
+            continue
+        if code in (0xD9, 0xDA): # EOI / start of scan: no more metadata segments
+            return b''
+        if 0xD0 <= code <= 0xD7 or code == 0x01: # Standalone markers carry no length
+            continue
+        length_bytes = fh.read(2)
+        if len(length_bytes) < 2:
+            return b''
+        length = struct.unpack('>H', length_bytes)[0] - 2
+        if code == 0xE1:
+            payload = fh.read(length)
+            if payload.startswith(EXIF_HEADER):
+                return payload[len(EXIF_HEADER):]
+        else:
+            fh.seek(length, 1)
+
+def _find_png_exif(fh):
+    """Returns the payload of the eXIf chunk, or b'' if none precedes the image data."""
+    while True:
+        header = fh.read(8)
+        if len(header) < 8:
+            return b''
+        length, chunk_type = struct.unpack('>L4s', header)
+        if chunk_type == b'eXIf':
+            payload = fh.read(length)
+            return payload[len(EXIF_HEADER):] if payload.startswith(EXIF_HEADER) else payload
+        if chunk_type in (b'IDAT', b'IEND'):
+            return b''
+        fh.seek(length + 4, 1) # Skip data and CRC
+
+def _read_ifd(tiff: bytes, offset: int, endian: str, wanted: dict, pointers: tuple = ()):
+    """
+    Reads the requested entries of the IFD at `offset`. Returns
+    (tags, pointer_values) where tags maps exifread-style names to Tag
+    objects and pointer_values maps pointer tag ids to their offsets.
+    """
+    if offset + 2 > len(tiff):
+        raise ExifFormatError(f"IFD offset {offset} beyond EXIF data")
+    count = struct.unpack_from(endian + 'H', tiff, offset)[0]
+    tags = {}
+    found_pointers = {}
+    for index in range(count):
+        entry = offset + 2 + index * 12
+        if entry + 12 > len(tiff):
+            raise ExifFormatError("Truncated IFD entry")
+        tag_id, field_type, value_count = struct.unpack_from(endian + 'HHL', tiff, entry)
+        if tag_id in pointers:
+            found_pointers[tag_id] = struct.unpack_from(endian + 'L', tiff, entry + 8)[0]
+            continue
+        if tag_id not in wanted or field_type not in _TYPE_FORMATS:
+            continue
+        fmt, size = _TYPE_FORMATS[field_type]
+        data_size = size * value_count
+        data_offset = entry + 8
+        if data_size > 4:
+            data_offset = struct.unpack_from(endian + 'L', tiff, entry + 8)[0]
+        if data_offset + data_size > len(tiff):
+            raise ExifFormatError(f"Value of tag 0x{tag_id:04x} beyond EXIF data")
+        tags[wanted[tag_id]] = Tag(_decode_value(tiff, data_offset, endian, fmt, field_type, value_count))
+    return tags, found_pointers
+
+def _decode_value(tiff: bytes, offset: int, endian: str, fmt: str, field_type: int, count: int):
+    """Decodes a tag value the way exifread presents it (str for ASCII, list otherwise)."""
+    if field_type == 2:
+        raw = tiff[offset:offset + count]
+        return raw.split(b'\x00', 1)[0].decode('utf-8', errors='replace').strip()
+    values = struct.unpack_from(endian + fmt * count, tiff, offset)
+    if field_type in (5, 10):
+        return [
+            values[i] / values[i + 1] if values[i + 1] else None
+            for i in range(0, len(values), 2)
+        ]
+    return list(values)
+
+def parse_tiff(tiff: bytes):
+    """Parses the needed tags out of a raw TIFF (EXIF) block."""
+    if len(tiff) < 8:
+        raise ExifFormatError("EXIF block too short")
+    byte_order = tiff[:2]
+    if byte_order == b'II':
+        endian = '<'
+    elif byte_order == b'MM':
+        endian = '>'
+    else:
+        raise ExifFormatError(f"Unknown byte order {byte_order!r}")
+    ifd0_offset = struct.unpack_from(endian + 'L', tiff, 4)[0]
+
+    tags, pointers = _read_ifd(tiff, ifd0_offset, endian, _IFD0_TAGS, (_EXIF_IFD_POINTER, _GPS_IFD_POINTER))
+    if _EXIF_IFD_POINTER in pointers:
+        exif_tags, _ = _read_ifd(tiff, pointers[_EXIF_IFD_POINTER], endian, _EXIF_IFD_TAGS)
+        tags.update(exif_tags)
+    if _GPS_IFD_POINTER in pointers:
+        gps_tags, _ = _read_ifd(tiff, pointers[_GPS_IFD_POINTER], endian, _GPS_IFD_TAGS)
+        tags.update(gps_tags)
+    return tags
+
+def read_tags(fh):
+    """
+    Reads GPS, DateTimeOriginal and Model tags from an open JPEG or PNG
+    file object. Returns a dict in exifread's naming (values exposed via
+    `.values`), an empty dict if the file has no EXIF block, or None if the
+    format is not supported here or the block is malformed, in which case
+    the caller should fall back to exifread.
+    """
+    signature = fh.read(8)
+    try:
+        if signature.startswith(JPEG_SOI):
+            fh.seek(2)
+            tiff = _find_jpeg_exif(fh)
+        elif signature == PNG_SIGNATURE:
+            tiff = _find_png_exif(fh)
+        else:
+            return None
+        return parse_tiff(tiff) if tiff else {}
+    except (ExifFormatError, struct.error) as e:
+        log.debug("Fast EXIF reader could not parse file: %s", e)
+        return None
@@ -0,0 +1,127 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/file_list.py
+# The GUI's file list, kept apart from the widget. FileList holds the paths
+# in the order they were added, a path -> row dict for O(1) duplicate checks
+# and one status byte per row. The listbox only ever shows one page of it:
+# a Viewport picks the visible rows, so adding files or changing statuses
+# costs the same whether the list holds ten files or a million.
+import logging
+
+log = logging.getLogger(__name__)
+
+STATUSES = ("pending", "processed", "no_gps", "failed")
+STATUS_LABELS = {"pending": "pending", "processed": "done", "no_gps": "no GPS", "failed": "failed"}
+_LABEL_WIDTH = max(len(label) for label in STATUS_LABELS.values())
+
+
+class FileList:
+    """Ordered, de-duplicated list of file paths with a status per file."""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._paths = []
+        self._rows = {}
+        self._statuses = bytearray()
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return str(path) in self._rows
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def add(self, path, status: str = "pending"):
+        """Adds a path unless it is already listed. Returns True if it was added."""
+        path_str = str(path)
+        if path_str in self._rows:
+            log.debug("Duplicate file ignored: %s", path_str)
+            return False
+        self._rows[path_str] = len(self._paths)
+        self._paths.append(path_str)
+        self._statuses.append(STATUSES.index(status))
+        return True
+
+    def add_many(self, paths, status: str = "pending"):
+        """Adds paths in order, skipping duplicates. Returns the number added."""
+        return sum(self.add(path, status) for path in paths)
+
+    def status(self, path):
+        return STATUSES[self._statuses[self._rows[str(path)]]]
+
+    def set_status(self, path, status: str):
+        """Sets the status of a listed path; paths not in the list are ignored."""
+        row = self._rows.get(str(path))
+        if row is not None:
+            self._statuses[row] = STATUSES.index(status)
+
+    def paths(self, status: str = None):
+        """Returns the listed paths, optionally only those with `status`."""
+        if status is None:
+            return list(self._paths)
+        code = STATUSES.index(status)
+        return [path for path, row_code in zip(self._paths, self._statuses) if row_code == code]
+
+    def entries(self):
+        """Returns [(path, status)] in list order."""
+        return [(path, STATUSES[code]) for path, code in zip(self._paths, self._statuses)]
+
+    def counts(self):
+        """Returns {status: number of files}."""
+        return {status: self._statuses.count(code) for code, status in enumerate(STATUSES)}
+
+    def summary(self):
+        counts = self.counts()
+        parts = [f"{counts[status]} {STATUS_LABELS[status]}" for status in STATUSES if counts[status]]
+        return f"{len(self)} files" + (f": {', '.join(parts)}" if parts else "")
+
+    def row_text(self, row: int):
+        """Display text of one row: status label, then the path."""
+        return f"{STATUS_LABELS[STATUSES[self._statuses[row]]]:<{_LABEL_WIDTH}}  {self._paths[row]}"
+
+
+class Viewport:
+    """The window of `rows` visible list rows, starting at `offset`."""
+
+    def __init__(self, rows: int):
+        self.rows = rows
+        self.offset = 0
+
+    def max_offset(self, total: int):
+        return max(0, total - self.rows)
+
+    def scroll_to(self, offset: int, total: int):
+        self.offset = min(max(0, int(offset)), self.max_offset(total))
+        return self.offset
+
+    def scroll(self, delta: int, total: int):
+        return self.scroll_to(self.offset + delta, total)
+
+    def page(self, file_list: FileList):
+        """Display texts of the visible rows, clamping the offset if the list shrank."""
+        self.scroll_to(self.offset, len(file_list))
+        end = min(self.offset + self.rows, len(file_list))
+        return [file_list.row_text(row) for row in range(self.offset, end)]
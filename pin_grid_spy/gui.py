@@ -3,15 +3,19 @@
 import PySimpleGUI as sg
 import pathlib
 import logging
+import sqlite3
 
 # Import necessary components from our project
-from . import config, image_processor, map_generator, __main__ as main_module  # Assuming main logic is moved later
+from . import (background, config, file_list, image_processor, map_generator, session,
+               __main__ as main_module)  # Assuming main logic is moved later
 
 log = logging.getLogger(__name__)
 
 # --- Constants for GUI Elements ---
 # Keys allow us to identify elements in the event loop
 FILE_LIST_KEY = "-FILE_LIST-"
+FILE_SCROLL_KEY = "-FILE_SCROLL-"
+FILE_COUNT_KEY = "-FILE_COUNT-"
 DROP_TARGET_KEY = "-DROP_TARGET-" # Maybe use the file list itself?
 STATUS_BAR_KEY = "-STATUS-"
 PROCESS_BUTTON_KEY = "-PROCESS-"
@@ -20,14 +24,27 @@ CLEAR_BUTTON_KEY = "-CLEAR-"
 SAVE_BUTTON_KEY = "-SAVE-"
 LOAD_BUTTON_KEY = "-LOAD-"
 NEW_BUTTON_KEY = "-NEW-"
+CANCEL_BUTTON_KEY = "-CANCEL-"
+PROGRESS_BAR_KEY = "-PROGRESS-"
+PROGRESS_TEXT_KEY = "-PROGRESS_TEXT-"
 
 # --- Initial GUI State ---
 # We'll store the processed image data here for the current session
-# List of dictionaries, like output from image_processor.process_directory
+# List of dictionaries, like output from image_processor.process_directory,
+# or the lazily loaded records of the open session file
 current_session_data = []
-# Keep track of file paths added to the listbox to help with duplicates
-# Using a set for quick lookups
-files_in_list = set()
+# Open session file (session.SessionFile) once the session was saved or loaded;
+# new records are then appended to it
+current_session_file = None
+# File paths added to the listbox, in order, with their processing status.
+# The listbox only shows the rows of file_view, so it stays fast for any size
+files = file_list.FileList()
+file_view = file_list.Viewport(config.GUI_FILE_LIST_ROWS)
+# The running background.ProcessingJob, if any
+processing_job = None
+# Running background.DirectoryScanJobs of dropped folders, and the files they added so far
+scan_jobs = set()
+scan_added_count = 0
 
 
 # --- Helper Functions ---
@@ -36,18 +53,155 @@ def update_status(window: sg.Window, message: str):
     if window:
         window[STATUS_BAR_KEY].update(message)
 
-def add_file_to_list(window: sg.Window, filepath: pathlib.Path):
-    """Adds a file path to the listbox if not already present."""
-    filepath_str = str(filepath)
-    if filepath_str not in files_in_list:
-        files_in_list.add(filepath_str)
-        # Display just the filename initially for cleaner UI
-        window[FILE_LIST_KEY].update(values=list(files_in_list)) # Update listbox
-        log.debug(f"Added to list: {filepath_str}")
-        return True
+def add_files_to_list(window: sg.Window, filepaths: list):
+    """Adds file paths to the list, skipping duplicates, and redraws it once. Returns the number added."""
+    added_count = files.add_many(filepaths)
+    log.debug(f"Added {added_count} of {len(filepaths)} files to the list.")
+    refresh_file_list(window)
+    return added_count
+
+def refresh_file_list(window: sg.Window):
+    """Redraws the visible rows of the file list, the scrollbar range and the file counts."""
+    window[FILE_LIST_KEY].update(values=file_view.page(files))
+    window[FILE_SCROLL_KEY].update(value=file_view.offset, range=(0, max(1, file_view.max_offset(len(files)))))
+    window[FILE_COUNT_KEY].update(files.summary())
+
+def scroll_file_list(window: sg.Window, rows: int = None, offset: int = None):
+    """Scrolls the file list by `rows` or to `offset` and redraws it."""
+    if offset is not None:
+        file_view.scroll_to(offset, len(files))
     else:
-        log.debug(f"Duplicate file ignored: {filepath_str}")
-        return False
+        file_view.scroll(rows, len(files))
+    refresh_file_list(window)
+
+def wheel_rows(tk_event):
+    """File list rows to scroll for a mouse wheel event (Windows/macOS delta or X11 buttons 4/5)."""
+    if getattr(tk_event, 'num', None) == 4:
+        return -config.GUI_SCROLL_ROWS
+    if getattr(tk_event, 'num', None) == 5:
+        return config.GUI_SCROLL_ROWS
+    return -config.GUI_SCROLL_ROWS if getattr(tk_event, 'delta', 0) > 0 else config.GUI_SCROLL_ROWS
+
+def start_directory_scan(window: sg.Window, directories: list):
+    """Enumerates dropped directories in the background; found images are added to the list in batches."""
+    global scan_added_count
+    if not scan_jobs:
+        scan_added_count = 0
+    job = background.DirectoryScanJob(directories, window.write_event_value)
+    scan_jobs.add(job)
+    job.start()
+
+def cancel_directory_scans():
+    """Stops all running directory scans and waits for them to finish."""
+    for job in list(scan_jobs):
+        job.cancel()
+        job.join()
+    scan_jobs.clear()
+
+def handle_scan_batch(window: sg.Window, batch: dict):
+    """Adds a batch of images found by a directory scan to the list and shows the running count."""
+    global scan_added_count
+    if batch["job"] not in scan_jobs:
+        return # Late batch of a scan cancelled by Clear or Load
+    scan_added_count += add_files_to_list(window, batch["paths"])
+    update_status(window, f"Scanning {batch['directory']}... {batch['found']} images found, "
+                          f"{scan_added_count} new files added.")
+
+def handle_scan_done(window: sg.Window, outcome: dict):
+    """Reports a finished directory scan once no other scan is running."""
+    if outcome["job"] not in scan_jobs:
+        return
+    scan_jobs.discard(outcome["job"])
+    if outcome["error"]:
+        update_status(window, f"Scanning folders failed: {outcome['error']}")
+    elif not scan_jobs:
+        update_status(window, f"{'Folder scan cancelled' if outcome['cancelled'] else 'Folder scan complete'}: "
+                              f"added {scan_added_count} new files. Ready.")
+
+def save_current_session(path: pathlib.Path):
+    """
+    Saves the records, file list and settings of this session to `path`
+    and continues the session in that file. Saving to the open session
+    file only rewrites its file list and settings.
+    """
+    global current_session_data, current_session_file
+    entries = files.entries()
+    if current_session_file is not None and current_session_file.path.resolve() == pathlib.Path(path).resolve():
+        current_session_file.set_files(entries)
+        current_session_file.set_settings(session.session_settings())
+        return len(current_session_data)
+    count = session.save_session(path, current_session_data, entries)
+    close_current_session()
+    current_session_file = session.open_session(path)
+    current_session_data = current_session_file.records
+    return count
+
+def load_session(path: pathlib.Path):
+    """Replaces the current session with a session file; records are paged in lazily."""
+    global current_session_data, current_session_file
+    opened = session.open_session(path) # Raises before the current session is touched
+    close_current_session()
+    current_session_file = opened
+    current_session_data = opened.records
+    files.clear()
+    for path_str, status in opened.files():
+        files.add(path_str, status if status in file_list.STATUSES else "pending")
+    file_view.offset = 0
+    session.apply_settings(opened.settings())
+    return len(current_session_data)
+
+def close_current_session():
+    """Closes the open session file (if any) and starts over with an empty, in-memory session."""
+    global current_session_data, current_session_file
+    if current_session_file is not None:
+        current_session_file.close()
+        current_session_file = None
+    current_session_data = []
+
+def start_processing(window: sg.Window):
+    """Starts a background job for the listed files that were not processed yet. Returns the file count."""
+    global processing_job
+    pending = files.paths("pending")
+    if not pending:
+        return 0
+    processing_job = background.ProcessingJob(pending, config.DEFAULT_THUMBNAIL_DIR, window.write_event_value)
+    processing_job.start()
+    set_processing_controls(window, running=True)
+    window[PROGRESS_BAR_KEY].update(current_count=0, max=len(pending))
+    return len(pending)
+
+def set_processing_controls(window: sg.Window, running: bool):
+    """Enables Cancel while a job runs and the buttons that would interfere with it otherwise."""
+    for key in (PROCESS_BUTTON_KEY, CLEAR_BUTTON_KEY, MAP_BUTTON_KEY, NEW_BUTTON_KEY, SAVE_BUTTON_KEY,
+                LOAD_BUTTON_KEY):
+        window[key].update(disabled=running)
+    window[CANCEL_BUTTON_KEY].update(disabled=not running)
+
+def handle_processing_batch(window: sg.Window, batch: dict):
+    """Adds a batch of results from the background job to the session and updates the progress display."""
+    records = [record for _, record, _ in batch["results"] if record is not None]
+    for path, _, status in batch["results"]:
+        files.set_status(path, status)
+    if records:
+        current_session_data.extend(records) # Also appends to the open session file
+    refresh_file_list(window)
+    window[PROGRESS_BAR_KEY].update(current_count=batch["done"], max=batch["total"])
+    window[PROGRESS_TEXT_KEY].update(batch["summary"])
+
+def handle_processing_done(window: sg.Window, outcome: dict):
+    """Re-enables the controls and reports how the background job ended."""
+    global processing_job
+    processing_job = None
+    set_processing_controls(window, running=False)
+    if outcome["error"]:
+        update_status(window, f"Processing failed after {outcome['done']} images: {outcome['error']}")
+    elif outcome["cancelled"]:
+        update_status(window, f"Processing cancelled after {outcome['done']} of {outcome['total']} images "
+                              f"({outcome['with_gps']} with GPS data).")
+    else:
+        update_status(window, f"Processed {outcome['done']} images in "
+                              f"{background.format_duration(outcome['elapsed'])}: {outcome['with_gps']} with GPS "
+                              f"data, {len(current_session_data)} in this session.")
 
 # --- GUI Layout Definition ---
 def create_layout():
@@ -61,19 +215,29 @@ def create_layout():
         [sg.Text("Drop Images Here or Add Manually:")],
         [sg.Listbox(
             values=[],          # Start empty
-            size=(50, 15),      # Width (chars), Height (rows)
+            size=(50, config.GUI_FILE_LIST_ROWS), # Width (chars), Height (rows)
             key=FILE_LIST_KEY,
             enable_events=True, # Needed to detect clicks/selection if desired later
+            no_scrollbar=True,  # Only the visible rows are loaded; the slider scrolls the whole list
+            font=("Courier", 10), # Monospaced so the status labels line up
             # --- Enable Drag and Drop ---
             # Note: This is the primary way PySimpleGUI handles drops on specific elements
             metadata={'drop_target': True}
-        )],
+        ),
+         sg.Slider(range=(0, 1), default_value=0, orientation='v', size=(config.GUI_FILE_LIST_ROWS, 15),
+                   disable_number_display=True, enable_events=True, key=FILE_SCROLL_KEY)],
+        [sg.Text("0 files", size=(50, 1), key=FILE_COUNT_KEY)], # Files per status
         # Maybe add manual "Add File" / "Add Folder" buttons later
         [
             sg.Button("Process Selected/New", key=PROCESS_BUTTON_KEY, tooltip="Process files added to the list"),
             sg.Button("Clear List", key=CLEAR_BUTTON_KEY, tooltip="Remove all files from the list"),
             sg.Button("Generate Map", key=MAP_BUTTON_KEY, tooltip="Create map from successfully processed images")
         ],
+        [
+            sg.ProgressBar(max_value=1, orientation='h', size=(30, 15), key=PROGRESS_BAR_KEY),
+            sg.Button("Cancel", key=CANCEL_BUTTON_KEY, disabled=True, tooltip="Stop processing"),
+        ],
+        [sg.Text("", size=(50, 1), key=PROGRESS_TEXT_KEY)], # Images/sec and ETA while processing
     ]
 
     # Right Column (Session Management & Info)
@@ -108,6 +272,9 @@ def run():
     window[FILE_LIST_KEY].bind('<DragEnter>', '+DRAGENTER')
     window[FILE_LIST_KEY].bind('<DragLeave>', '+DRAGLEAVE')
     window[FILE_LIST_KEY].bind('<Drop>', '+DROP')
+    # Mouse wheel over the list scrolls the whole list, not just the loaded rows
+    for wheel_event in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+        window[FILE_LIST_KEY].bind(wheel_event, '+WHEEL')
 
     # Enable Drop globally too just in case element binding is tricky sometimes
     window.bind('<Drop>', '+DROP_WINDOW')
@@ -121,6 +288,11 @@ def run():
 
         if event == sg.WINDOW_CLOSED:
             log.info("Window closed by user.")
+            if processing_job is not None:
+                processing_job.cancel()
+                processing_job.join()
+            cancel_directory_scans()
+            close_current_session()
             break
 
         # --- Drag and Drop Handling ---
@@ -145,34 +317,62 @@ def run():
             # Files are often semicolon-separated in the string
             filepaths = [pathlib.Path(p.strip()) for p in dropped_files_str.split(';') if p.strip()]
             log.info(f"Files dropped: {filepaths}")
-            added_count = 0
+            supported = []
+            directories = []
             for fp in filepaths:
-                # Check if it's a file or directory (handle directories later if needed)
+                # Files are added right away, directories are scanned in the background
                 if fp.is_file():
                     # Check extension (optional but good practice)
                     if fp.suffix.lower() in config.SUPPORTED_EXTENSIONS:
-                        if add_file_to_list(window, fp):
-                            added_count += 1
+                        supported.append(fp)
                     else:
                         log.warning(f"Ignoring unsupported file type: {fp}")
                 elif fp.is_dir():
-                     # TODO: Implement directory scanning if desired
-                     log.warning(f"Directory dropping not yet implemented: {fp}")
+                    directories.append(fp)
                 else:
                     log.warning(f"Dropped item is not a file or directory: {fp}")
+            added_count = add_files_to_list(window, supported) # One redraw for the whole drop
 
-            update_status(window, f"Added {added_count} new files to the list. Ready.")
+            if directories:
+                start_directory_scan(window, directories) # Streams results as SCAN_BATCH_EVENTs
+                update_status(window, f"Added {added_count} new files; scanning {len(directories)} folders...")
+            else:
+                update_status(window, f"Added {added_count} new files to the list. Ready.")
             window.refresh() # Ensure UI updates
 
 
+        # --- File List Scrolling ---
+        elif event == FILE_LIST_KEY + '+WHEEL':
+            scroll_file_list(window, rows=wheel_rows(window[FILE_LIST_KEY].user_bind_event))
+
+        elif event == FILE_SCROLL_KEY:
+            scroll_file_list(window, offset=values[FILE_SCROLL_KEY])
+
         # --- Button Clicks ---
         elif event == PROCESS_BUTTON_KEY:
-            # TODO: Implement processing logic
-            # - Get files from the listbox (maybe only unprocessed ones?)
-            # - Call image_processor
-            # - Update status / listbox appearance
-            update_status(window, "Processing... (Not implemented yet)")
-            sg.popup_scrolled("Processing logic not yet implemented.\n\nFiles currently in list:\n" + "\n".join(files_in_list), title="Info")
+            count = start_processing(window)
+            if count:
+                update_status(window, f"Processing {count} images in the background...")
+            else:
+                update_status(window, "No new files to process. Ready.")
+
+        elif event == CANCEL_BUTTON_KEY:
+            if processing_job is not None:
+                processing_job.cancel()
+                window[CANCEL_BUTTON_KEY].update(disabled=True)
+                update_status(window, "Cancelling...")
+
+        elif event == background.PROCESS_BATCH_EVENT:
+            handle_processing_batch(window, values[event])
+
+        elif event == background.PROCESS_DONE_EVENT:
+            handle_processing_done(window, values[event])
+
+        elif event == background.SCAN_BATCH_EVENT:
+            handle_scan_batch(window, values[event])
+
+        elif event == background.SCAN_DONE_EVENT:
+            handle_scan_done(window, values[event])
 
 
         elif event == MAP_BUTTON_KEY:
@@ -185,9 +385,10 @@ def run():
 
         elif event == CLEAR_BUTTON_KEY:
             update_status(window, "Clearing file list...")
-            files_in_list.clear()
-            current_session_data.clear() # Also clear processed data
-            window[FILE_LIST_KEY].update(values=[])
+            cancel_directory_scans()
+            files.clear()
+            close_current_session() # Also clear processed data
+            refresh_file_list(window)
             update_status(window, "File list cleared. Ready.")
 
         elif event == NEW_BUTTON_KEY:
@@ -196,14 +397,33 @@ def run():
             sg.popup("New Session logic not yet implemented.", title="Info")
 
         elif event == SAVE_BUTTON_KEY:
-            # TODO: Implement saving session state
-            update_status(window, "Saving Session... (Not implemented yet)")
-            sg.popup("Save Session logic not yet implemented.", title="Info")
+            session_types = (("Pin Grid Spy Session", f"*{config.SESSION_FILE_EXTENSION}"),)
+            path = sg.popup_get_file("Save session as:", save_as=True, file_types=session_types,
+                                     default_extension=config.SESSION_FILE_EXTENSION, no_window=True)
+            if path:
+                update_status(window, "Saving session...")
+                try:
+                    count = save_current_session(pathlib.Path(path))
+                    update_status(window, f"Saved {count} images and {len(files)} files to {path}.")
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    log.error(f"Could not save session to {path}: {e}", exc_info=True)
+                    update_status(window, "Saving the session failed.")
+                    sg.popup_error(f"Could not save session:\n{e}", title="Save Session")
 
         elif event == LOAD_BUTTON_KEY:
-            # TODO: Implement loading session state
-            update_status(window, "Loading Session... (Not implemented yet)")
-            sg.popup("Load Session logic not yet implemented.", title="Info")
+            session_types = (("Pin Grid Spy Session", f"*{config.SESSION_FILE_EXTENSION}"),)
+            path = sg.popup_get_file("Open session:", file_types=session_types, no_window=True)
+            if path:
+                update_status(window, "Loading session...")
+                try:
+                    cancel_directory_scans()
+                    count = load_session(pathlib.Path(path))
+                    refresh_file_list(window)
+                    update_status(window, f"Loaded {count} images and {len(files)} files from {path}.")
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    log.error(f"Could not load session {path}: {e}", exc_info=True)
+                    update_status(window, "Loading the session failed.")
+                    sg.popup_error(f"Could not load session:\n{e}", title="Load Session")
 
     log.info("Closing GUI.")
     window.close()
@@ -19,110 +19,647 @@ INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <--------------
 """
 
 # pin_grid_spy/image_processor.py
+import io
+import mmap
 import os
 import pathlib
 import logging
+import threading
+import time
+import collections
+import concurrent.futures
 from PIL import Image, UnidentifiedImageError
 import exifread
 
 from . import config
+from . import dedup
 from . import utils
+from . import exif_reader
+from . import instrumentation
+from . import progress
+from . import record_store
+from . import scanner
+from . import thumbnail_store
+from .cache import MetadataCache, content_hash_bytes
 
 log = logging.getLogger(__name__)
 
 # Suppress verbose ExifRead warnings about MakerNote tags
 logging.getLogger('exifread').setLevel(logging.ERROR)
 
-def create_thumbnail(image_path: pathlib.Path, thumb_path: pathlib.Path):
-    """Creates a thumbnail for the image if it doesn't exist."""
+# --- Thumbnail Engine ---
+
+THUMBNAIL_MODES = ("fast", "quality")
+
+# IFD1 (the thumbnail IFD) tags holding the embedded JPEG's offset and length
+_IFD1 = -1
+_JPEG_IF_OFFSET = 0x0201
+_JPEG_IF_LENGTH = 0x0202
+
+def _fit_size(size: tuple, bounds: tuple):
+    """Returns the size `size` is scaled to when fitted inside `bounds` (never upscaled)."""
+    width, height = size
+    scale = min(bounds[0] / width, bounds[1] / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+def _embedded_thumbnail(img: Image.Image, target: tuple):
+    """
+    Returns the JPEG thumbnail embedded in the EXIF data (IFD1) as an image,
+    or None if there is none, it is smaller than `target`, or its aspect
+    ratio does not match the main image (letterboxed previews).
+    """
+    exif_bytes = img.info.get("exif")
+    if not exif_bytes:
+        return None
+    try:
+        ifd1 = img.getexif().get_ifd(_IFD1)
+        offset = ifd1.get(_JPEG_IF_OFFSET)
+        length = ifd1.get(_JPEG_IF_LENGTH)
+        if not offset or not length:
+            return None
+        # Offsets are relative to the TIFF header, which follows the b"Exif\0\0" prefix
+        start = offset + 6 if exif_bytes.startswith(b"Exif") else offset
+        embedded = Image.open(io.BytesIO(exif_bytes[start:start + length]))
+        embedded.load()
+    except Exception as e:
+        log.debug("Could not read embedded thumbnail: %s", e)
+        return None
+
+    if embedded.width < target[0] or embedded.height < target[1]:
+        return None
+    if abs(embedded.width / embedded.height - img.width / img.height) > 0.02:
+        return None
+    return embedded
+
+def _render_thumbnail(img: Image.Image, mode: str):
+    """Returns the thumbnail image for `img` using the requested engine mode."""
+    bounds = config.THUMBNAIL_SIZE
+    if mode == "quality":
+        img.thumbnail(bounds, resample=Image.Resampling.LANCZOS,
+                      reducing_gap=config.THUMBNAIL_QUALITY_REDUCING_GAP)
+        return img
+
+    target = _fit_size(img.size, bounds)
+    if config.THUMBNAIL_USE_EMBEDDED:
+        embedded = _embedded_thumbnail(img, target)
+        if embedded is not None:
+            log.debug("Using embedded EXIF thumbnail (%dx%d)", embedded.width, embedded.height)
+            embedded.thumbnail(bounds, resample=Image.Resampling.BILINEAR, reducing_gap=None)
+            return embedded
+    # For JPEGs, let libjpeg decode at the smallest DCT scale that still covers the target
+    img.draft(None, target)
+    img.thumbnail(bounds, resample=Image.Resampling.BILINEAR, reducing_gap=None)
+    return img
+
+def _save_options(suffix: str):
+    """Encoder options for the thumbnail format implied by `suffix`."""
+    if suffix.lower() in (".jpg", ".jpeg", ".webp", ".avif"):
+        return {"quality": config.THUMBNAIL_QUALITY}
+    return {}
+
+def create_thumbnail(image_path: pathlib.Path, thumb_path: pathlib.Path, mode: str = None, source=None):
+    """
+    Creates a thumbnail for the image if it doesn't exist.
+
+    `mode` selects the engine ("fast" or "quality", default
+    config.THUMBNAIL_MODE). "fast" reuses a large enough EXIF thumbnail or
+    decodes JPEGs at a reduced DCT scale instead of full resolution.
+    `source` is an optional already-open file object (e.g. a SourceBuffer)
+    to decode from instead of re-opening `image_path`. The output format
+    follows the suffix of `thumb_path`; JPEG, WebP and AVIF are encoded at
+    config.THUMBNAIL_QUALITY.
+    """
+    mode = mode or config.THUMBNAIL_MODE
+    if mode not in THUMBNAIL_MODES:
+        raise ValueError(f"Unknown thumbnail mode '{mode}'. Expected one of {THUMBNAIL_MODES}.")
     if thumb_path.exists():
-        log.debug(f"Thumbnail already exists: {thumb_path}")
+        log.debug("Thumbnail already exists: %s", thumb_path)
         return True
     try:
-        with Image.open(image_path) as img:
-            img.thumbnail(config.THUMBNAIL_SIZE)
+        if source is not None:
+            source.seek(0)
+        with Image.open(source if source is not None else image_path) as img:
+            thumb = _render_thumbnail(img, mode)
             # Ensure target directory exists
             thumb_path.parent.mkdir(parents=True, exist_ok=True)
-            img.save(thumb_path)
-            log.info(f"Created thumbnail: {thumb_path}")
+            # Write under a worker-unique name and rename, so that workers
+            # rendering the same content never expose a half-written file
+            tmp_path = thumb_path.with_name(
+                f".{thumb_path.stem}.{os.getpid()}-{threading.get_ident()}{thumb_path.suffix}")
+            if thumb_path.suffix.lower() in (".webp", ".avif") and thumb.mode not in ("RGB", "RGBA"):
+                thumb = thumb.convert("RGBA" if "transparency" in thumb.info or thumb.mode.endswith("A") else "RGB")
+            thumb.save(tmp_path, **_save_options(thumb_path.suffix))
+            os.replace(tmp_path, thumb_path)
+            log.debug("Created thumbnail: %s", thumb_path)
             return True
     except UnidentifiedImageError:
-        log.warning(f"Cannot create thumbnail for non-image file: {image_path}")
+        log.debug("Cannot create thumbnail for non-image file: %s", image_path)
         return False
     except Exception as e:
-        log.error(f"Failed to create thumbnail for {image_path}: {e}", exc_info=True)
+        progress.log_unexpected(log, "thumbnail", "Failed to create thumbnail for %s: %s", image_path, e)
         return False
 
-def process_image(image_path: pathlib.Path, thumb_dir: pathlib.Path):
+def perceptual_hash(thumb_path: pathlib.Path):
+    """Returns the dHash (see `dedup.dhash`) of a thumbnail file, or None if it cannot be read."""
+    try:
+        with Image.open(thumb_path) as thumb:
+            return dedup.dhash(thumb)
+    except Exception as e:
+        log.warning("Could not compute perceptual hash for %s: %s", thumb_path, e)
+        return None
+
+class SourceBuffer:
+    """
+    Read-only, seekable view of an image file that is opened once and
+    shared by the EXIF parser and Pillow. The file is memory-mapped, so only
+    the regions the parsers actually touch are paged in. `bytes_read` is
+    the number of distinct file bytes handed out to readers, i.e. regions
+    read by both parsers are only counted once.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        with open(path, 'rb') as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # mmap cannot map empty files
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b''
+        self._pos = 0
+        self._ranges = []  # (start, end) of every read
+
+    @property
+    def bytes_read(self):
+        total = 0
+        covered_to = 0
+        for start, end in sorted(self._ranges):
+            start = max(start, covered_to)
+            if end > start:
+                total += end - start
+                covered_to = end
+        return total
+
+    def read(self, size: int = -1):
+        end = self.size if size is None or size < 0 else min(self.size, self._pos + size)
+        chunk = self._data[self._pos:end]
+        if end > self._pos:
+            self._ranges.append((self._pos, end))
+        self._pos = max(self._pos, end)
+        return chunk
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def content_hash(self):
+        """Returns the `cache.content_hash` digest of the whole file (counted as read)."""
+        if self.size:
+            self._ranges.append((0, self.size))
+        return content_hash_bytes(self._data)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def process_image(image_path: pathlib.Path, thumb_dir: pathlib.Path, metrics: dict = None):
     """
     Extracts EXIF data, creates a thumbnail, and returns structured data.
     Returns None if essential data (GPS) is missing or processing fails.
+
+    The file is opened once; EXIF parsing and thumbnailing share the same
+    buffer. If `metrics` is given, the bytes read are added to
+    metrics["bytes_read"], images that could not be processed (as opposed
+    to images without GPS data) are listed in metrics["failed"], and the
+    reason an image was skipped or failed is set in metrics["reasons"]
+    (see OUTCOME_REASONS). Per-image outcomes are logged at DEBUG only
+    (unexpected exceptions through `progress.log_unexpected`);
+    `progress.ProgressReporter` summarizes outcomes for larger runs.
     """
-    log.info(f"Processing image: {image_path}")
+    log.debug("Processing image: %s", image_path)
     try:
-        # 1. Read EXIF Tags
-        with open(image_path, 'rb') as f:
-            tags = exifread.process_file(f, stop_tag='DateTimeOriginal') # Optimization
-
-        if not tags:
-            log.warning(f"No EXIF tags found in {image_path}")
-            return None
-
-        # 2. Extract GPS Coordinates
-        lat, lon = utils.get_decimal_coords(tags)
-        if lat is None or lon is None:
-            log.warning(f"No valid GPS coordinates found in {image_path}")
-            return None # Skip images without GPS
-
-        # 3. Extract Other Metadata
-        date_time = utils.format_datetime(tags)
-        model = utils.format_model(tags)
-
-        # 4. Create Thumbnail
-        # Use a safe filename for the thumbnail (e.g., based on original)
-        # Add a hash or unique ID if filename collisions are a concern, but simple is fine for MVP
-        thumb_filename = f"{image_path.stem}_thumb{image_path.suffix}"
-        thumb_path = thumb_dir / thumb_filename
-        if not create_thumbnail(image_path, thumb_path):
-            log.warning(f"Skipping image due to thumbnail creation failure: {image_path}")
-            return None # Skip if thumbnail fails
-
-        # 5. Return Structured Data
-        image_data = {
-            "original_path": str(image_path),
-            "thumbnail_rel_path": str(thumb_path.relative_to(thumb_dir.parent)).replace("\\", "/"), # Ensure forward slashes
-            "latitude": lat,
-            "longitude": lon,
-            "datetime": date_time,
-            "model": model,
-        }
-        log.info(f"Successfully processed {image_path}")
-        return image_data
+        with SourceBuffer(image_path) as source:
+            try:
+                return _process_source(image_path, thumb_dir, source, metrics)
+            finally:
+                if metrics is not None:
+                    metrics["bytes_read"] = metrics.get("bytes_read", 0) + source.bytes_read
+                log.debug("Read %d of %d bytes from %s", source.bytes_read, source.size, image_path)
 
     except FileNotFoundError:
-        log.error(f"Image file not found: {image_path}")
+        log.debug("Image file not found: %s", image_path)
+        _note_failure(metrics, image_path, "not_found")
         return None
     except Exception as e:
-        log.error(f"Error processing image {image_path}: {e}", exc_info=True)
+        progress.log_unexpected(log, "error", "Error processing image %s: %s", image_path, e)
+        _note_failure(metrics, image_path, "error")
         return None
 
+def _note_skip(metrics: dict, image_path: pathlib.Path, reason: str):
+    """Notes why an image yielded no record in metrics["reasons"]."""
+    if metrics is not None:
+        metrics.setdefault("reasons", {})[str(image_path)] = reason
+
+def _note_failure(metrics: dict, image_path: pathlib.Path, reason: str):
+    """Lists an image that failed to process in metrics["failed"], with its reason."""
+    if metrics is not None:
+        metrics.setdefault("failed", []).append(str(image_path))
+    _note_skip(metrics, image_path, reason)
+
+def read_exif_tags(fh):
+    """
+    Reads the EXIF tags needed for mapping from an open file object.
+    Uses the header-only reader (config.EXIF_READER = "fast") and falls back
+    to a full exifread pass for formats or layouts it cannot handle.
+    """
+    if config.EXIF_READER == "fast":
+        tags = exif_reader.read_tags(fh)
+        if tags is not None:
+            return tags
+        fh.seek(0)
+    return exifread.process_file(fh, details=False)
+
+def _is_image(source: SourceBuffer):
+    """Whether Pillow recognises the buffer as an image (reads the header only)."""
+    source.seek(0)
+    try:
+        with Image.open(source):
+            return True
+    except (UnidentifiedImageError, OSError):
+        return False
+
+def _process_source(image_path: pathlib.Path, thumb_dir: pathlib.Path, source: SourceBuffer, metrics: dict = None):
+    """Runs the metadata and thumbnail steps of `process_image` on an open buffer."""
+    # 1. Read EXIF Tags
+    with instrumentation.stage("exif") as timer:
+        tags = read_exif_tags(source)
+        timer.add_bytes(source.bytes_read)
+
+    if not tags:
+        if not _is_image(source):
+            log.debug("Not a readable image: %s", image_path)
+            _note_failure(metrics, image_path, "not_an_image")
+            return None
+        log.debug("No EXIF tags found in %s", image_path)
+        _note_skip(metrics, image_path, "no_exif")
+        return None
+
+    # 2. Extract GPS Coordinates
+    with instrumentation.stage("gps"):
+        lat, lon = utils.get_decimal_coords(tags)
+    if lat is None or lon is None:
+        log.debug("No valid GPS coordinates found in %s", image_path)
+        _note_skip(metrics, image_path, "no_gps")
+        return None # Skip images without GPS
+
+    # 3. Extract Other Metadata
+    date_time = utils.format_datetime(tags)
+    model = utils.format_model(tags)
+
+    # 4. Create Thumbnail
+    # Thumbnails are content-addressed: identical files share one thumbnail
+    # (rendered once) and same-named files from different folders never collide
+    digest = source.content_hash()
+    thumb_path = thumbnail_store.thumbnail_path(thumb_dir, digest,
+                                                thumbnail_store.thumbnail_suffix(image_path.suffix))
+    with instrumentation.stage("thumbnail") as timer:
+        bytes_before = source.bytes_read
+        created = create_thumbnail(image_path, thumb_path, source=source)
+        timer.add_bytes(source.bytes_read - bytes_before)
+    if not created:
+        log.debug("Skipping image due to thumbnail creation failure: %s", image_path)
+        _note_failure(metrics, image_path, "thumbnail")
+        return None # Skip if thumbnail fails
+
+    # 5. Perceptual hash for near-duplicate grouping. Taken from the saved
+    # thumbnail, so copies that reuse a stored thumbnail hash identically.
+    phash = perceptual_hash(thumb_path)
+
+    # 6. Return Structured Data
+    image_data = {
+        "original_path": str(image_path),
+        "thumbnail_rel_path": thumbnail_store.thumbnail_rel_path(thumb_dir, thumb_path), # Forward slashes
+        "latitude": lat,
+        "longitude": lon,
+        "datetime": date_time,
+        "model": model,
+        "content_hash": digest,
+        "phash": phash,
+    }
+    log.debug("Successfully processed %s", image_path)
+    return image_data
+
+
+# --- Parallel Ingestion ---
+
+EXECUTOR_MODES = ("process", "thread", "serial")
+IMAGE_STATUSES = ("processed", "no_gps", "failed") # Outcomes reported by iter_process_files
+# Why an image yielded no record
+OUTCOME_REASONS = ("no_exif", "no_gps", "not_found", "not_an_image", "error", "thumbnail")
+
+def _worker_name():
+    """Returns a label identifying the current worker (process or thread)."""
+    thread = threading.current_thread()
+    if thread is threading.main_thread():
+        return f"pid-{os.getpid()}"
+    return thread.name
+
+def _process_chunk(image_paths: list, thumb_dir: pathlib.Path, instrument: bool = False):
+    """
+    Worker entry point. Processes a chunk of images in order and returns
+    (worker_name, results, metrics) where metrics holds "elapsed" seconds
+    and "bytes_read". With `instrument` (set for process pool workers while
+    instrumentation is enabled in the parent) the chunk's stage histograms
+    are returned in metrics["stages"]. Must stay a module-level function so
+    it can be pickled for the process pool.
+    """
+    start = time.perf_counter()
+    metrics = {"bytes_read": 0, "failed": [], "reasons": {}}
+    if instrument:
+        instrumentation.enable()
+        instrumentation.reset() # A forked worker starts with a copy of the parent's histograms
+    results = [process_image(path, thumb_dir, metrics) for path in image_paths]
+    if instrument:
+        metrics["stages"] = instrumentation.take_state()
+    metrics["elapsed"] = time.perf_counter() - start
+    return _worker_name(), results, metrics
+
+def _chunked(iterable, size: int):
+    """Groups an iterable into lists of at most `size` items."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _create_executor(mode: str, workers: int):
+    """Builds the concurrent.futures executor for the requested mode."""
+    if mode == "process":
+        return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    return concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pgs-worker")
+
+def _resolve_from_cache(chunk: list, cache):
+    """
+    Splits a chunk into cached results and misses. Returns (results, misses)
+    where `results` holds cached records (None placeholders for misses) and
+    `misses` is a list of (index, path, identity) still to be processed.
+    Cached records whose coordinates fail `utils.coordinate_masks` resolve
+    to None, like images without GPS data.
+    """
+    results = [None] * len(chunk)
+    misses = []
+    for index, path in enumerate(chunk):
+        if cache is None:
+            misses.append((index, path, None))
+            continue
+        hit, record, identity = cache.lookup(path)
+        if hit:
+            results[index] = record
+        else:
+            misses.append((index, path, identity))
+    # Cached records may predate the coordinate checks: validate them together, as images without GPS
+    cached = [index for index, record in enumerate(results) if record]
+    if cached:
+        valid = utils.coordinate_masks([results[index]['latitude'] for index in cached],
+                                       [results[index]['longitude'] for index in cached])["valid"]
+        for index, ok in zip(cached, valid.tolist()):
+            if not ok:
+                log.debug("Cached record has invalid coordinates, skipping: %s", chunk[index])
+                results[index] = None
+    return results, misses
+
+def _merge_chunk(results: list, misses: list, outcome, cache):
+    """
+    Fills worker results into the chunk's result list and updates the
+    cache. Images that failed (rather than lacking GPS data) are not
+    cached, so they are retried on the next scan.
+    """
+    worker, miss_results, metrics = outcome
+    if "stages" in metrics:
+        instrumentation.merge_state(metrics.pop("stages"))
+    failed = set(metrics.get("failed", ()))
+    for (index, path, identity), record in zip(misses, miss_results):
+        results[index] = record
+        if cache is not None and str(path) not in failed:
+            cache.store(path, record, identity)
+    metrics["processed"] = len(misses)
+    return worker, results, metrics
+
+def _run_chunks(chunks, thumb_dir: pathlib.Path, mode: str, workers: int, cache=None):
+    """
+    Runs `_process_chunk` over `chunks` and yields
+    (worker_name, results, metrics) in submission order, so the
+    output matches a serial run. Images found in `cache` are resolved in the
+    calling process and never reach a worker. At most
+    `workers * config.PROCESSING_MAX_IN_FLIGHT` chunks are pending at once.
+    """
+    if mode == "serial":
+        for chunk in chunks:
+            results, misses = _resolve_from_cache(chunk, cache)
+            outcome = _process_chunk([path for _, path, _ in misses], thumb_dir)
+            yield _merge_chunk(results, misses, outcome, cache)
+        return
+
+    max_in_flight = max(1, workers * config.PROCESSING_MAX_IN_FLIGHT)
+    instrument = mode == "process" and instrumentation.enabled() # Threads record into the shared histograms
+    with _create_executor(mode, workers) as executor:
+        pending = collections.deque()
+        try:
+            for chunk in chunks:
+                results, misses = _resolve_from_cache(chunk, cache)
+                future = (executor.submit(_process_chunk, [path for _, path, _ in misses], thumb_dir, instrument)
+                          if misses else None)
+                pending.append((results, misses, future))
+                if len(pending) >= max_in_flight:
+                    yield _finish_pending(pending.popleft(), cache)
+            while pending:
+                yield _finish_pending(pending.popleft(), cache)
+        finally:
+            # When the caller stops early, drop queued chunks instead of
+            # waiting for them; only chunks already running are finished
+            for _, _, future in pending:
+                if future is not None:
+                    future.cancel()
+
+def _empty_metrics():
+    """Metrics of a chunk that had nothing to process (every image came from the cache)."""
+    return {"elapsed": 0.0, "bytes_read": 0, "failed": [], "reasons": {}}
+
+def _finish_pending(entry, cache):
+    """Waits for a pending chunk (if it was submitted) and merges its results."""
+    results, misses, future = entry
+    outcome = future.result() if future is not None else (None, [], _empty_metrics())
+    return _merge_chunk(results, misses, outcome, cache)
+
+def _tracked(chunks, submitted: collections.deque):
+    """Passes chunks on to _run_chunks while remembering them, as its results come back in this order."""
+    for chunk in chunks:
+        submitted.append(chunk)
+        yield chunk
+
+def _outcomes(paths: list, results: list, metrics: dict):
+    """Yields (path, record, status, reason) for a finished chunk; see IMAGE_STATUSES and OUTCOME_REASONS."""
+    failed = set(metrics.get("failed", ()))
+    reasons = metrics.get("reasons", {})
+    for path, record in zip(paths, results):
+        if record:
+            yield path, record, "processed", None
+        else: # Images resolved from the cache carry no reason
+            yield path, record, "failed" if str(path) in failed else "no_gps", reasons.get(str(path))
+
+def _format_worker_stats(worker_stats: dict):
+    """Formats per-worker throughput for the final scan log line."""
+    parts = []
+    for name, (count, busy) in sorted(worker_stats.items()):
+        rate = count / busy if busy > 0 else 0.0
+        parts.append(f"{name}: {count} images @ {rate:.1f} img/s")
+    return ", ".join(parts) if parts else "none"
+
+def iter_process_directory(input_dir: pathlib.Path, thumb_dir: pathlib.Path,
+                           executor: str = None, workers: int = None, chunk_size: int = None,
+                           use_cache: bool = None, recursive: bool = None,
+                           include=None, exclude=None, symlinks: str = None):
+    """
+    Generator version of `process_directory`: walks `input_dir` with
+    scanner.scan_images and yields each image record (images with GPS data)
+    as soon as its chunk is done, while the walk is still running.
+
+    Images are fanned out across a process pool (default), a thread pool or
+    handled serially, as selected by `executor` (falls back to
+    config.PROCESSING_EXECUTOR). Results keep the same order a serial run
+    would produce. Unless `use_cache` is False, unchanged images resolve
+    from the metadata cache in the output directory. `recursive`,
+    `include`, `exclude` and `symlinks` are passed to the scanner. After a
+    complete walk the thumbnail manifest (source path -> thumbnail) in
+    `thumb_dir` is replaced with the entries of this scan. Progress is
+    logged as periodic summaries by a `progress.ProgressReporter`.
+    """
+    mode = executor or config.PROCESSING_EXECUTOR
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Unknown executor mode '{mode}'. Expected one of {EXECUTOR_MODES}.")
+    thumbnail_store.resolve_format() # Fail (or warn about AVIF) once, before any image is processed
+    workers = workers or config.PROCESSING_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or config.PROCESSING_CHUNK_SIZE
+    use_cache = config.METADATA_CACHE_ENABLED if use_cache is None else use_cache
+
+    # Never pick up our own thumbnails when the output lives inside the input tree
+    exclude = list(config.SCAN_EXCLUDE if exclude is None else exclude)
+    try:
+        exclude.append(thumb_dir.resolve().relative_to(input_dir.resolve()).as_posix())
+    except ValueError:
+        pass
 
-def process_directory(input_dir: pathlib.Path, thumb_dir: pathlib.Path):
-    """Processes all supported images in the input directory."""
-    processed_data = []
     image_count = 0
     processed_count = 0
+    worker_stats = {}  # worker name -> [image count, busy seconds]
 
-    log.info(f"Scanning directory: {input_dir}")
+    log.info(f"Scanning directory: {input_dir} (executor={mode}, workers={workers}, chunk_size={chunk_size})")
     thumb_dir.mkdir(parents=True, exist_ok=True) # Ensure thumbnail dir exists
+    start = time.perf_counter()
+    cache = MetadataCache.for_thumb_dir(thumb_dir) if use_cache else None
+    cached_count = 0
+    bytes_read = 0
+    thumb_hashes = set()
+
+    reporter = progress.ProgressReporter(f"Scanning {input_dir}")
+    try:
+        with thumbnail_store.ManifestWriter(thumb_dir) as manifest:
+            candidates = scanner.scan_images(input_dir, recursive=recursive, include=include,
+                                             exclude=exclude, symlinks=symlinks)
+            submitted = collections.deque()
+            chunks = _tracked(_chunked(candidates, chunk_size), submitted)
+            for worker, results, metrics in _run_chunks(chunks, thumb_dir, mode, workers, cache):
+                processed = metrics["processed"]
+                if processed:
+                    stats = worker_stats.setdefault(worker, [0, 0.0])
+                    stats[0] += processed
+                    stats[1] += metrics["elapsed"]
+                cached_count += len(results) - processed
+                bytes_read += metrics["bytes_read"]
+                image_count += len(results)
+                for path, data, status, reason in _outcomes(submitted.popleft(), results, metrics):
+                    reporter.record(path, status, reason)
+                    if data:
+                        processed_count += 1
+                        manifest.add(data)
+                        thumb_hashes.add(data["content_hash"])
+                        yield data
+        # Only prune after a complete walk; an abandoned generator must not drop entries
+        if cache is not None:
+            cache.prune(input_dir)
+    finally:
+        reporter.close()
+        if cache is not None:
+            cache.close()
+
+    total_elapsed = time.perf_counter() - start
+    read_count = image_count - cached_count
+    avg_read_kb = bytes_read / read_count / 1024 if read_count else 0.0
+    log.info(f"Scan complete. Found {image_count} images ({cached_count} from cache), processed "
+             f"{processed_count} with GPS data ({len(thumb_hashes)} distinct thumbnails) in {total_elapsed:.2f}s. "
+             f"Read {bytes_read / (1024 * 1024):.1f} MiB ({avg_read_kb:.1f} KiB/image). "
+             f"Worker throughput: {_format_worker_stats(worker_stats)}")
 
-    for item in input_dir.iterdir():
-        if item.is_file() and item.suffix.lower() in config.SUPPORTED_EXTENSIONS:
-            image_count += 1
-            data = process_image(item, thumb_dir)
-            if data:
-                processed_data.append(data)
-                processed_count += 1
+def iter_process_files(image_paths, thumb_dir: pathlib.Path, executor: str = None, workers: int = None,
+                       chunk_size: int = None, use_cache: bool = None):
+    """
+    Processes an explicit list of image files (e.g. the GUI file list) with
+    the same executors and metadata cache as `iter_process_directory`, and
+    yields (path, record, status) for every file in order. `status` is one
+    of IMAGE_STATUSES: "processed", "no_gps" (skipped, `record` is None) or
+    "failed" (missing, not an image or no thumbnail, `record` is None). Closing the
+    generator early cancels the chunks that have not started yet. Unlike a
+    directory scan, this neither prunes the cache nor rewrites the
+    thumbnail manifest. Progress is logged as periodic summaries by a
+    `progress.ProgressReporter`.
+    """
+    mode = executor or config.PROCESSING_EXECUTOR
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Unknown executor mode '{mode}'. Expected one of {EXECUTOR_MODES}.")
+    thumbnail_store.resolve_format()
+    workers = workers or config.PROCESSING_WORKERS or os.cpu_count() or 1
+    chunk_size = chunk_size or config.PROCESSING_CHUNK_SIZE
+    use_cache = config.METADATA_CACHE_ENABLED if use_cache is None else use_cache
+
+    thumb_dir.mkdir(parents=True, exist_ok=True)
+    cache = MetadataCache.for_thumb_dir(thumb_dir) if use_cache else None
+    reporter = progress.ProgressReporter("Processing files",
+                                         total=len(image_paths) if hasattr(image_paths, "__len__") else None)
+    try:
+        submitted = collections.deque()
+        chunks = _tracked(_chunked((pathlib.Path(path) for path in image_paths), chunk_size), submitted)
+        for _, results, metrics in _run_chunks(chunks, thumb_dir, mode, workers, cache):
+            for path, record, status, reason in _outcomes(submitted.popleft(), results, metrics):
+                reporter.record(path, status, reason)
+                yield path, record, status
+    finally:
+        reporter.close()
+        if cache is not None:
+            cache.close()
 
-    log.info(f"Scan complete. Found {image_count} images, processed {processed_count} with GPS data.")
-    return processed_data
\ No newline at end of file
+def process_directory(input_dir: pathlib.Path, thumb_dir: pathlib.Path, **kwargs):
+    """
+    Processes all supported images in the input directory (recursively by
+    default) and returns the image records as a columnar
+    `record_store.RecordStore`, whose rows read like the record dicts.
+    Accepts the same keyword arguments as `iter_process_directory`.
+    """
+    return record_store.RecordStore.from_records(iter_process_directory(input_dir, thumb_dir, **kwargs))
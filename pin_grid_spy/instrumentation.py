@@ -0,0 +1,330 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/instrumentation.py
+# Per-stage timing for the ingestion pipeline. Code wraps a stage in
+# `with instrumentation.stage("exif") as timer:` and may add the bytes it
+# read with `timer.add_bytes(n)`. While instrumentation is disabled (the
+# default, see config.INSTRUMENTATION_ENABLED) `stage` returns one shared
+# do-nothing timer, so the cost is a function call and a flag check.
+# Enabled, every observation goes into a fixed log-bucketed histogram per
+# stage (config.INSTRUMENTATION_BUCKETS_PER_DECADE buckets per power of ten),
+# so memory stays constant however many images are processed and p50/p95/p99
+# are read from the buckets. Process pool workers send their histograms
+# back with their chunk results and the parent merges them (see
+# image_processor). Reports are written as JSON or Prometheus text.
+import bisect
+import contextlib
+import json
+import logging
+import math
+import pathlib
+import threading
+import time
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+STAGES = ("exif", "gps", "thumbnail", "map") # Stages instrumented by the pipeline, in pipeline order
+PROFILERS = ("cprofile", "pyinstrument")
+PERCENTILES = (0.5, 0.95, 0.99)
+_MIN_SECONDS = 1e-6 # Lowest bucket bound; faster observations land in the first bucket
+_DECADES = 9        # Bucket bounds span 1 us .. 1000 s
+
+def _bucket_bounds(per_decade: int):
+    return [_MIN_SECONDS * 10 ** (step / per_decade) for step in range(_DECADES * per_decade + 1)]
+
+
+class Histogram:
+    """Log-bucketed histogram of stage durations, with a running byte total."""
+
+    def __init__(self, bounds: list):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1) # The last bucket holds everything above the highest bound
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.bytes = 0
+
+    def observe(self, seconds: float, nbytes: int = 0):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.bytes += nbytes
+
+    def percentile(self, fraction: float):
+        """Estimated duration below which `fraction` of the observations fall (interpolated within a bucket)."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                low = self.bounds[index - 1] if index else 0.0
+                high = self.bounds[index] if index < len(self.bounds) else self.max
+                value = low + (high - low) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def state(self):
+        """Picklable raw state, for merging across processes."""
+        return {"counts": self.counts, "count": self.count, "sum": self.sum, "min": self.min, "max": self.max,
+                "bytes": self.bytes}
+
+    def merge(self, state: dict):
+        self.counts = [a + b for a, b in zip(self.counts, state["counts"])]
+        self.count += state["count"]
+        self.sum += state["sum"]
+        self.min = min(self.min, state["min"])
+        self.max = max(self.max, state["max"])
+        self.bytes += state["bytes"]
+
+    def summary(self):
+        result = {"count": self.count, "total_s": self.sum, "mean_s": self.sum / self.count if self.count else None,
+                  "min_s": self.min if self.count else None, "max_s": self.max if self.count else None}
+        for fraction in PERCENTILES:
+            result[f"p{round(fraction * 100)}_s"] = self.percentile(fraction)
+        result["bytes"] = self.bytes
+        return result
+
+
+class _Timer:
+    """Times one stage run into a histogram."""
+    __slots__ = ("_registry", "_name", "_start", "_bytes")
+
+    def __init__(self, registry, name: str):
+        self._registry = registry
+        self._name = name
+        self._bytes = 0
+
+    def add_bytes(self, nbytes: int):
+        self._bytes += nbytes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._registry.record(self._name, time.perf_counter() - self._start, self._bytes)
+        return False
+
+
+class _NullTimer:
+    """The timer handed out while instrumentation is disabled: does nothing."""
+    __slots__ = ()
+
+    def add_bytes(self, nbytes: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+
+class Registry:
+    """Histograms by stage name. Safe to record into from several threads."""
+
+    def __init__(self, per_decade: int = None):
+        self.bounds = _bucket_bounds(per_decade or config.INSTRUMENTATION_BUCKETS_PER_DECADE)
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, name: str):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram(self.bounds)
+        return histogram
+
+    def record(self, name: str, seconds: float, nbytes: int = 0):
+        with self._lock:
+            self._histogram(name).observe(seconds, nbytes)
+
+    def take_state(self):
+        """Returns the raw state of every histogram and starts over."""
+        with self._lock:
+            state = {name: histogram.state() for name, histogram in self.histograms.items()}
+            self.histograms = {}
+        return state
+
+    def merge_state(self, state: dict):
+        with self._lock:
+            for name, histogram_state in state.items():
+                self._histogram(name).merge(histogram_state)
+
+    def snapshot(self):
+        """Returns {stage: summary} with count, totals, min/max/mean, p50/p95/p99 (seconds) and bytes."""
+        with self._lock:
+            ordered = sorted(self.histograms, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES),
+                                                                name))
+            return {name: self.histograms[name].summary() for name in ordered}
+
+    def to_prometheus(self, prefix: str = "pin_grid_spy_stage"):
+        """Renders the histograms in the Prometheus text exposition format."""
+        lines = [f"# HELP {prefix}_seconds Wall time per pipeline stage run.",
+                 f"# TYPE {prefix}_seconds histogram"]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            for name, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(self.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{prefix}_seconds_bucket{{stage="{name}",le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'{prefix}_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{prefix}_seconds_sum{{stage="{name}"}} {histogram.sum:.9g}')
+                lines.append(f'{prefix}_seconds_count{{stage="{name}"}} {histogram.count}')
+            lines += [f"# HELP {prefix}_bytes_total Bytes read (written for the map) per pipeline stage.",
+                      f"# TYPE {prefix}_bytes_total counter"]
+            lines += [f'{prefix}_bytes_total{{stage="{name}"}} {histogram.bytes}' for name, histogram in histograms]
+        return "\n".join(lines) + "\n"
+
+
+_registry = Registry()
+_enabled = config.INSTRUMENTATION_ENABLED
+
+def enabled():
+    return _enabled
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def reset():
+    """Drops everything recorded so far."""
+    _registry.take_state()
+
+def stage(name: str):
+    """Returns a context manager timing one run of stage `name` (a no-op while disabled)."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(_registry, name)
+
+def take_state():
+    """Raw histogram state recorded since the last call (for returning it from a worker process)."""
+    return _registry.take_state()
+
+def merge_state(state: dict):
+    """Adds histogram state taken in another process."""
+    _registry.merge_state(state)
+
+def snapshot():
+    return _registry.snapshot()
+
+def write_report(path: pathlib.Path):
+    """Writes the stage histograms to `path`: Prometheus text for .prom/.txt, JSON otherwise."""
+    path = pathlib.Path(path)
+    if path.suffix.lower() in (".prom", ".txt"):
+        text = _registry.to_prometheus()
+    else:
+        text = json.dumps({"stages": snapshot()}, indent=2)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    log.info(f"Stage metrics written to {path}")
+
+# cProfile.Profile of every thread profiled with `profile_thread` while `profile`
+# runs with cProfile, merged into its output; None otherwise
+_thread_profiles = None
+_thread_profiles_lock = threading.Lock()
+
+@contextlib.contextmanager
+def profile_thread():
+    """
+    Profiles the enclosed block of a worker thread (cProfile only sees the
+    thread that enabled it) and hands the result to the running cProfile
+    `profile`, if any.
+    """
+    if _thread_profiles is None:
+        yield
+        return
+    import cProfile
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+    except ValueError: # Python 3.12+: the running profile already covers every thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        prof.disable()
+        with _thread_profiles_lock:
+            if _thread_profiles is not None:
+                _thread_profiles.append(prof)
+
+@contextlib.contextmanager
+def profile(path: pathlib.Path, profiler: str = "cprofile"):
+    """
+    Profiles the enclosed block and writes the result to `path`: pstats
+    data for "cprofile", an HTML (.html) or text report for "pyinstrument".
+    pyinstrument is optional; without it cProfile is used instead. With
+    cProfile the blocks run under `profile_thread` on other threads are
+    merged in; pyinstrument sees the calling thread only. Work in pool
+    processes is never included.
+    """
+    global _thread_profiles
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{profiler}'. Expected one of {PROFILERS}.")
+    path = pathlib.Path(path)
+    if profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            log.warning("pyinstrument is not installed; profiling with cProfile instead.")
+            profiler = "cprofile"
+    if profiler == "cprofile":
+        import cProfile
+        import pstats
+        _thread_profiles = []
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            with _thread_profiles_lock:
+                thread_profiles, _thread_profiles = _thread_profiles, None
+            stats = pstats.Stats(prof)
+            for thread_prof in thread_profiles:
+                stats.add(thread_prof)
+            stats.dump_stats(str(path))
+            log.info(f"cProfile data written to {path} (view with: python -m pstats {path})")
+        return
+    prof = Profiler()
+    prof.start()
+    try:
+        yield
+    finally:
+        prof.stop()
+        path.write_text(prof.output_html() if path.suffix.lower() == ".html" else prof.output_text(),
+                        encoding="utf-8")
+        log.info(f"pyinstrument report written to {path}")
@@ -21,66 +21,530 @@ INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <--------------
 # pin_grid_spy/map_generator.py
 import folium
 from folium.plugins import MarkerCluster, MeasureControl
+from branca.element import MacroElement
+from jinja2 import Template
 import logging
 import pathlib
 import html
+import json
+import hashlib
+import os
 
-from . import config
+import numpy as np
+
+from . import (config, clustering, dedup, instrumentation, record_store, spatial_index, thumbnail_atlas,
+               tile_pyramid, utils)
 
 log = logging.getLogger(__name__)
 
-def create_map(image_data_list: list, output_file: pathlib.Path):
-    """Generates the Folium map with markers, clusters, tools, and sidebar."""
-    if not image_data_list:
-        log.warning("No image data with GPS coordinates provided. Map will be empty.")
-        map_center = config.DEFAULT_MAP_LOCATION
-        map_zoom = config.DEFAULT_MAP_ZOOM
-    else:
-        # Calculate map center based on average coordinates
-        avg_lat = sum(item['latitude'] for item in image_data_list) / len(image_data_list)
-        avg_lon = sum(item['longitude'] for item in image_data_list) / len(image_data_list)
-        map_center = [avg_lat, avg_lon]
-        map_zoom = 6 # Zoom in a bit if there's data
+# Bump when the generated JavaScript or data layout changes, to force a rebuild
+MAP_DATA_VERSION = 2
 
-    # --- Initialize Map ---
-    log.info(f"Initializing map centered at {map_center}, zoom {map_zoom}")
-    m = folium.Map(location=map_center, zoom_start=map_zoom, tiles="OpenStreetMap")
+RENDER_MODES = ("auto", "folium", "data", "clustered", "canvas", "tiles")
 
-    # --- Add Marker Cluster ---
-    marker_cluster = MarkerCluster().add_to(m)
 
-    # --- Add Markers ---
-    log.info(f"Adding {len(image_data_list)} markers to the map.")
-    for data in image_data_list:
-        # Sanitize data for HTML display
-        thumb_rel_path_html = html.escape(data['thumbnail_rel_path'])
-        datetime_html = html.escape(data['datetime'])
-        model_html = html.escape(data['model'])
-        original_path_html = html.escape(data['original_path'])
-        lat, lon = data['latitude'], data['longitude']
-        google_maps_link = config.GOOGLE_MAPS_URL_TEMPLATE.format(lat=lat, lon=lon)
+def encode_points(image_data_list: list, atlas: dict = None):
+    """
+    Encodes image records as one compact, columnar payload for the
+    JavaScript renderer: coordinates rounded to 1e-6 degrees (~0.1 m),
+    camera models interned, and the shared prefix of thumbnail paths and
+    the directories of original paths stored once. Paths of near-duplicates
+    folded into a marker (a record's "similar" list) are listed in its
+    popup. With an `atlas` from `thumbnail_atlas.pack_atlas` the popups
+    show thumbnails from the sprite sheets instead (sheet -1 for
+    thumbnails not in the atlas).
+    """
+    models = {}
+    dirs = {}
+    dir_index, names = [], []
+    for path in record_store.column(image_data_list, 'original_path'):
+        cut = max(path.rfind('/'), path.rfind('\\')) + 1
+        dir_index.append(dirs.setdefault(path[:cut], len(dirs)))
+        names.append(path[cut:])
+    thumbs = record_store.column(image_data_list, 'thumbnail_rel_path')
+    thumb_prefix = os.path.commonprefix(thumbs) if len(thumbs) > 1 else ""
+    thumb_prefix = thumb_prefix[:thumb_prefix.rfind('/') + 1] # Cut at a directory boundary
+    lats, lons = record_store.coordinates(image_data_list)
+    payload = {
+        "count": len(image_data_list),
+        "lat": [round(lat, 6) for lat in lats.tolist()],
+        "lon": [round(lon, 6) for lon in lons.tolist()],
+        "datetime": record_store.column(image_data_list, 'datetime'),
+        "model": {
+            "index": [models.setdefault(model, len(models)) for model in record_store.column(image_data_list, 'model')],
+            "values": list(models),
+        },
+        "thumb": {"prefix": thumb_prefix, "values": [t[len(thumb_prefix):] for t in thumbs]},
+        "path": {"dirs": list(dirs), "dir": dir_index, "name": names},
+    }
+    if record_store.has_values(image_data_list, 'similar'):
+        payload["similar"] = [item.get('similar', []) for item in image_data_list]
+    if atlas is not None:
+        cells = [atlas["positions"].get(t, (-1, 0, 0, 0, 0)) for t in thumbs]
+        payload["atlas"] = {"sheets": atlas["sheets"], "sizes": atlas["sizes"]}
+        payload["atlas"].update((key, [cell[column] for cell in cells])
+                                for column, key in enumerate(("sheet", "x", "y", "w", "h")))
+    return payload
 
-        # Create Popup HTML content
-        popup_html = f"""
-        <b>Date:</b> {datetime_html}<br>
-        <b>Model:</b> {model_html}<br>
-        <a href="{google_maps_link}" target="_blank">Open in Google Maps</a><br>
-        <hr>
-        <img src="{thumb_rel_path_html}" alt="Thumbnail" style="max-width:180px;"><br>
-        <small><i>Path: {original_path_html}</i></small>
-        """
-        # Use IFrame for potentially complex HTML, or just Html for simple cases
-        # iframe = folium.IFrame(html=popup_html, width=220, height=250)
-        # popup = folium.Popup(iframe, max_width=250)
-        popup = folium.Popup(popup_html, max_width=250)
+def decode_points(payload: dict):
+    """Inverse of `encode_points`: returns the list of image records."""
+    models = payload["model"]["values"]
+    dirs = payload["path"]["dirs"]
+    prefix = payload["thumb"]["prefix"]
+    return [
+        {
+            "original_path": dirs[payload["path"]["dir"][i]] + payload["path"]["name"][i],
+            "thumbnail_rel_path": prefix + payload["thumb"]["values"][i],
+            "latitude": payload["lat"][i],
+            "longitude": payload["lon"][i],
+            "datetime": payload["datetime"][i],
+            "model": models[payload["model"]["index"][i]],
+        }
+        for i in range(payload["count"])
+    ]
 
+def _dump_js(value):
+    """Compact JSON that is safe to embed inside a <script> block."""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).replace("</", "<\\/")
 
-        folium.Marker(
-            location=[lat, lon],
-            popup=popup,
-            tooltip=f"Date: {data['datetime']}" # Tooltip on hover
-        ).add_to(marker_cluster)
 
+# Popup/tooltip templates and the cluster icon shared by the JavaScript
+# renderers. Expects `options` (with googleMapsUrl) in scope; `p` is an
+# `encode_points` payload, `i` a row.
+_RENDERER_JS = """
+            var escapeHtml = function(value) {
+                return String(value).replace(/[&<>"']/g, function(c) {
+                    return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+                });
+            };
+            var thumbHtml = function(p, i) {
+                var a = p.atlas, sheet = a ? a.sheet[i] : -1;
+                if (sheet < 0) {
+                    return '<img src="' + escapeHtml(p.thumb.prefix + p.thumb.values[i]) + '" alt="Thumbnail" ' +
+                        'style="max-width:180px;">';
+                }
+                // Sprite sheet cell, scaled like max-width:180px would scale the <img>
+                var scale = Math.min(1, 180 / a.w[i]);
+                return '<div role="img" aria-label="Thumbnail" style="width:' + Math.round(a.w[i] * scale) + 'px;' +
+                    'height:' + Math.round(a.h[i] * scale) + 'px;' +
+                    'background:url(&quot;' + escapeHtml(a.sheets[sheet]) + '&quot;) ' +
+                    'no-repeat ' + (-a.x[i] * scale) + 'px ' + (-a.y[i] * scale) + 'px / ' +
+                    (a.sizes[sheet][0] * scale) + 'px ' + (a.sizes[sheet][1] * scale) + 'px;"></div>';
+            };
+            var similarHtml = function(p, i) {
+                var others = p.similar ? p.similar[i] : [];
+                if (!others.length) { return ''; }
+                return '<details><summary>' + others.length + ' near-duplicate' + (others.length > 1 ? 's' : '') +
+                    '</summary><small>' + others.map(function(path) { return escapeHtml(path); }).join('<br>') +
+                    '</small></details>';
+            };
+            var popupHtml = function(p, i) {
+                var lat = p.lat[i], lon = p.lon[i];
+                var link = options.googleMapsUrl.replace('{lat}', lat).replace('{lon}', lon);
+                return '<b>Date:</b> ' + escapeHtml(p.datetime[i]) + '<br>' +
+                    '<b>Model:</b> ' + escapeHtml(p.model.values[p.model.index[i]]) + '<br>' +
+                    '<a href="' + escapeHtml(link) + '" target="_blank">Open in Google Maps</a><br>' +
+                    similarHtml(p, i) +
+                    '<hr>' + thumbHtml(p, i) + '<br>' +
+                    '<small><i>Path: ' + escapeHtml(p.path.dirs[p.path.dir[i]] + p.path.name[i]) + '</i></small>';
+            };
+            var tooltipHtml = function(p, i) { return 'Date: ' + escapeHtml(p.datetime[i]); };
+            var clusterIcon = function(count) {
+                var size = Math.round(24 + 8 * Math.log10(count));
+                var color = count < 100 ? '110, 204, 57' : (count < 1000 ? '240, 194, 12' : '241, 128, 23');
+                return L.divIcon({
+                    className: 'pgs-cluster',
+                    iconSize: [size, size],
+                    html: '<div style="width:' + size + 'px;height:' + size + 'px;line-height:' + size + 'px;' +
+                          'border-radius:50%;text-align:center;font:12px sans-serif;' +
+                          'background:rgba(' + color + ', 0.75);">' + count + '</div>'
+                });
+            };
+"""
+
+
+class _SidebarInit(MacroElement):
+    """Initializes Leaflet-Sidebar-v2 and the notes pane once the map exists."""
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        var sidebar = L.control.sidebar({ container: 'sidebar' }).addTo({{ this._parent.get_name() }});
+
+        // Simple LocalStorage for Notes
+        var notesArea = document.getElementById('notes-area');
+        notesArea.value = localStorage.getItem('pinGridSpyNotes') || ''; // Load saved notes
+
+        function saveNotes() {
+            localStorage.setItem('pinGridSpyNotes', notesArea.value);
+            alert('Notes saved!');
+        }
+        function clearNotes() {
+             if (confirm('Are you sure you want to clear all saved notes?')) {
+                notesArea.value = '';
+                localStorage.removeItem('pinGridSpyNotes');
+                alert('Notes cleared!');
+            }
+        }
+        {% endmacro %}
+    """)
+
+
+class _PointLayer(MacroElement):
+    """
+    Data-driven marker renderer. Points arrive as `encode_points` payloads,
+    either inline (single-file map) or from the chunk scripts of an
+    incremental map, and are added to `layer`: a MarkerCluster of DOM
+    markers, or in canvas mode a FeatureGroup of circle markers drawn on
+    one canvas. Popup and tooltip HTML are built from a single template
+    when first opened, instead of being pre-rendered per marker in Python.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function(map, layer, options) {
+            {{ this.renderer_js }}
+            // Canvas mode: lightweight circle markers drawn on one shared canvas, with a
+            // single popup/tooltip bound on the layer instead of one per marker
+            var renderer = options.canvasStyle ? L.canvas({padding: 0.5}) : null;
+            var makeMarker = function(p, i) {
+                if (renderer) {
+                    return L.circleMarker([p.lat[i], p.lon[i]], L.extend(
+                        {renderer: renderer, pgsPoints: p, pgsIndex: i}, options.canvasStyle));
+                }
+                var marker = L.marker([p.lat[i], p.lon[i]]);
+                marker.bindPopup(function() { return popupHtml(p, i); }, {maxWidth: 250});
+                marker.bindTooltip(function() { return tooltipHtml(p, i); });
+                return marker;
+            };
+            if (renderer) {
+                layer.bindPopup(function(marker) {
+                    return popupHtml(marker.options.pgsPoints, marker.options.pgsIndex);
+                }, {maxWidth: 250});
+                layer.bindTooltip(function(marker) {
+                    return tooltipHtml(marker.options.pgsPoints, marker.options.pgsIndex);
+                });
+            }
+            var sumLat = 0, sumLon = 0, count = 0;
+            var addPoints = function(p) {
+                var markers = new Array(p.count);
+                for (var i = 0; i < p.count; i++) {
+                    sumLat += p.lat[i];
+                    sumLon += p.lon[i];
+                    markers[i] = makeMarker(p, i);
+                }
+                count += p.count;
+                if (layer.addLayers) {
+                    layer.addLayers(markers); // MarkerCluster bulk insert
+                } else {
+                    markers.forEach(function(marker) { layer.addLayer(marker); });
+                }
+            };
+            var finish = function() {
+                if (options.centerOnData && count > 0) {
+                    map.setView([sumLat / count, sumLon / count], options.dataZoom);
+                }
+            };
+
+            if (options.points) {
+                addPoints(options.points);
+                return;
+            }
+
+            // Incremental map: chunks are plain scripts (fetch() is blocked on file:// pages)
+            var pending = 0;
+            var loadScript = function(url, onDone) {
+                var script = document.createElement('script');
+                script.src = url;
+                script.onload = onDone;
+                script.onerror = function() { console.error('Pin Grid Spy: failed to load ' + url); onDone(); };
+                document.body.appendChild(script);
+            };
+            window.PinGridSpy = {
+                loadChunk: function(chunkId, payload) { addPoints(payload); },
+                setIndex: function(index) {
+                    pending = index.chunks.length;
+                    if (pending === 0) { finish(); }
+                    index.chunks.forEach(function(chunk) {
+                        loadScript(options.dataDir + '/' + chunk.file + '?v=' + chunk.digest, function() {
+                            pending -= 1;
+                            if (pending === 0) { finish(); }
+                        });
+                    });
+                }
+            };
+            loadScript(options.dataDir + '/index.js?t=' + Date.now(), function() {});
+        })({{ this._parent.get_name() }}, {{ this.layer.get_name() }}, {{ this.options_json }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, layer, points: dict = None, data_dir_name: str = None, canvas: bool = False):
+        super().__init__()
+        self._name = "PointLayer"
+        self.layer = layer
+        self.renderer_js = _RENDERER_JS
+        self.options_json = _dump_js({
+            "points": points,
+            "canvasStyle": config.MAP_CANVAS_STYLE if canvas else None,
+            "dataDir": data_dir_name,
+            "centerOnData": points is None, # Inline maps are already centered by Python
+            "dataZoom": 6,
+            "googleMapsUrl": config.GOOGLE_MAPS_URL_TEMPLATE,
+        })
+
+class _ClusteredPointLayer(MacroElement):
+    """
+    Renderer for the precomputed cluster tree built by `clustering`. The
+    tree's levels live in one script per zoom level next to the map (see
+    `clustering.export_cluster_tree`); the level of the current zoom is
+    injected when first needed and levels more than one zoom away are
+    dropped again. On every move/zoom it draws only the clusters whose map
+    tiles intersect the viewport; above the tree's max zoom it draws the
+    individual points in view as canvas circle markers.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function(map, options) {
+            {{ this.renderer_js }}
+            var points = options.points, tree = options.tree;
+            var base = options.clustersDir + '/';
+            var registry = window.PinGridSpy = window.PinGridSpy || {};
+            var levels = {}, loading = {};
+            registry.loadClusterLevel = function(zoom, payload) { levels[zoom] = payload; };
+            // Calls done(level) once the script of level `zoom` has been loaded
+            var loadLevel = function(zoom, done) {
+                if (levels[zoom]) { done(levels[zoom]); return; }
+                if (loading[zoom]) { return; } // render() runs again when it arrives
+                loading[zoom] = true;
+                var script = document.createElement('script');
+                script.onload = script.onerror = function() {
+                    delete loading[zoom];
+                    script.remove();
+                    if (levels[zoom]) { done(levels[zoom]); }
+                };
+                script.src = base + 'level_' + zoom + '.js';
+                document.head.appendChild(script);
+            };
+            var renderer = L.canvas({padding: 0.5});
+            var layer = L.featureGroup().addTo(map);
+            layer.bindPopup(function(marker) { return popupHtml(points, marker.options.pgsIndex); }, {maxWidth: 250});
+            var pointMarker = function(index) {
+                var marker = L.circleMarker([points.lat[index], points.lon[index]],
+                    L.extend({renderer: renderer, pgsIndex: index}, options.canvasStyle));
+                marker.bindTooltip(function() { return tooltipHtml(points, index); });
+                return marker;
+            };
+            // Calls visit(start, end) for every tile of `tiles` (at `zoom`) inside the padded viewport
+            var forEachVisibleTile = function(tiles, zoom, visit) {
+                var bounds = map.getBounds().pad(0.2);
+                var nw = map.project(bounds.getNorthWest(), zoom).divideBy(tree.tileSize).floor();
+                var se = map.project(bounds.getSouthEast(), zoom).divideBy(tree.tileSize).floor();
+                var limit = Math.pow(2, zoom);
+                for (var x = Math.max(nw.x, 0); x <= Math.min(se.x, limit - 1); x++) {
+                    for (var y = Math.max(nw.y, 0); y <= Math.min(se.y, limit - 1); y++) {
+                        var slice = tiles[x + ',' + y];
+                        if (slice) { visit(slice[0], slice[1]); }
+                    }
+                }
+            };
+            var draw = function(zoom, level) {
+                layer.clearLayers();
+                if (zoom > tree.maxZoom) {
+                    forEachVisibleTile(level.tiles, zoom, function(start, end) {
+                        for (var i = start; i < end; i++) { layer.addLayer(pointMarker(level.order[i])); }
+                    });
+                    return;
+                }
+                forEachVisibleTile(level.tiles, zoom, function(start, end) {
+                    for (var i = start; i < end; i++) {
+                        if (level.point[i] >= 0) {
+                            layer.addLayer(pointMarker(level.point[i]));
+                            continue;
+                        }
+                        var latlng = [level.lat[i], level.lon[i]];
+                        var cluster = L.marker(latlng, {icon: clusterIcon(level.count[i])});
+                        cluster.on('click', function(latlng) {
+                            return function(e) {
+                                L.DomEvent.stopPropagation(e);
+                                map.setView(latlng, Math.min(zoom + 2, tree.maxZoom + 1));
+                            };
+                        }(latlng));
+                        layer.addLayer(cluster);
+                    }
+                });
+            };
+            var currentZoom = function() { return Math.min(Math.round(map.getZoom()), tree.maxZoom + 1); };
+            var render = function() {
+                var zoom = currentZoom();
+                for (var key in levels) {
+                    if (Math.abs(key - zoom) > 1) { delete levels[key]; }
+                }
+                loadLevel(zoom, function(level) {
+                    if (currentZoom() === zoom) { draw(zoom, level); }
+                });
+            };
+            map.on('moveend', render);
+            render();
+        })({{ this._parent.get_name() }}, {{ this.options_json }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, points: dict, tree: dict, clusters_dir_name: str):
+        super().__init__()
+        self._name = "ClusteredPointLayer"
+        self.renderer_js = _RENDERER_JS
+        self.options_json = _dump_js({
+            "points": points,
+            "tree": tree,
+            "clustersDir": clusters_dir_name,
+            "canvasStyle": config.MAP_CANVAS_STYLE,
+            "googleMapsUrl": config.GOOGLE_MAPS_URL_TEMPLATE,
+        })
+
+class _TilePyramidLayer(MacroElement):
+    """
+    Loads a tile pyramid written by `tile_pyramid.export_tile_pyramid`: the
+    density PNGs as a regular tile layer, and the vector tiles through a
+    GridLayer that injects each tile's script when it comes into view and
+    drops its markers when Leaflet unloads the tile, so browser memory
+    depends on the viewport rather than on the size of the case.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function(map, options) {
+            {{ this.renderer_js }}
+            var base = options.tilesDir + '/';
+            var registry = window.PinGridSpy = window.PinGridSpy || {};
+            var pending = {}, layers = {};
+            registry.loadTile = function(key, payload) {
+                var callback = pending[key];
+                if (callback) { delete pending[key]; callback(payload); }
+            };
+            var renderer = L.canvas({padding: 0.5});
+            var tileOptions = {maxNativeZoom: options.maxZoom, maxZoom: 19};
+
+            L.tileLayer(base + '{z}/{x}/{y}.png', L.extend({
+                opacity: 0.8,
+                errorTileUrl: 'data:image/gif;base64,R0lGODlhAQABAAAAACH5BAEKAAEALAAAAAABAAEAAAICTAEAOw=='
+            }, tileOptions)).addTo(map);
+
+            var buildLayer = function(zoom, payload) {
+                var group = L.featureGroup();
+                if (payload.points) {
+                    var p = payload.points;
+                    for (var i = 0; i < p.count; i++) {
+                        var marker = L.circleMarker([p.lat[i], p.lon[i]],
+                                                    L.extend({renderer: renderer}, options.canvasStyle));
+                        var popup = function(i) { return function() { return popupHtml(p, i); }; }(i);
+                        marker.bindPopup(popup, {maxWidth: 250});
+                        marker.bindTooltip(function(i) { return function() { return tooltipHtml(p, i); }; }(i));
+                        group.addLayer(marker);
+                    }
+                    return group;
+                }
+                for (var j = 0; j < payload.count.length; j++) {
+                    var latlng = [payload.lat[j], payload.lon[j]];
+                    var cluster = payload.count[j] > 1
+                        ? L.marker(latlng, {icon: clusterIcon(payload.count[j])})
+                        : L.circleMarker(latlng, L.extend({renderer: renderer}, options.canvasStyle));
+                    cluster.on('click', function(latlng) {
+                        return function(e) {
+                            L.DomEvent.stopPropagation(e);
+                            map.setView(latlng, Math.min(zoom + 2, options.maxZoom));
+                        };
+                    }(latlng));
+                    group.addLayer(cluster);
+                }
+                return group;
+            };
+
+            var VectorTiles = L.GridLayer.extend({
+                createTile: function(coords, done) {
+                    var tile = document.createElement('div');
+                    var key = coords.z + '/' + coords.x + '/' + coords.y;
+                    var script = document.createElement('script');
+                    var finish = function() { script.remove(); done(null, tile); };
+                    pending[key] = function(payload) {
+                        layers[key] = buildLayer(coords.z, payload).addTo(map);
+                        finish();
+                    };
+                    script.onerror = function() { delete pending[key]; finish(); }; // No points in this tile
+                    script.src = base + key + '.js';
+                    document.head.appendChild(script);
+                    return tile;
+                }
+            });
+            var vectorTiles = new VectorTiles(L.extend({keepBuffer: 1}, tileOptions));
+            vectorTiles.on('tileunload', function(e) {
+                var key = e.coords.z + '/' + e.coords.x + '/' + e.coords.y;
+                delete pending[key];
+                if (layers[key]) { map.removeLayer(layers[key]); delete layers[key]; }
+            });
+            vectorTiles.addTo(map);
+        })({{ this._parent.get_name() }}, {{ this.options_json }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, tiles_dir_name: str, max_zoom: int):
+        super().__init__()
+        self._name = "TilePyramidLayer"
+        self.renderer_js = _RENDERER_JS
+        self.options_json = _dump_js({
+            "tilesDir": tiles_dir_name,
+            "maxZoom": max_zoom,
+            "canvasStyle": config.MAP_CANVAS_STYLE,
+            "googleMapsUrl": config.GOOGLE_MAPS_URL_TEMPLATE,
+        })
+
+
+def _map_view(image_data_list: list):
+    """Returns the (center, zoom) to open the map at."""
+    if not image_data_list:
+        return config.DEFAULT_MAP_LOCATION, config.DEFAULT_MAP_ZOOM
+    # Calculate map center based on average coordinates
+    lats, lons = record_store.coordinates(image_data_list)
+    return [float(lats.mean()), float(lons.mean())], 6 # Zoom in a bit if there's data
+
+def _build_base_map(map_center, map_zoom, prefer_canvas: bool = False):
+    """Creates the Folium map without markers, tools or sidebar."""
+    log.info(f"Initializing map centered at {map_center}, zoom {map_zoom}")
+    m = folium.Map(location=map_center, zoom_start=map_zoom, tiles="OpenStreetMap",
+                   prefer_canvas=prefer_canvas)
+    return m
+
+def _resolve_render_mode(render_mode: str, point_count: int, incremental: bool = False):
+    """Validates `render_mode` and resolves "auto" from the number of points."""
+    render_mode = render_mode or config.MAP_RENDER_MODE
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Unknown render mode '{render_mode}'. Expected one of {RENDER_MODES}.")
+    if render_mode == "auto":
+        render_mode = config.MAP_LARGE_RENDER_MODE if point_count > config.MAP_CANVAS_THRESHOLD else "data"
+    if incremental and render_mode == "folium":
+        log.info("Per-marker folium rendering is not available for incremental maps; using \"data\".")
+        render_mode = "data"
+    if incremental and render_mode in ("clustered", "tiles"):
+        log.info(f"The \"{render_mode}\" renderer needs the whole case at once and is not available "
+                 "for incremental maps; using \"canvas\".")
+        render_mode = "canvas"
+    return render_mode
+
+def _add_point_layer(m: folium.Map, render_mode: str, points: dict = None, data_dir_name: str = None):
+    """Adds the container layer and the `_PointLayer` renderer for the "data"/"canvas" modes."""
+    if render_mode == "canvas":
+        layer = folium.FeatureGroup(name="Images").add_to(m)
+    else:
+        layer = MarkerCluster().add_to(m)
+    _PointLayer(layer, points=points, data_dir_name=data_dir_name, canvas=render_mode == "canvas").add_to(m)
+
+def _add_clustered_layer(m: folium.Map, image_data_list: list, output_dir: pathlib.Path, atlas: dict = None):
+    """
+    Precomputes the per-zoom cluster tree, writes its levels to
+    config.MAP_CLUSTERS_DIRNAME next to the map and adds the
+    `_ClusteredPointLayer` renderer.
+    """
+    tree = clustering.build_cluster_tree(*record_store.coordinates(image_data_list))
+    header = clustering.export_cluster_tree(tree, output_dir / config.MAP_CLUSTERS_DIRNAME)
+    _ClusteredPointLayer(encode_points(image_data_list, atlas), header, config.MAP_CLUSTERS_DIRNAME).add_to(m)
+
+def _add_tools_and_sidebar(m: folium.Map):
+    """Adds the measure/layer controls and the Leaflet-Sidebar-v2 components."""
     # --- Add Map Tools ---
     MeasureControl(position='topleft', primary_length_unit='meters').add_to(m)
     folium.LayerControl().add_to(m) # Allows switching base maps if more are added
@@ -92,7 +556,7 @@ def create_map(image_data_list: list, output_file: pathlib.Path):
     sidebar_css_link = f'<link rel="stylesheet" href="{config.SIDEBAR_CSS_PATH}">'
     m.get_root().header.add_child(folium.Element(sidebar_css_link))
 
-    # 2. Add Sidebar HTML structure before closing </body>
+    # 2. Add Sidebar HTML structure and JS to <body>
     #    Make sure paths in href/src are relative to the map.html file location
     sidebar_html = f"""
     <div id="sidebar" class="leaflet-sidebar collapsed">
@@ -138,42 +602,339 @@ def create_map(image_data_list: list, output_file: pathlib.Path):
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/4.7.0/css/font-awesome.min.css">
     """
     m.get_root().html.add_child(folium.Element(sidebar_html))
+    m.get_root().html.add_child(folium.Element(f'<script src="{config.SIDEBAR_JS_PATH}"></script>'))
 
-    # 3. Add Sidebar JS *and* Initialization Script before closing </body>
-    #    Make sure the initialization runs *after* the sidebar JS is loaded and *after* the map ('m') is defined.
-    sidebar_js_link_and_init = f"""
-    <script src="{config.SIDEBAR_JS_PATH}"></script>
-    <script>
-        // Wait for the map object to be defined by Folium
-        // Note: Folium typically names the map variable 'map_xxxxxxxx...'
-        // We assume 'm' here based on the folium object, but need to target the JS map object.
-        // A safer way is to wait for DOMContentLoaded or find the map instance.
-        // However, Folium places its map init script late, so this usually works:
-        var map_instance = {{ map_variable }}; // Folium replaces this with the JS map variable name
-        var sidebar = L.control.sidebar({{ container: 'sidebar' }}).addTo(map_instance);
+    # 3. Initialization script, rendered after the map object is defined
+    _SidebarInit().add_to(m)
 
-        // Simple LocalStorage for Notes
-        var notesArea = document.getElementById('notes-area');
-        notesArea.value = localStorage.getItem('pinGridSpyNotes') || ''; // Load saved notes
+def _add_folium_markers(m: folium.Map, image_data_list: list):
+    """Adds one clustered folium.Marker with a pre-rendered popup per image."""
+    # --- Add Marker Cluster ---
+    marker_cluster = MarkerCluster().add_to(m)
 
-        function saveNotes() {{
-            localStorage.setItem('pinGridSpyNotes', notesArea.value);
-            alert('Notes saved!');
-        }}
-        function clearNotes() {{
-             if (confirm('Are you sure you want to clear all saved notes?')) {{
-                notesArea.value = '';
-                localStorage.removeItem('pinGridSpyNotes');
-                alert('Notes cleared!');
-            }}
-        }}
-    </script>
+    # --- Add Markers ---
+    log.info(f"Adding {len(image_data_list)} markers to the map.")
+    for data in image_data_list:
+        # Sanitize data for HTML display
+        thumb_rel_path_html = html.escape(data['thumbnail_rel_path'])
+        datetime_html = html.escape(data['datetime'])
+        model_html = html.escape(data['model'])
+        original_path_html = html.escape(data['original_path'])
+        lat, lon = data['latitude'], data['longitude']
+        google_maps_link = config.GOOGLE_MAPS_URL_TEMPLATE.format(lat=lat, lon=lon)
+
+        # Create Popup HTML content
+        popup_html = f"""
+        <b>Date:</b> {datetime_html}<br>
+        <b>Model:</b> {model_html}<br>
+        <a href="{google_maps_link}" target="_blank">Open in Google Maps</a><br>
+        <hr>
+        <img src="{thumb_rel_path_html}" alt="Thumbnail" style="max-width:180px;"><br>
+        <small><i>Path: {original_path_html}</i></small>
+        """
+        # Use IFrame for potentially complex HTML, or just Html for simple cases
+        # iframe = folium.IFrame(html=popup_html, width=220, height=250)
+        # popup = folium.Popup(iframe, max_width=250)
+        popup = folium.Popup(popup_html, max_width=250)
+
+
+        folium.Marker(
+            location=[lat, lon],
+            popup=popup,
+            tooltip=f"Date: {data['datetime']}" # Tooltip on hover
+        ).add_to(marker_cluster)
+
+def _collapse_near_duplicates(image_data_list: list):
+    """Returns one record per near-duplicate group, listing the other members' paths under "similar"."""
+    markers = []
+    for group in dedup.group_near_duplicates(image_data_list):
+        marker = group[0]
+        if len(group) > 1:
+            marker = dict(marker, similar=[item['original_path'] for item in group[1:]])
+        markers.append(marker)
+    return markers
+
+def create_map(image_data_list: list, output_file: pathlib.Path, incremental: bool = None,
+               render_mode: str = None, use_atlas: bool = None, group_duplicates: bool = None,
+               bbox: tuple = None):
     """
-    # This uses Folium's internal template variable `map_variable`
-    m.get_root().script.add_child(folium.Element(sidebar_js_link_and_init))
+    Generates the Folium map with markers, clusters, tools, and sidebar.
+
+    `render_mode` (default config.MAP_RENDER_MODE) selects how markers are
+    written: "data" embeds all points as one compact JSON payload and builds
+    popups in JavaScript on click, "canvas" draws the same payload as circle
+    markers on a shared canvas, "clustered" precomputes per-zoom clusters
+    with NumPy into one script per zoom level next to the map (see
+    `clustering.export_cluster_tree`), loads the level in view and draws
+    only the clusters in the viewport, "folium"
+    emits one folium.Marker/Popup per image, "tiles" exports an offline
+    density/vector tile pyramid next to the map (see `tile_pyramid`) that
+    the page loads per visible tile, and "auto" picks
+    config.MAP_LARGE_RENDER_MODE above config.MAP_CANVAS_THRESHOLD points
+    and "data" otherwise. With `incremental` (default config.MAP_INCREMENTAL) the points
+    are kept in chunked data scripts next to a stable map shell, and only
+    chunks whose content changed since the last build are rewritten. With
+    `use_atlas` (default config.MAP_THUMBNAIL_ATLAS) the popup thumbnails
+    are packed into sprite sheets next to the map (see `thumbnail_atlas`).
+    With `group_duplicates` (default config.MAP_GROUP_NEAR_DUPLICATES)
+    near-duplicate images share one marker (see `dedup`). A `bbox` of
+    (south, west, north, east) only maps the images inside it.
+    """
+    with instrumentation.stage("map") as timer:
+        _build_map(image_data_list, output_file, incremental, render_mode, use_atlas,
+                   group_duplicates, bbox)
+        if output_file.exists():
+            timer.add_bytes(output_file.stat().st_size) # Bytes written; the map stage reads no source files
+
+def _valid_points(image_data_list):
+    """Leaves out records with invalid, out-of-range or (0, 0) placeholder coordinates (see utils.coordinate_masks)."""
+    if not len(image_data_list):
+        return image_data_list
+    masks = utils.coordinate_masks(*record_store.coordinates(image_data_list))
+    if masks["valid"].all():
+        return image_data_list
+    log.warning(f"Leaving {int((~masks['valid']).sum())} images off the map: {int(masks['invalid'].sum())} invalid, "
+                f"{int(masks['out_of_range'].sum())} out of range, {int(masks['null_island'].sum())} at (0, 0).")
+    return spatial_index.select(image_data_list, np.flatnonzero(masks["valid"]))
+
+def _build_map(image_data_list: list, output_file: pathlib.Path, incremental: bool, render_mode: str,
+               use_atlas: bool, group_duplicates: bool, bbox: tuple):
+    """Builds and saves the map; see `create_map`."""
+    incremental = config.MAP_INCREMENTAL if incremental is None else incremental
+    use_atlas = config.MAP_THUMBNAIL_ATLAS if use_atlas is None else use_atlas
+    group_duplicates = config.MAP_GROUP_NEAR_DUPLICATES if group_duplicates is None else group_duplicates
+    image_data_list = _valid_points(image_data_list)
+    if bbox is not None:
+        inside = np.flatnonzero(record_store.bbox_mask(image_data_list, *bbox))
+        log.info(f"Mapping {len(inside)} of {len(image_data_list)} images inside {tuple(bbox)}.")
+        image_data_list = spatial_index.select(image_data_list, inside)
+    if group_duplicates and incremental:
+        log.info("Near-duplicate grouping is not available for incremental maps; one marker per image.")
+    elif group_duplicates:
+        image_data_list = _collapse_near_duplicates(image_data_list)
+    render_mode = _resolve_render_mode(render_mode, len(image_data_list), incremental)
+    if not image_data_list:
+        log.warning("No image data with GPS coordinates provided. Map will be empty.")
+
+    if incremental:
+        if use_atlas:
+            log.info("Thumbnail atlases are not available for incremental maps; using thumbnail files.")
+        _write_incremental_map(image_data_list, output_file, render_mode)
+        log.info("Map generation complete.")
+        return
+
+    atlas = None
+    if use_atlas and render_mode == "folium":
+        log.info("Thumbnail atlases are not available for the \"folium\" renderer; using thumbnail files.")
+    elif use_atlas:
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        atlas, _ = thumbnail_atlas.pack_atlas([item['thumbnail_rel_path'] for item in image_data_list],
+                                              output_file.parent)
+
+    map_center, map_zoom = _map_view(image_data_list)
+    m = _build_base_map(map_center, map_zoom, prefer_canvas=render_mode in ("canvas", "clustered", "tiles"))
+    if render_mode == "folium":
+        _add_folium_markers(m, image_data_list)
+    elif render_mode == "clustered":
+        log.info(f"Adding {len(image_data_list)} points to the map (precomputed clusters).")
+        _add_clustered_layer(m, image_data_list, output_file.parent, atlas)
+    elif render_mode == "tiles":
+        manifest = tile_pyramid.export_tile_pyramid(image_data_list, output_file.parent / config.MAP_TILES_DIRNAME,
+                                                    atlas=atlas)
+        _TilePyramidLayer(config.MAP_TILES_DIRNAME, manifest["maxZoom"]).add_to(m)
+    else:
+        log.info(f"Adding {len(image_data_list)} points to the map ({render_mode} renderer).")
+        _add_point_layer(m, render_mode, points=encode_points(image_data_list, atlas))
+    _add_tools_and_sidebar(m)
 
     # --- Save Map ---
     log.info(f"Saving map to: {output_file}")
     output_file.parent.mkdir(parents=True, exist_ok=True) # Ensure output dir exists
     m.save(str(output_file))
-    log.info("Map generation complete.")
\ No newline at end of file
+    log.info("Map generation complete.")
+
+
+# --- Incremental Map Data ---
+#
+# Layout next to the map shell (output_file):
+#   <MAP_DATA_DIRNAME>/chunk_NNN.js   PinGridSpy.loadChunk(NNN, <encode_points payload>);
+#   <MAP_DATA_DIRNAME>/index.js       PinGridSpy.setIndex({...}); lists non-empty chunks
+#   <MAP_DATA_DIRNAME>/manifest.json  chunk digests and settings, read back on rebuild
+# Each record goes to the chunk picked by a hash of its original path, so
+# adding or removing images only touches the chunks those images live in.
+# Chunks are loaded with <script> tags because browsers block fetch() on file:// URLs.
+
+def _data_dir(output_file: pathlib.Path):
+    return output_file.parent / config.MAP_DATA_DIRNAME
+
+def _chunk_id(original_path: str, chunk_count: int):
+    """Stable chunk assignment for a record."""
+    digest = hashlib.blake2b(original_path.encode('utf-8'), digest_size=4).digest()
+    return int.from_bytes(digest, 'big') % chunk_count
+
+def _chunk_file(chunk_id: int):
+    return f"chunk_{chunk_id:03d}.js"
+
+def _chunk_script(chunk_id: int, records: list):
+    """Serializes a chunk's records (sorted by original path for stable output)."""
+    records = sorted(records, key=lambda item: item['original_path'])
+    return f"PinGridSpy.loadChunk({chunk_id}, {_dump_js(encode_points(records))});\n"
+
+def _read_chunk_records(path: pathlib.Path):
+    """Reads the records back out of a chunk script written by `_chunk_script`."""
+    text = path.read_text(encoding='utf-8')
+    start = text.index(', ') + 2
+    end = text.rindex(');')
+    return decode_points(json.loads(text[start:end]))
+
+def _digest(text: str):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+def _shell_signature(render_mode: str):
+    """Identifies the shell settings; the shell is rewritten when this changes."""
+    return _digest(json.dumps([MAP_DATA_VERSION, render_mode, config.MAP_CANVAS_STYLE, config.MAP_DATA_DIRNAME,
+                               config.SIDEBAR_CSS_PATH, config.SIDEBAR_JS_PATH,
+                               config.GOOGLE_MAPS_URL_TEMPLATE]))
+
+def _load_manifest(data_dir: pathlib.Path):
+    """Returns the manifest of a compatible existing data directory, or None."""
+    manifest_path = data_dir / "manifest.json"
+    if not manifest_path.exists():
+        return None
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable map manifest {manifest_path}: {e}")
+        return None
+    if manifest.get("version") != MAP_DATA_VERSION or manifest.get("chunk_count") != config.MAP_DATA_CHUNKS:
+        log.info("Map data layout changed; existing chunks will be rewritten.")
+        return None
+    return manifest
+
+def _write_shell(output_file: pathlib.Path, render_mode: str):
+    """Writes the map HTML shell that loads its markers from the data directory."""
+    m = _build_base_map(config.DEFAULT_MAP_LOCATION, config.DEFAULT_MAP_ZOOM,
+                        prefer_canvas=render_mode == "canvas")
+    _add_point_layer(m, render_mode, data_dir_name=config.MAP_DATA_DIRNAME)
+    _add_tools_and_sidebar(m)
+    log.info(f"Saving map shell to: {output_file}")
+    m.save(str(output_file))
+
+def _write_chunks(data_dir: pathlib.Path, chunks: dict, digests: dict):
+    """
+    Writes chunk scripts whose content changed, deletes chunks that became
+    empty and updates `digests` in place. Returns the number of files touched.
+    """
+    touched = 0
+    for chunk_id, records in chunks.items():
+        key = str(chunk_id)
+        path = data_dir / _chunk_file(chunk_id)
+        if not records:
+            if key in digests:
+                path.unlink(missing_ok=True)
+                del digests[key]
+                touched += 1
+            continue
+        script = _chunk_script(chunk_id, records)
+        digest = _digest(script)
+        if digests.get(key) != digest or not path.exists():
+            path.write_text(script, encoding='utf-8')
+            digests[key] = digest
+            touched += 1
+    return touched
+
+def _write_index(data_dir: pathlib.Path, manifest: dict):
+    """Writes index.js (read by the browser) and manifest.json (read by us)."""
+    digests = manifest["digests"]
+    index = {
+        "count": manifest["count"],
+        "chunks": [
+            {"file": _chunk_file(int(key)), "digest": digests[key]}
+            for key in sorted(digests, key=int)
+        ],
+    }
+    (data_dir / "index.js").write_text(f"PinGridSpy.setIndex({_dump_js(index)});\n", encoding='utf-8')
+    (data_dir / "manifest.json").write_text(json.dumps(manifest, indent=1), encoding='utf-8')
+
+def _refresh_shell(output_file: pathlib.Path, manifest: dict, render_mode: str):
+    """Rewrites the shell if its settings (or render mode) changed since the last build."""
+    signature = _shell_signature(render_mode)
+    if manifest.get("shell") != signature or not output_file.exists():
+        _write_shell(output_file, render_mode)
+        manifest["shell"] = signature
+        manifest["render_mode"] = render_mode
+
+def _write_incremental_map(image_data_list: list, output_file: pathlib.Path, render_mode: str):
+    """Builds or refreshes the shell + chunked data layout from the full record list."""
+    data_dir = _data_dir(output_file)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    chunk_count = config.MAP_DATA_CHUNKS
+
+    manifest = _load_manifest(data_dir)
+    if manifest is None:
+        for stale in data_dir.glob("chunk_*.js"):
+            stale.unlink()
+        manifest = {"version": MAP_DATA_VERSION, "chunk_count": chunk_count, "count": 0, "digests": {}}
+
+    chunks = {int(key): [] for key in manifest["digests"]} # Existing chunks that may become empty
+    for record in image_data_list:
+        chunks.setdefault(_chunk_id(record['original_path'], chunk_count), []).append(record)
+
+    touched = _write_chunks(data_dir, chunks, manifest["digests"])
+    manifest["count"] = len(image_data_list)
+
+    _refresh_shell(output_file, manifest, render_mode)
+    _write_index(data_dir, manifest)
+    log.info(f"Map data: {len(image_data_list)} points in {len(manifest['digests'])} chunks, "
+             f"{touched} chunk files rewritten.")
+
+def update_map(output_file: pathlib.Path, added: list = (), removed: list = (), render_mode: str = None):
+    """
+    Applies a delta to an incremental map built by `create_map(..., incremental=True)`.
+    `added` are image records (new or changed), `removed` are original paths.
+    Added records with invalid or (0, 0) coordinates are left out (and
+    removed if they were mapped before), as in `create_map`.
+    Only the chunks those records hash to are read and rewritten, so the cost
+    scales with the size of the delta rather than the whole case.
+    Falls back to a full build if no incremental map data exists yet; a
+    missing shell alone is regenerated from the existing manifest. With
+    `render_mode` "auto" the shell switches renderer when the point count
+    crosses config.MAP_CANVAS_THRESHOLD.
+    """
+    added = list(added)
+    valid = _valid_points(added)
+    if len(valid) < len(added): # A record that moved to invalid coordinates also leaves the map
+        kept = {record['original_path'] for record in valid}
+        removed = list(removed) + [record['original_path'] for record in added if record['original_path'] not in kept]
+        added = valid
+    data_dir = _data_dir(output_file)
+    manifest = _load_manifest(data_dir)
+    if manifest is None:
+        log.info("No compatible incremental map found; building from the given records.")
+        _write_incremental_map(added, output_file, _resolve_render_mode(render_mode, len(added), True))
+        return
+
+    chunk_count = manifest["chunk_count"]
+    changes = {} # chunk id -> (paths to drop, records to add)
+    for path in removed:
+        changes.setdefault(_chunk_id(str(path), chunk_count), (set(), []))[0].add(str(path))
+    for record in added:
+        drop, new_records = changes.setdefault(_chunk_id(record['original_path'], chunk_count), (set(), []))
+        drop.add(record['original_path']) # Replace an existing entry for the same image
+        new_records.append(record)
+
+    chunks = {}
+    count = manifest["count"]
+    for chunk_id, (drop, new_records) in changes.items():
+        chunk_path = data_dir / _chunk_file(chunk_id)
+        known = str(chunk_id) in manifest["digests"] and chunk_path.exists()
+        existing = _read_chunk_records(chunk_path) if known else []
+        kept = [record for record in existing if record['original_path'] not in drop]
+        count += len(kept) - len(existing) + len(new_records)
+        chunks[chunk_id] = kept + new_records
+
+    touched = _write_chunks(data_dir, chunks, manifest["digests"])
+    manifest["count"] = count
+    _refresh_shell(output_file, manifest, _resolve_render_mode(render_mode, count, True))
+    _write_index(data_dir, manifest)
+    log.info(f"Map data updated: +{len(added)} / -{len(removed)} images, {touched} chunk files rewritten.")
@@ -0,0 +1,273 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/pipeline.py
+# Headless batch mode: scan -> process (metadata and thumbnail) -> checkpoint
+# -> map export. The scan and the processing run on their own threads and
+# hand their output on through bounded queues, so a slow stage holds back
+# the stages before it instead of letting work pile up in memory. The main
+# thread stores the results: every config.BATCH_CHECKPOINT_INTERVAL seconds
+# the new records and the status of every finished file are written to a
+# session file in the output directory in one transaction. A later run over
+# the same input skips the files listed there, so an interrupted run
+# resumes where its last checkpoint left off. The checkpoint is an ordinary
+# session file and can also be opened in the GUI.
+import json
+import logging
+import pathlib
+import queue
+import threading
+import time
+
+from . import config, image_processor, instrumentation, map_generator, record_store, scanner, session
+
+log = logging.getLogger(__name__)
+
+_END = object() # Marks the end of a stage's output
+_PUT_TIMEOUT = 0.5 # Seconds between stop checks while a queue is full
+_INPUT_SETTING = "batch_input_dir" # Checkpoint setting naming the input directory it belongs to
+_DONE_STATUSES = ("processed", "no_gps") # Checkpointed files a resumed run skips; failed ones are retried
+
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    """Puts `item` on a bounded queue, giving up once `stop` is set. Returns True if it was queued."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _drain(q: queue.Queue):
+    """Yields the items of a queue until the end marker."""
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        yield item
+
+
+class _Stage(threading.Thread):
+    """A pipeline stage thread: runs `work`, records its wall time and error, and always ends its output queue."""
+
+    def __init__(self, name: str, work, output: queue.Queue, stop: threading.Event):
+        super().__init__(name=f"pgs-batch-{name}", daemon=True)
+        self.stage = name
+        self.work = work
+        self.output = output
+        self.stop = stop
+        self.elapsed = 0.0
+        self.error = None
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            with instrumentation.profile_thread():
+                self.work()
+        except KeyboardInterrupt:
+            # Ctrl+C reaches process pool workers too; their KeyboardInterrupt is re-raised here
+            log.warning(f"Batch stage '{self.stage}' interrupted.")
+            self.stop.set()
+        except Exception as e:
+            log.error(f"Batch stage '{self.stage}' failed: {e}", exc_info=True)
+            self.error = str(e)
+            self.stop.set()
+        finally:
+            self.elapsed = time.perf_counter() - start
+            # The end marker must get through even when stopping: the next stage waits for it
+            while True:
+                try:
+                    self.output.put(_END, timeout=_PUT_TIMEOUT)
+                    break
+                except queue.Full:
+                    try:
+                        self.output.get_nowait() # Stopping: nobody needs the queued items any more
+                    except queue.Empty:
+                        pass
+
+
+def open_checkpoint(path: pathlib.Path, input_dir: pathlib.Path, restart: bool = False):
+    """
+    Opens the checkpoint session of a batch run over `input_dir`, creating
+    it if needed (or starting over with `restart`). Raises ValueError for a
+    checkpoint that was written for another input directory.
+    """
+    path = pathlib.Path(path)
+    if restart and path.exists():
+        log.info(f"Discarding checkpoint {path}.")
+        path.unlink()
+    if not path.exists():
+        checkpoint = session.SessionFile.create(path)
+        checkpoint.set_settings({**session.session_settings(), _INPUT_SETTING: str(input_dir)})
+        return checkpoint
+    checkpoint = session.open_session(path)
+    saved_input = checkpoint.settings().get(_INPUT_SETTING)
+    if saved_input != str(input_dir):
+        checkpoint.close()
+        raise ValueError(f"Checkpoint {path} belongs to input directory '{saved_input}'. "
+                         f"Use another output directory or restart the run.")
+    return checkpoint
+
+def run_batch(input_dir: pathlib.Path, output_dir: pathlib.Path, restart: bool = False,
+              checkpoint_interval: float = None, queue_size: int = None, stop: threading.Event = None,
+              **process_kwargs):
+    """
+    Processes every supported image below `input_dir` into `output_dir`
+    (thumbnails, checkpoint session, map) and returns the run summary:
+    {"status", "input_dir", "output_dir", "map", "checkpoint", "found",
+    "resumed", "processed", "no_gps", "failed", "records", "failures",
+    "timings", "error"}, plus the stage histograms as "stages" while
+    `instrumentation` is enabled. `status` is "complete", "interrupted" or
+    "error".
+
+    Files an earlier run checkpointed as processed or without GPS data are
+    skipped unless `restart` is set; failed files are retried. Setting
+    `stop` (or Ctrl+C) ends the run after a final checkpoint; the map is
+    then not exported. `process_kwargs` (executor, workers, chunk_size,
+    use_cache) are passed to `image_processor.iter_process_files`.
+    """
+    input_dir, output_dir = pathlib.Path(input_dir).resolve(), pathlib.Path(output_dir).resolve()
+    checkpoint_interval = config.BATCH_CHECKPOINT_INTERVAL if checkpoint_interval is None else checkpoint_interval
+    queue_size = queue_size or config.BATCH_QUEUE_SIZE
+    stop = stop or threading.Event()
+    thumb_dir = output_dir / config.DEFAULT_THUMBNAIL_DIR.name
+    map_file = output_dir / config.DEFAULT_MAP_FILENAME
+    checkpoint_path = output_dir / config.BATCH_CHECKPOINT_FILENAME
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    counts = dict.fromkeys(image_processor.IMAGE_STATUSES, 0)
+    failures = []
+    timings = {}
+    error = None
+    checkpoint = open_checkpoint(checkpoint_path, input_dir, restart)
+    try:
+        done = {path for path, status in checkpoint.files() if status in _DONE_STATUSES}
+        resumed = len(done)
+        if resumed:
+            log.info(f"Resuming batch run: {resumed} files already done according to {checkpoint_path}.")
+        paths = queue.Queue(maxsize=queue_size)
+        results = queue.Queue(maxsize=queue_size)
+        found = [0]
+
+        # Never pick up our own thumbnails when the output lives inside the input tree
+        exclude = list(config.SCAN_EXCLUDE)
+        try:
+            exclude.append(thumb_dir.resolve().relative_to(input_dir.resolve()).as_posix())
+        except ValueError:
+            pass
+
+        def scan():
+            for path in scanner.scan_images(input_dir, exclude=exclude):
+                found[0] += 1
+                if str(path) not in done and not _put(paths, path, stop):
+                    return
+
+        def process():
+            processed = image_processor.iter_process_files(_drain(paths), thumb_dir, **process_kwargs)
+            try:
+                for result in processed:
+                    if not _put(results, result, stop):
+                        return
+            finally:
+                processed.close() # Cancels queued chunks when stopping early
+
+        stages = [_Stage("scan", scan, paths, stop), _Stage("process", process, results, stop)]
+        for stage in stages:
+            stage.start()
+
+        pending_records, pending_files = [], []
+        checkpoint_time = 0.0
+        last_checkpoint = time.perf_counter()
+        def write_checkpoint():
+            nonlocal pending_records, pending_files, checkpoint_time, last_checkpoint
+            started = time.perf_counter()
+            checkpoint.checkpoint(pending_records, pending_files)
+            log.debug(f"Checkpoint: {len(pending_records)} records, {len(pending_files)} files.")
+            pending_records, pending_files = [], []
+            last_checkpoint = time.perf_counter()
+            checkpoint_time += last_checkpoint - started
+
+        try:
+            for path, record, status in _drain(results):
+                counts[status] += 1
+                pending_files.append((str(path), status))
+                if record is not None:
+                    pending_records.append(record)
+                elif status == "failed":
+                    failures.append(str(path))
+                if time.perf_counter() - last_checkpoint >= checkpoint_interval:
+                    write_checkpoint()
+        except KeyboardInterrupt:
+            log.warning("Batch run interrupted; writing a final checkpoint.")
+            stop.set()
+        for stage in stages:
+            stage.join()
+        write_checkpoint()
+        for stage in stages:
+            timings[stage.stage] = stage.elapsed
+        timings["checkpoint"] = checkpoint_time
+        error = next((f"{stage.stage}: {stage.error}" for stage in stages if stage.error), None)
+
+        if not stop.is_set():
+            started = time.perf_counter()
+            try:
+                # Read the checkpoint once: the paged records hold the SQLite connection, which
+                # cannot go to the tile export workers and pages poorly under random access
+                map_generator.create_map(record_store.RecordStore.from_records(checkpoint.records), map_file)
+            except Exception as e:
+                log.error(f"Batch map export failed: {e}", exc_info=True)
+                error = error or f"export: {e}"
+            timings["export"] = time.perf_counter() - started
+        record_count = len(checkpoint.records)
+    except BaseException:
+        stop.set() # Let the stage threads wind down
+        raise
+    finally:
+        checkpoint.close()
+    timings["total"] = time.perf_counter() - start
+
+    status = "error" if error else "interrupted" if stop.is_set() else "complete"
+    summary = {
+        "status": status,
+        "input_dir": str(input_dir),
+        "output_dir": str(output_dir),
+        "map": str(map_file) if status == "complete" else None,
+        "checkpoint": str(checkpoint_path),
+        "found": found[0],
+        "resumed": resumed,
+        **counts,
+        "records": record_count,
+        "failures": failures[:config.BATCH_SUMMARY_MAX_FAILURES],
+        "timings": {name: round(seconds, 3) for name, seconds in timings.items()},
+        "error": error,
+    }
+    if instrumentation.enabled():
+        summary["stages"] = instrumentation.snapshot()
+    log.info(f"Batch run {status}: {sum(counts.values())} files processed this run ({resumed} resumed), "
+             f"{counts['processed']} with GPS data, {counts['failed']} failed, {record_count} records in total, "
+             f"in {timings['total']:.2f}s.")
+    return summary
+
+def write_summary(summary: dict, path: pathlib.Path):
+    """Writes the run summary as JSON."""
+    pathlib.Path(path).write_text(json.dumps(summary, indent=2), encoding="utf-8")
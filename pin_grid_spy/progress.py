@@ -0,0 +1,137 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/progress.py
+# Aggregated progress logging for large runs. Instead of an INFO line per
+# image, every image outcome is recorded with a ProgressReporter, which
+# counts outcomes by status and reason and logs one summary line per
+# config.PROGRESS_INTERVAL seconds (and a final one on close). Per-image
+# lines are only logged at DEBUG, with %-style arguments so nothing is
+# formatted while DEBUG is off. Unexpected exceptions still go out at ERROR
+# with their traceback, for the first config.PROGRESS_MAX_ERROR_LOGS per
+# reason (see `log_unexpected`). Optionally every outcome is also appended to
+# a JSON Lines event log (config.PROGRESS_EVENT_LOG) for auditing.
+import collections
+import json
+import logging
+import pathlib
+import threading
+import time
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+_unexpected = collections.Counter() # reason -> unexpected exceptions logged so far in this process
+_unexpected_lock = threading.Lock()
+
+def log_unexpected(logger: logging.Logger, reason: str, msg: str, *args):
+    """
+    Logs an unexpected per-image exception from inside its `except` block:
+    at ERROR with the traceback for the first config.PROGRESS_MAX_ERROR_LOGS
+    of each reason (counted per process), at DEBUG after that.
+    """
+    with _unexpected_lock:
+        _unexpected[reason] += 1
+        count = _unexpected[reason]
+    limit = config.PROGRESS_MAX_ERROR_LOGS
+    if count > limit:
+        logger.debug(msg, *args, exc_info=True)
+        return
+    logger.error(msg, *args, exc_info=True)
+    if count == limit:
+        logger.error("Further '%s' errors are logged at DEBUG only; see the progress summaries for counts.", reason)
+
+
+class ProgressReporter:
+    """
+    Counts per-image outcomes ("processed", "no_gps", "failed", with an
+    optional reason such as "no_exif" or "thumbnail") and logs periodic
+    summaries. Use as a context manager or call `close()` at the end.
+    """
+
+    def __init__(self, label: str = "Processing", total: int = None, interval: float = None,
+                 event_log: pathlib.Path = None, logger: logging.Logger = None, clock=time.perf_counter):
+        self.label = label
+        self.total = total
+        self.interval = config.PROGRESS_INTERVAL if interval is None else interval
+        self.logger = logger or log
+        self.statuses = collections.Counter()
+        self.reasons = collections.Counter() # (status, reason) -> count, for everything not processed
+        self._clock = clock
+        self._start = self._last_report = clock()
+        event_log = config.PROGRESS_EVENT_LOG if event_log is None else event_log
+        self._events = None
+        if event_log:
+            event_log = pathlib.Path(event_log)
+            event_log.parent.mkdir(parents=True, exist_ok=True)
+            self._events = open(event_log, "a", encoding="utf-8")
+
+    @property
+    def count(self):
+        return sum(self.statuses.values())
+
+    def record(self, path, status: str, reason: str = None):
+        """Records the outcome of one image."""
+        self.statuses[status] += 1
+        if status != "processed":
+            self.reasons[(status, reason or status)] += 1
+        self.logger.debug("%s (%s): %s", status, reason or status, path)
+        if self._events is not None:
+            self._events.write(json.dumps({"time": round(time.time(), 3), "path": str(path), "status": status,
+                                           "reason": reason}) + "\n")
+        if self.interval and self._clock() - self._last_report >= self.interval:
+            self.report()
+
+    def summary(self):
+        """One line with totals, rate and the reasons images were skipped or failed."""
+        elapsed = self._clock() - self._start
+        count = self.count
+        rate = count / elapsed if elapsed > 0 else 0.0
+        done = f"{count}/{self.total}" if self.total is not None else f"{count}"
+        line = (f"{self.label}: {done} images, {self.statuses['processed']} processed, "
+                f"{self.statuses['no_gps']} without GPS, {self.statuses['failed']} failed, {rate:.1f} img/s")
+        if self.reasons:
+            line += "; " + ", ".join(f"{status}/{reason}: {number}"
+                                     for (status, reason), number in sorted(self.reasons.items()))
+        return line
+
+    def report(self):
+        """Logs the summary line now."""
+        self._last_report = self._clock()
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(self.summary())
+        if self._events is not None:
+            self._events.flush()
+
+    def close(self):
+        """Logs the final summary and closes the event log."""
+        if self.count:
+            self.report()
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,349 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/record_store.py
+# Columnar storage for image records. Instead of one dict per image, each
+# field is one column:
+#   latitude, longitude   float64 NumPy arrays
+#   model                 int32 codes into a list of distinct camera models
+#   paths, datetime, ...  UTF-8 strings packed into one buffer with an
+#                         int64 offset array
+# Indexing a store returns a read-only, dict-like view of one row, so code
+# written against lists of record dicts keeps working, while centering,
+# bounds and filtering run on whole columns at once. Fields outside the
+# schema (e.g. "similar") are kept per row in a sparse dict.
+import array
+import collections.abc
+import logging
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+FLOAT_FIELDS = ("latitude", "longitude")
+CATEGORY_FIELDS = ("model",)
+STRING_FIELDS = ("original_path", "thumbnail_rel_path", "datetime", "content_hash", "phash")
+FIELDS = FLOAT_FIELDS + CATEGORY_FIELDS + STRING_FIELDS
+_FIELD_SET = frozenset(FIELDS)
+
+# Per-row state of a string column
+_ABSENT, _NONE, _VALUE = -1, 0, 1
+
+def coordinates(image_data_list):
+    """
+    Returns (latitudes, longitudes) as float64 arrays for a list of record
+    dicts, or straight from the columns of a columnar source (RecordStore,
+    session records) that provides `coordinates()`.
+    """
+    if hasattr(image_data_list, 'coordinates'):
+        return image_data_list.coordinates()
+    count = len(image_data_list)
+    lats = np.fromiter((item['latitude'] for item in image_data_list), dtype=np.float64, count=count)
+    lons = np.fromiter((item['longitude'] for item in image_data_list), dtype=np.float64, count=count)
+    return lats, lons
+
+def _bbox_mask(lats, lons, south: float, west: float, north: float, east: float):
+    inside_lon = (lons >= west) & (lons <= east) if west <= east else (lons >= west) | (lons <= east)
+    return (lats >= south) & (lats <= north) & inside_lon
+
+def bbox_mask(image_data_list, south: float, west: float, north: float, east: float):
+    """
+    Boolean mask of the records inside a bounding box (edges included),
+    computed on the coordinate columns. A box with `west` > `east` crosses
+    the antimeridian.
+    """
+    if hasattr(image_data_list, 'bbox_mask'):
+        return image_data_list.bbox_mask(south, west, north, east)
+    return _bbox_mask(*coordinates(image_data_list), south, west, north, east)
+
+def column(image_data_list, field: str):
+    """Returns one field of every record as a list, read column-wise from sources that provide `column()`."""
+    if hasattr(image_data_list, 'column'):
+        return image_data_list.column(field)
+    return [item[field] for item in image_data_list]
+
+def has_values(image_data_list, field: str):
+    """Whether any record has a non-empty value for an optional field such as "similar"."""
+    if isinstance(image_data_list, RecordStore) and field not in _FIELD_SET:
+        return any(values.get(field) for values in image_data_list.extras.values())
+    return any(item.get(field) for item in image_data_list)
+
+
+class PackedStrings:
+    """An immutable column of optional strings stored as one UTF-8 buffer plus offsets."""
+
+    __slots__ = ("data", "offsets", "state")
+
+    def __init__(self, data: bytes, offsets, state):
+        self.data = data
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.state = np.asarray(state, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.state)
+
+    def get(self, index: int):
+        """Returns (present, value) for one row."""
+        state = self.state[index]
+        if state == _VALUE:
+            return True, self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+        return state == _NONE, None
+
+    def values(self):
+        """Decodes the whole column into a list (None for absent and null rows)."""
+        bounds = self.offsets.tolist()
+        data, states = self.data, self.state.tolist()
+        return [data[bounds[i]:bounds[i + 1]].decode('utf-8') if state == _VALUE else None
+                for i, state in enumerate(states)]
+
+    def take(self, indices):
+        """Returns a new column with the rows at `indices`, gathered without decoding."""
+        lengths = np.diff(self.offsets)[indices]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        sources = np.repeat(self.offsets[:-1][indices] - offsets[:-1], lengths) + np.arange(offsets[-1])
+        data = np.frombuffer(self.data, dtype=np.uint8)[sources].tobytes() if len(sources) else b""
+        return PackedStrings(data, offsets, self.state[indices])
+
+    @classmethod
+    def concat(cls, columns: list):
+        starts = np.cumsum([0] + [len(column.data) for column in columns])
+        offsets = np.concatenate([[0]] + [column.offsets[1:] + start for column, start in zip(columns, starts)])
+        return cls(b"".join(column.data for column in columns), offsets,
+                   np.concatenate([column.state for column in columns]))
+
+    @property
+    def nbytes(self):
+        return len(self.data) + self.offsets.nbytes + self.state.nbytes
+
+
+class _StringBuilder:
+    """Accumulates a PackedStrings column one value at a time."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array.array('q', [0])
+        self.state = array.array('b')
+
+    def append(self, present: bool, value):
+        if value is not None:
+            self.data += str(value).encode('utf-8')
+        self.offsets.append(len(self.data))
+        self.state.append(_VALUE if value is not None else _NONE if present else _ABSENT)
+
+    def build(self):
+        return PackedStrings(bytes(self.data), np.frombuffer(self.offsets, dtype=np.int64),
+                             np.frombuffer(self.state, dtype=np.int8))
+
+
+class RecordView(collections.abc.Mapping):
+    """Read-only, dict-like view of one row of a RecordStore."""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index: int):
+        self._store = store
+        self._index = index
+
+    def __getitem__(self, key):
+        present, value = self._store._field(self._index, key)
+        if not present:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self._store._row_keys(self._index))
+
+    def __len__(self):
+        return len(self._store._row_keys(self._index))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class RecordStore(collections.abc.Sequence):
+    """
+    Column-oriented replacement for a list of image record dicts. Rows are
+    read as RecordView mappings; slicing, index arrays and boolean masks
+    return a new store. Stores are immutable apart from `extend`.
+    """
+
+    def __init__(self, lats, lons, model_codes, models: list, strings: dict, extras: dict = None):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.model_codes = np.asarray(model_codes, dtype=np.int32)
+        self.models = list(models)
+        self.strings = strings
+        self.extras = extras or {}
+
+    @classmethod
+    def from_records(cls, image_data_list):
+        """Builds a store from any iterable of record dicts, consuming it once."""
+        lats, lons, model_codes = array.array('d'), array.array('d'), array.array('i')
+        models = {}
+        builders = {field: _StringBuilder() for field in STRING_FIELDS}
+        extras = {}
+        for index, item in enumerate(image_data_list):
+            lats.append(item['latitude'])
+            lons.append(item['longitude'])
+            model_codes.append(models.setdefault(item['model'], len(models)) if 'model' in item else -1)
+            for field, builder in builders.items():
+                builder.append(field in item, item.get(field))
+            if not _FIELD_SET.issuperset(item):
+                extras[index] = {key: value for key, value in item.items() if key not in _FIELD_SET}
+        return cls(np.frombuffer(lats, dtype=np.float64), np.frombuffer(lons, dtype=np.float64),
+                   np.frombuffer(model_codes, dtype=np.int32), list(models),
+                   {field: builder.build() for field, builder in builders.items()}, extras)
+
+    @classmethod
+    def concat(cls, stores: list):
+        """Concatenates stores into a new one."""
+        stores = [cls.from_records([])] + list(stores)
+        models = {}
+        codes = []
+        for store in stores:
+            remap = np.array([models.setdefault(model, len(models)) for model in store.models] + [-1], dtype=np.int32)
+            codes.append(remap[store.model_codes]) # Code -1 picks the trailing -1
+        extras, start = {}, 0
+        for store in stores:
+            extras.update((start + row, values) for row, values in store.extras.items())
+            start += len(store)
+        return cls(np.concatenate([store.lats for store in stores]), np.concatenate([store.lons for store in stores]),
+                   np.concatenate(codes), list(models),
+                   {field: PackedStrings.concat([store.strings[field] for store in stores]) for field in STRING_FIELDS},
+                   extras)
+
+    def extend(self, image_data_list):
+        """Appends records (dicts or another store) in place. Cost is linear in the store size; append in batches."""
+        other = image_data_list
+        if not isinstance(other, RecordStore):
+            other = RecordStore.from_records(other)
+        merged = RecordStore.concat([self, other])
+        self.__dict__.update(merged.__dict__)
+
+    def __len__(self):
+        return len(self.lats)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("record index out of range")
+            return RecordView(self, int(index))
+        if isinstance(index, slice):
+            return self.take(np.arange(len(self))[index])
+        return self.take(index)
+
+    def __iter__(self):
+        return (RecordView(self, index) for index in range(len(self)))
+
+    def __eq__(self, other):
+        if not isinstance(other, collections.abc.Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(other) == len(self) and all(row == item for row, item in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<RecordStore of {len(self)} records>"
+
+    def _field(self, index: int, key):
+        """Returns (present, value) of one field of one row."""
+        if key == 'latitude':
+            return True, float(self.lats[index])
+        if key == 'longitude':
+            return True, float(self.lons[index])
+        if key == 'model':
+            code = self.model_codes[index]
+            return (True, self.models[code]) if code >= 0 else (False, None)
+        if key in self.strings:
+            return self.strings[key].get(index)
+        values = self.extras.get(index, {})
+        return (True, values[key]) if key in values else (False, None)
+
+    def coordinates(self):
+        """Returns the (latitudes, longitudes) arrays."""
+        return self.lats, self.lons
+
+    def column(self, field: str):
+        """Returns one field of every row as a list. Raises KeyError if a row lacks it, like the dicts would."""
+        if field in FLOAT_FIELDS:
+            return (self.lats if field == 'latitude' else self.lons).tolist()
+        if field == 'model':
+            if (self.model_codes < 0).any():
+                raise KeyError(field)
+            models = self.models
+            return [models[code] for code in self.model_codes.tolist()]
+        if field in self.strings:
+            strings = self.strings[field]
+            if (strings.state == _ABSENT).any():
+                raise KeyError(field)
+            return strings.values()
+        return [row[field] for row in self]
+
+    def _row_keys(self, index: int):
+        keys = [key for key in FIELDS if self._field(index, key)[0]]
+        return keys + list(self.extras.get(index, ()))
+
+    def take(self, indices):
+        """Returns a new store with the rows at `indices` (integer array or boolean mask), in that order."""
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            indices = np.flatnonzero(indices)
+        indices = indices.astype(np.int64, copy=False)
+        extras = {}
+        if self.extras:
+            rows = np.fromiter(self.extras, dtype=np.int64, count=len(self.extras))
+            for position in np.flatnonzero(np.isin(indices, rows)).tolist():
+                extras[position] = self.extras[int(indices[position])]
+        return RecordStore(self.lats[indices], self.lons[indices], self.model_codes[indices], self.models,
+                           {field: column.take(indices) for field, column in self.strings.items()}, extras)
+
+    def filter(self, mask):
+        """Returns the rows where the boolean `mask` is set."""
+        return self.take(np.asarray(mask, dtype=bool))
+
+    def bbox_mask(self, south: float, west: float, north: float, east: float):
+        """Boolean mask of the rows inside a bounding box (edges included); see `bbox_mask`."""
+        return _bbox_mask(self.lats, self.lons, south, west, north, east)
+
+    def center(self):
+        """Returns the mean [latitude, longitude], or None for an empty store."""
+        if not len(self):
+            return None
+        return [float(self.lats.mean()), float(self.lons.mean())]
+
+    def bounds(self):
+        """Returns (south, west, north, east), or None for an empty store."""
+        if not len(self):
+            return None
+        return float(self.lats.min()), float(self.lons.min()), float(self.lats.max()), float(self.lons.max())
+
+    def to_records(self):
+        """Returns the rows as a list of plain dicts."""
+        return [dict(row) for row in self]
+
+    @property
+    def nbytes(self):
+        """Approximate memory used by the columns (extras not included)."""
+        return (self.lats.nbytes + self.lons.nbytes + self.model_codes.nbytes
+                + sum(column.nbytes for column in self.strings.values()))
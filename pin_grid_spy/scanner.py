@@ -0,0 +1,117 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/scanner.py
+import fnmatch
+import logging
+import os
+import pathlib
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+SYMLINK_POLICIES = ("skip", "files", "follow")
+
+def _matches(patterns, name: str, rel_path: str):
+    """True if the entry name or its root-relative path matches any glob."""
+    return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(rel_path, p) for p in patterns)
+
+def scan_images(root: pathlib.Path, recursive: bool = None, include=None, exclude=None,
+                symlinks: str = None, extensions=None):
+    """
+    Walks `root` with os.scandir and yields the paths of supported images as
+    they are found, so callers can start work before the walk finishes.
+
+    - `recursive`: descend into subdirectories (default config.SCAN_RECURSIVE).
+    - `include` / `exclude`: glob patterns matched against the entry name or
+      its path relative to `root` (posix separators). Excluded directories
+      are not entered. With `include` set, only matching files are yielded.
+    - `symlinks`: "skip" ignores symlinks, "files" follows symlinked files
+      only, "follow" also enters symlinked directories (loops are detected).
+
+    Only one directory listing is held in memory at a time, plus the stack
+    of directories still to visit. Dirent type information is reused, so no
+    extra stat call is made per file.
+    """
+    root = pathlib.Path(root)
+    recursive = config.SCAN_RECURSIVE if recursive is None else recursive
+    include = config.SCAN_INCLUDE if include is None else include
+    exclude = config.SCAN_EXCLUDE if exclude is None else exclude
+    symlinks = symlinks or config.SCAN_SYMLINKS
+    extensions = config.SUPPORTED_EXTENSIONS if extensions is None else extensions
+    if symlinks not in SYMLINK_POLICIES:
+        raise ValueError(f"Unknown symlink policy '{symlinks}'. Expected one of {SYMLINK_POLICIES}.")
+
+    visited = set()  # (st_dev, st_ino) of entered directories, for loop detection
+    try:
+        root_stat = root.stat()
+        visited.add((root_stat.st_dev, root_stat.st_ino))
+    except OSError as e:
+        log.error(f"Cannot scan {root}: {e}")
+        return
+
+    stack = [(str(root), "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    rel_path = f"{rel_dir}{entry.name}"
+                    if exclude and _matches(exclude, entry.name, rel_path):
+                        continue
+                    try:
+                        is_link = entry.is_symlink()
+                        if is_link and symlinks == "skip":
+                            continue
+                        if entry.is_dir(follow_symlinks=is_link and symlinks == "follow"):
+                            if recursive:
+                                subdirs.append((entry, rel_path))
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError as e:
+                        log.debug("Skipping unreadable entry %s: %s", entry.path, e)
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in extensions:
+                        continue
+                    if include and not _matches(include, entry.name, rel_path):
+                        continue
+                    yield pathlib.Path(entry.path)
+        except OSError as e:
+            log.warning(f"Cannot read directory {dir_path}: {e}")
+            continue
+
+        # Push in reverse so subdirectories are visited in listing order
+        for entry, rel_path in reversed(subdirs):
+            if symlinks == "follow":
+                # Only needed when links may lead back into the tree: one stat per directory
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key in visited:
+                    log.debug("Skipping already visited directory (symlink loop?): %s", entry.path)
+                    continue
+                visited.add(key)
+            stack.append((entry.path, f"{rel_path}/"))
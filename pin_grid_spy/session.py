@@ -0,0 +1,345 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/session.py
+# Session files: the processed image records, the GUI file list and the
+# settings of a case, in one SQLite database. Records are stored column by
+# column (coordinates as REAL, camera models interned in their own table,
+# content hashes as 20-byte BLOBs, perceptual hashes as INTEGER), and rows
+# are numbered from 1 in insertion order, so record i is row i + 1. Each
+# appended batch also stores its coordinates as two packed float64 arrays,
+# so the map and the spatial index get all coordinates without a row scan.
+# Opening a session reads nothing but the row count: records are paged in
+# on access, and whole columns (e.g. coordinates for the map) are read with
+# one query. New records are appended in place without rewriting the file.
+import collections
+import collections.abc
+import itertools
+import json
+import logging
+import operator
+import os
+import pathlib
+import sqlite3
+
+import numpy as np
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+SESSION_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS records (
+    id                 INTEGER PRIMARY KEY,
+    original_path      TEXT NOT NULL,
+    thumbnail_rel_path TEXT NOT NULL,
+    latitude           REAL NOT NULL,
+    longitude          REAL NOT NULL,
+    datetime           TEXT,
+    model_id           INTEGER,
+    content_hash       BLOB,
+    phash              INTEGER,
+    extra              TEXT
+);
+CREATE TABLE IF NOT EXISTS coordinate_blocks (id INTEGER PRIMARY KEY, lats BLOB NOT NULL, lons BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, status TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+_RECORD_COLUMNS = ("original_path", "thumbnail_rel_path", "latitude", "longitude", "datetime", "model_id",
+                   "content_hash", "phash", "extra")
+_INSERT_RECORD = (f"INSERT INTO records ({', '.join(_RECORD_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(_RECORD_COLUMNS))})")
+_INSERT_BATCH = 1000
+_STORED_FIELDS = {"original_path", "thumbnail_rel_path", "latitude", "longitude", "datetime", "model",
+                  "content_hash", "phash"}
+_SIGN_BIT = 1 << 63 # SQLite integers are signed 64-bit
+
+def _encode_phash(phash):
+    if not phash:
+        return None
+    value = int(phash, 16)
+    return value - (1 << 64) if value >= _SIGN_BIT else value
+
+def _decode_phash(value):
+    return f"{value & ((1 << 64) - 1):016x}"
+
+def session_settings():
+    """Returns the current values of the config settings saved with a session (config.SESSION_SETTINGS)."""
+    return {name: getattr(config, name) for name in config.SESSION_SETTINGS}
+
+def apply_settings(settings: dict):
+    """Applies settings loaded from a session to `config`, ignoring names it does not save."""
+    for name, value in settings.items():
+        if name not in config.SESSION_SETTINGS:
+            log.debug(f"Ignoring unknown session setting: {name}")
+            continue
+        if isinstance(getattr(config, name), tuple):
+            value = tuple(value) # Tuples come back from JSON as lists
+        setattr(config, name, value)
+
+
+class SessionFile:
+    """
+    An open session database. Use `SessionFile.create` for a new file or
+    `open_session` for an existing one; `records` is a lazy, appendable
+    sequence of the image records.
+    """
+
+    def __init__(self, path: pathlib.Path, create: bool = False):
+        self.path = pathlib.Path(path)
+        if not create and not self.path.exists():
+            raise FileNotFoundError(f"Session file not found: {self.path}")
+        self._conn = sqlite3.connect(str(self.path))
+        try:
+            if create:
+                self._conn.executescript(_SCHEMA)
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(SESSION_VERSION),))
+            version = self._conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        except sqlite3.DatabaseError as e:
+            self._conn.close()
+            raise ValueError(f"{self.path} is not a Pin Grid Spy session file ({e}).") from e
+        if version is None or int(version[0]) != SESSION_VERSION:
+            self._conn.close()
+            raise ValueError(f"Unsupported session file version in {self.path}: {version and version[0]}")
+        self._load_models()
+        self._count = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0]
+        self.records = SessionRecords(self)
+
+    @classmethod
+    def create(cls, path: pathlib.Path):
+        """Creates a new, empty session file, replacing any file at `path`."""
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        return cls(path, create=True)
+
+    def _load_models(self):
+        self._models = {name: model_id for model_id, name in self._conn.execute("SELECT id, name FROM models")}
+        self._model_names = {model_id: name for name, model_id in self._models.items()}
+
+    def _model_id(self, name):
+        if name is None:
+            return None
+        model_id = self._models.get(name)
+        if model_id is None:
+            model_id = self._conn.execute("INSERT INTO models (name) VALUES (?)", (name,)).lastrowid
+            self._models[name] = model_id
+            self._model_names[model_id] = name
+        return model_id
+
+    def _encode(self, record):
+        extra = {key: value for key, value in record.items() if key not in _STORED_FIELDS}
+        digest = record.get('content_hash')
+        return (record['original_path'], record['thumbnail_rel_path'], record['latitude'], record['longitude'],
+                record.get('datetime'), self._model_id(record.get('model')),
+                bytes.fromhex(digest) if digest else None, _encode_phash(record.get('phash')),
+                json.dumps(extra) if extra else None)
+
+    def _decode(self, row):
+        original_path, thumbnail_rel_path, lat, lon, datetime, model_id, digest, phash, extra = row
+        record = {
+            "original_path": original_path,
+            "thumbnail_rel_path": thumbnail_rel_path,
+            "latitude": lat,
+            "longitude": lon,
+            "datetime": datetime,
+            "model": self._model_names.get(model_id),
+        }
+        if digest is not None:
+            record["content_hash"] = digest.hex()
+        if phash is not None:
+            record["phash"] = _decode_phash(phash)
+        if extra:
+            record.update(json.loads(extra))
+        return record
+
+    def append_records(self, image_data_list):
+        """Appends image records in one transaction. Returns the number appended."""
+        return self.checkpoint(image_data_list)
+
+    def checkpoint(self, image_data_list, files=()):
+        """
+        Appends image records and adds or updates (path, status) file entries
+        in one transaction, so an interrupted run never keeps one without the
+        other. Returns the number of records appended.
+        """
+        records = iter(image_data_list)
+        added = 0
+        try:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO files (path, status) VALUES (?, ?)", files)
+                while True:
+                    # Encoded in batches: encoding may insert new camera models
+                    rows = [self._encode(record) for record in itertools.islice(records, _INSERT_BATCH)]
+                    if not rows:
+                        break
+                    self._conn.executemany(_INSERT_RECORD, rows)
+                    self._conn.execute("INSERT INTO coordinate_blocks (lats, lons) VALUES (?, ?)", (
+                        np.array([row[2] for row in rows], dtype='<f8').tobytes(),
+                        np.array([row[3] for row in rows], dtype='<f8').tobytes()))
+                    added += len(rows)
+        except BaseException:
+            self._load_models() # Models inserted by the rolled back transaction are gone again
+            raise
+        self._count += added
+        return added
+
+    def _read_rows(self, first: int, last: int):
+        """Decoded records with indices first..last-1."""
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(_RECORD_COLUMNS)} FROM records WHERE id > ? AND id <= ? ORDER BY id", (first, last))
+        return [self._decode(row) for row in cursor]
+
+    def _read_coordinates(self):
+        blocks = self._conn.execute("SELECT lats, lons FROM coordinate_blocks ORDER BY id").fetchall()
+        if not blocks:
+            return np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.float64)
+        return tuple(np.concatenate([np.frombuffer(block[column], dtype='<f8') for block in blocks])
+                     for column in (0, 1))
+
+    def _read_column(self, column: str):
+        return self._conn.execute(f"SELECT {column} FROM records ORDER BY id")
+
+    def files(self):
+        """Returns the saved file list as [(path, status)], in the order it was saved."""
+        return self._conn.execute("SELECT path, status FROM files ORDER BY rowid").fetchall()
+
+    def set_files(self, entries):
+        """Replaces the saved file list with (path, status) pairs."""
+        with self._conn:
+            self._conn.execute("DELETE FROM files")
+            self._conn.executemany("INSERT OR REPLACE INTO files (path, status) VALUES (?, ?)", entries)
+
+    def settings(self):
+        """Returns the saved settings as a dict."""
+        return {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM settings")}
+
+    def set_settings(self, settings: dict):
+        """Saves settings (JSON-serializable values), replacing those with the same names."""
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                   ((key, json.dumps(value)) for key, value in settings.items()))
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SessionRecords(collections.abc.Sequence):
+    """
+    Lazy view of the records in a session file. Rows are read in pages of
+    config.SESSION_PAGE_SIZE records, the most recently used
+    config.SESSION_PAGE_CACHE pages are kept, and rows come back as dicts.
+    """
+
+    def __init__(self, session: SessionFile):
+        self._session = session
+        self._pages = collections.OrderedDict()
+
+    def __len__(self):
+        return self._session._count
+
+    def _page(self, number: int):
+        page = self._pages.get(number)
+        if page is None:
+            size = config.SESSION_PAGE_SIZE
+            page = self._session._read_rows(number * size, (number + 1) * size)
+            self._pages[number] = page
+            while len(self._pages) > config.SESSION_PAGE_CACHE:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = operator.index(index) # sqlite3 binds NumPy integers as BLOBs
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        page = self._page(index // config.SESSION_PAGE_SIZE)
+        return page[index % config.SESSION_PAGE_SIZE]
+
+    def __iter__(self):
+        # Streams the file page by page without filling the page cache
+        size = config.SESSION_PAGE_SIZE
+        for first in range(0, len(self), size):
+            yield from self._session._read_rows(first, first + size)
+
+    def extend(self, image_data_list):
+        """Appends records to the session file."""
+        self._pages.pop(len(self) // config.SESSION_PAGE_SIZE, None) # The last page may grow
+        self._session.append_records(image_data_list)
+
+    def append(self, record: dict):
+        self.extend([record])
+
+    def coordinates(self):
+        """Returns (latitudes, longitudes) as float64 arrays, read from the packed coordinate blocks."""
+        return self._session._read_coordinates()
+
+    def column(self, field: str):
+        """Returns one field of every record as a list, read with one query where the field has its own column."""
+        if field in ("original_path", "thumbnail_rel_path", "datetime"):
+            return [value for (value,) in self._session._read_column(field)]
+        if field == "model":
+            names = self._session._model_names
+            return [names.get(value) for (value,) in self._session._read_column("model_id")]
+        return [record[field] for record in self]
+
+
+def open_session(path: pathlib.Path):
+    """Opens an existing session file. Raises ValueError if it is not a compatible session."""
+    session = SessionFile(path)
+    log.info(f"Opened session {session.path} with {len(session.records)} records.")
+    return session
+
+def save_session(path: pathlib.Path, image_data_list, files=(), settings: dict = None):
+    """
+    Writes a new session file with the given records, (path, status) file
+    list and settings (default: the current `session_settings()`). The file
+    is written next to `path` and moved into place once complete. Returns
+    the number of records written.
+    """
+    path = pathlib.Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with SessionFile.create(tmp_path) as session:
+            count = session.append_records(image_data_list)
+            session.set_files(files)
+            session.set_settings(session_settings() if settings is None else settings)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    log.info(f"Saved session with {count} records to {path}")
+    return count
@@ -0,0 +1,155 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/spatial_index.py
+# Spatial index over image records for bounding box, radius and nearest
+# neighbour queries. Points are bucketed into a fixed grid of
+# config.SPATIAL_INDEX_CELL_DEG degree cells and sorted by cell, row by
+# row, so the cells of one grid row inside a query box form a single
+# contiguous slice of the sorted points, found with a binary search. A query
+# only looks at the points in the rows and columns it overlaps, then filters
+# those exactly with NumPy.
+import logging
+import math
+
+import numpy as np
+
+from . import config, record_store
+
+log = logging.getLogger(__name__)
+
+EARTH_RADIUS_M = 6371000.0
+_METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+_MAX_RADIUS_M = math.pi * EARTH_RADIUS_M # Half the circumference reaches every point
+
+def haversine_m(lat: float, lon: float, lats, lons):
+    """Great-circle distance in meters from one point to arrays of points."""
+    lat1, lat2 = math.radians(lat), np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(lons) - lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SpatialIndex:
+    """
+    Grid index over WGS84 points. Query results are arrays of indices into
+    the coordinate arrays (or record list) the index was built from.
+    """
+
+    def __init__(self, lats, lons, cell_deg: float = None):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        if self.lats.shape != self.lons.shape:
+            raise ValueError("Latitude and longitude arrays must have the same length.")
+        self.cell_deg = cell_deg or config.SPATIAL_INDEX_CELL_DEG
+        self.columns = math.ceil(360 / self.cell_deg)
+        self.rows = math.ceil(180 / self.cell_deg)
+        keys = self._cell_keys(self.lats, self.lons)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    @classmethod
+    def from_records(cls, image_data_list: list, cell_deg: float = None):
+        """Builds the index over the 'latitude'/'longitude' of image records."""
+        return cls(*record_store.coordinates(image_data_list), cell_deg)
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _row(self, lats):
+        return np.clip(((np.asarray(lats) + 90.0) // self.cell_deg).astype(np.int64), 0, self.rows - 1)
+
+    def _column(self, lons):
+        return np.clip(((np.asarray(lons) + 180.0) // self.cell_deg).astype(np.int64), 0, self.columns - 1)
+
+    def _cell_keys(self, lats, lons):
+        return self._row(lats) * self.columns + self._column(lons)
+
+    def _candidates(self, south: float, west: float, north: float, east: float):
+        """Indices of the points in the grid cells overlapping a box that does not cross the antimeridian."""
+        rows = np.arange(self._row(south), self._row(north) + 1, dtype=np.int64)
+        starts = np.searchsorted(self.keys, rows * self.columns + self._column(west), side='left')
+        ends = np.searchsorted(self.keys, rows * self.columns + self._column(east), side='right')
+        spans = [(start, end) for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        if not spans:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([self.order[start:end] for start, end in spans])
+
+    def bbox(self, south: float, west: float, north: float, east: float):
+        """
+        Returns the sorted indices of the points inside a bounding box (edges
+        included). A box with `west` > `east` crosses the antimeridian.
+        """
+        if west > east:
+            return np.union1d(self.bbox(south, west, north, 180.0), self.bbox(south, -180.0, north, east))
+        candidates = self._candidates(south, west, north, east)
+        lats, lons = self.lats[candidates], self.lons[candidates]
+        inside = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        return np.sort(candidates[inside])
+
+    def radius(self, lat: float, lon: float, meters: float):
+        """Returns the sorted indices of the points within `meters` (great-circle) of (lat, lon)."""
+        if meters >= _MAX_RADIUS_M:
+            return np.arange(len(self), dtype=np.int64)
+        dlat = meters / _METERS_PER_DEGREE
+        south, north = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        if south == -90.0 or north == 90.0 or math.cos(math.radians(max(abs(south), abs(north)))) * 180 <= dlat:
+            candidates = self.bbox(south, -180.0, north, 180.0) # The circle reaches a pole: every longitude
+        else:
+            dlon = dlat / math.cos(math.radians(max(abs(south), abs(north))))
+            west, east = (lon - dlon + 180.0) % 360.0 - 180.0, (lon + dlon + 180.0) % 360.0 - 180.0
+            candidates = self.bbox(south, west, north, east)
+        distances = haversine_m(lat, lon, self.lats[candidates], self.lons[candidates])
+        return candidates[distances <= meters]
+
+    def nearest(self, lat: float, lon: float, k: int = 1):
+        """
+        Returns (indices, distances in meters) of the `k` points nearest to
+        (lat, lon), closest first. The search radius starts at one grid cell
+        and doubles until it holds `k` points; every point within that
+        radius is considered, so the result is exact.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        meters = self.cell_deg * _METERS_PER_DEGREE
+        while True:
+            candidates = self.radius(lat, lon, meters)
+            if len(candidates) >= k or meters >= _MAX_RADIUS_M:
+                break
+            meters *= 2
+        distances = haversine_m(lat, lon, self.lats[candidates], self.lons[candidates])
+        best = np.lexsort((candidates, distances))[:k] # Ties by index, for stable results
+        return candidates[best], distances[best]
+
+
+def build_index(image_data_list: list, cell_deg: float = None):
+    """Builds a SpatialIndex over image records and logs its size."""
+    index = SpatialIndex.from_records(image_data_list, cell_deg)
+    log.debug(f"Built spatial index over {len(index)} points ({index.cell_deg} degree cells).")
+    return index
+
+def select(image_data_list: list, indices):
+    """Returns the records at `indices` (a query result), as a RecordStore for a store and a list otherwise."""
+    if isinstance(image_data_list, record_store.RecordStore):
+        return image_data_list.take(indices)
+    return [image_data_list[i] for i in np.asarray(indices).tolist()]
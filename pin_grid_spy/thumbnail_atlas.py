@@ -0,0 +1,111 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/thumbnail_atlas.py
+# Packs the thumbnails shown in map popups into a few sprite sheets, so a
+# case ships a handful of image files instead of one per photo. Each
+# thumbnail gets a fixed cell of config.THUMBNAIL_SIZE on a grid of
+# config.MAP_ATLAS_GRID cells per sheet; the popup shows its cell as a CSS
+# background. Sprite sheets load through plain <img>/CSS requests, which,
+# unlike fetch() of a binary blob, also work for map files opened from disk.
+import logging
+import pathlib
+
+from PIL import Image
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+ATLAS_FORMATS = {"webp": ".webp", "avif": ".avif", "jpeg": ".jpg"}
+
+def _clear_sheets(atlas_dir: pathlib.Path):
+    """Deletes sprite sheets from a previous build."""
+    for suffix in ATLAS_FORMATS.values():
+        for sheet in atlas_dir.glob(f"atlas_*{suffix}"):
+            sheet.unlink()
+
+def pack_atlas(thumbnail_rel_paths, base_dir: pathlib.Path, atlas_dir_name: str = None, fmt: str = None):
+    """
+    Packs the distinct thumbnails (paths relative to `base_dir`, the map
+    directory) into sprite sheets under `base_dir`/`atlas_dir_name`
+    (default config.MAP_ATLAS_DIRNAME), replacing earlier sheets. Returns
+    (atlas, stats): `atlas` holds the sheet URLs and sizes and a
+    [sheet, x, y, width, height] cell per packed thumbnail path, `stats`
+    the file counts and bytes before and after packing. Thumbnails that
+    cannot be read are left out and keep their own file.
+    """
+    atlas_dir_name = atlas_dir_name or config.MAP_ATLAS_DIRNAME
+    fmt = fmt or config.MAP_ATLAS_FORMAT
+    if fmt not in ATLAS_FORMATS:
+        raise ValueError(f"Unknown atlas format '{fmt}'. Expected one of {tuple(ATLAS_FORMATS)}.")
+    atlas_dir = base_dir / atlas_dir_name
+    atlas_dir.mkdir(parents=True, exist_ok=True)
+    _clear_sheets(atlas_dir)
+
+    columns, rows = config.MAP_ATLAS_GRID
+    cell_w, cell_h = config.THUMBNAIL_SIZE
+    per_sheet = columns * rows
+    sheet_mode = "RGB" if fmt == "jpeg" else "RGBA"
+    background = (255, 255, 255) if fmt == "jpeg" else (0, 0, 0, 0)
+
+    atlas = {"sheets": [], "sizes": [], "positions": {}}
+    stats = {"thumbnails": 0, "thumbnail_bytes": 0, "sheets": 0, "sheet_bytes": 0}
+    sheet, used_rows = None, 0
+
+    def flush():
+        # Crop the last, partly filled sheet to the rows in use
+        image = sheet if used_rows == rows else sheet.crop((0, 0, sheet.width, used_rows * cell_h))
+        path = atlas_dir / f"atlas_{len(atlas['sheets']):03d}{ATLAS_FORMATS[fmt]}"
+        image.save(path, quality=config.THUMBNAIL_QUALITY)
+        atlas["sheets"].append(f"{atlas_dir_name}/{path.name}")
+        atlas["sizes"].append([image.width, image.height])
+        stats["sheets"] += 1
+        stats["sheet_bytes"] += path.stat().st_size
+
+    for rel_path in dict.fromkeys(thumbnail_rel_paths): # Distinct, in first-seen order
+        thumb_path = base_dir / rel_path
+        try:
+            with Image.open(thumb_path) as thumb:
+                thumb.thumbnail((cell_w, cell_h)) # Only shrinks thumbnails made with a larger THUMBNAIL_SIZE
+                thumb = thumb.convert(sheet_mode)
+                size = thumb_path.stat().st_size
+        except (OSError, ValueError) as e:
+            log.warning(f"Leaving thumbnail out of the atlas: {thumb_path} ({e})")
+            continue
+
+        slot = stats["thumbnails"] % per_sheet
+        if slot == 0:
+            if sheet is not None:
+                flush()
+            sheet = Image.new(sheet_mode, (columns * cell_w, rows * cell_h), background)
+        x, y = (slot % columns) * cell_w, (slot // columns) * cell_h
+        sheet.paste(thumb, (x, y))
+        used_rows = slot // columns + 1
+        atlas["positions"][rel_path] = [len(atlas["sheets"]), x, y, thumb.width, thumb.height]
+        stats["thumbnails"] += 1
+        stats["thumbnail_bytes"] += size
+    if sheet is not None:
+        flush()
+
+    log.info(f"Packed {stats['thumbnails']} thumbnails ({stats['thumbnail_bytes'] / 1024:.1f} KiB) into "
+             f"{stats['sheets']} sprite sheets ({stats['sheet_bytes'] / 1024:.1f} KiB) in {atlas_dir}")
+    return atlas, stats
@@ -0,0 +1,138 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/thumbnail_store.py
+# Content-addressed thumbnail layout. A thumbnail is named after the BLAKE2b
+# digest of its source file and sharded by the digest's leading hex pairs:
+#   <thumb_dir>/ab/cd/abcd...ef.jpg
+# Files with identical contents (copies in different folders, re-exports of
+# the same dump) share one thumbnail that is generated once, and different
+# files that happen to share a name (IMG_0001.jpg) can never collide.
+# The manifest next to the shards lists, one JSON object per line, which
+# source path was rendered to which thumbnail in the last complete scan.
+import functools
+import json
+import logging
+import os
+import pathlib
+
+from PIL import features
+
+from . import config
+
+log = logging.getLogger(__name__)
+
+SHARD_LEVELS = 2 # Two levels of 256 directories keep each directory small
+_SUFFIX_ALIASES = {".jpeg": ".jpg"}
+THUMBNAIL_FORMATS = {"source": None, "webp": ".webp", "avif": ".avif"}
+
+def resolve_format(fmt: str = None):
+    """
+    Validates a thumbnail format (default config.THUMBNAIL_FORMAT). "avif"
+    needs a Pillow build with AVIF support and falls back to "webp" without it.
+    """
+    fmt = fmt or config.THUMBNAIL_FORMAT
+    if fmt not in THUMBNAIL_FORMATS:
+        raise ValueError(f"Unknown thumbnail format '{fmt}'. Expected one of {tuple(THUMBNAIL_FORMATS)}.")
+    return "webp" if fmt == "avif" and not _avif_supported() else fmt
+
+@functools.lru_cache(maxsize=None)
+def _avif_supported():
+    """Checks (once per process) whether Pillow can write AVIF."""
+    supported = bool(features.check("avif"))
+    if not supported:
+        log.warning("This Pillow build cannot write AVIF; writing WebP instead.")
+    return supported
+
+def thumbnail_suffix(source_suffix: str, fmt: str = None):
+    """Returns the thumbnail file suffix for a source file suffix and thumbnail format."""
+    suffix = THUMBNAIL_FORMATS[resolve_format(fmt)] or source_suffix.lower()
+    return _SUFFIX_ALIASES.get(suffix, suffix)
+
+def thumbnail_path(thumb_dir: pathlib.Path, digest: str, suffix: str):
+    """Returns the store path of the thumbnail for a source with content hash `digest`."""
+    shards = [digest[2 * level:2 * level + 2] for level in range(SHARD_LEVELS)]
+    return pathlib.Path(thumb_dir, *shards, f"{digest}{suffix}")
+
+def thumbnail_rel_path(thumb_dir: pathlib.Path, thumb_path: pathlib.Path):
+    """Returns the record form of a thumbnail path: relative to the output directory, forward slashes."""
+    return str(pathlib.Path(thumb_path).relative_to(pathlib.Path(thumb_dir).parent)).replace("\\", "/")
+
+def manifest_path(thumb_dir: pathlib.Path):
+    """Returns the location of the manifest for `thumb_dir`."""
+    return pathlib.Path(thumb_dir) / config.THUMBNAIL_MANIFEST_FILENAME
+
+def read_manifest(thumb_dir: pathlib.Path):
+    """Returns {source path: manifest entry} from the last complete scan, or {} if there is none."""
+    path = manifest_path(thumb_dir)
+    if not path.exists():
+        return {}
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entries[entry["path"]] = entry
+    return entries
+
+
+class ManifestWriter:
+    """
+    Streams manifest entries to a temporary file that replaces the previous
+    manifest on `commit`, so an interrupted scan never leaves a partial
+    manifest behind. Used as a context manager, it commits on a clean exit
+    and discards the temporary file otherwise.
+    """
+
+    def __init__(self, thumb_dir: pathlib.Path):
+        self.path = manifest_path(thumb_dir)
+        self._tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        self._file = open(self._tmp_path, 'w', encoding='utf-8')
+        self.count = 0
+
+    def add(self, record: dict):
+        """Adds the entry for one processed image record."""
+        self._file.write(json.dumps({
+            "path": record["original_path"],
+            "content_hash": record["content_hash"],
+            "thumbnail": record["thumbnail_rel_path"],
+        }) + "\n")
+        self.count += 1
+
+    def commit(self):
+        """Closes the temporary file and atomically replaces the manifest with it."""
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        log.info(f"Wrote thumbnail manifest with {self.count} entries: {self.path}")
+
+    def discard(self):
+        """Drops the entries written so far and keeps the previous manifest."""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
@@ -0,0 +1,206 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# pin_grid_spy/tile_pyramid.py
+# Offline tile pyramid for cases too large for one self-contained map.
+#
+# Layout under the tiles directory:
+#   <z>/<x>/<y>.png   density raster (transparent where there are no points)
+#   <z>/<x>/<y>.js    vector tile: PinGridSpy.loadTile("z/x/y", {...});
+#                     clusters below MAP_TILES_MAX_ZOOM, the individual points
+#                     (an encode_points payload) at MAP_TILES_MAX_ZOOM
+#   pyramid.json      settings and counts of the last export
+# The export is built in a hidden sibling directory and moved into place.
+# Only tiles that contain points are written. The vector tiles are scripts
+# rather than JSON because browsers block fetch() on file:// pages.
+import concurrent.futures
+import json
+import logging
+import os
+import pathlib
+import shutil
+import time
+
+import numpy as np
+from PIL import Image
+
+from . import config, clustering, record_store
+
+log = logging.getLogger(__name__)
+
+PYRAMID_VERSION = 1
+MANIFEST_NAME = "pyramid.json"
+
+# Density colour ramp, from sparse (light yellow) to dense (dark red)
+_SPARSE_RGB = np.array([255, 237, 160], dtype=np.float64)
+_DENSE_RGB = np.array([189, 0, 38], dtype=np.float64)
+
+def _density_palette(saturation: int):
+    """RGBA colour for every neighbourhood count 0..`saturation` (log scale, count 0 transparent)."""
+    intensity = np.log1p(np.arange(saturation + 1)) / np.log1p(saturation)
+    palette = np.zeros((saturation + 1, 4), dtype=np.uint8)
+    palette[:, :3] = (_SPARSE_RGB + (_DENSE_RGB - _SPARSE_RGB) * intensity[:, None]).astype(np.uint8)
+    palette[1:, 3] = (90 + 165 * intensity[1:]).astype(np.uint8)
+    return palette
+
+def render_density_tile(pixel_x, pixel_y, saturation: int = None):
+    """
+    Renders one 256x256 density tile from the in-tile pixel coordinates of
+    its points. Each pixel is coloured by the number of points in its 3x3
+    neighbourhood on a log scale that saturates at `saturation` points
+    (default config.MAP_TILES_DENSITY_SATURATION, at most 255), the same for
+    every tile and zoom so that neighbouring tiles match. The result is a
+    palette image with per-entry alpha, which encodes much faster and
+    smaller than RGBA.
+    """
+    saturation = min(saturation or config.MAP_TILES_DENSITY_SATURATION, 255)
+    size = clustering.TILE_SIZE
+    counts = np.bincount(pixel_y * size + pixel_x, minlength=size * size).reshape(size, size)
+    padded = np.pad(np.minimum(counts, saturation).astype(np.int32), 1)
+    spread = sum(padded[dy:dy + size, dx:dx + size] for dy in range(3) for dx in range(3))
+    image = Image.fromarray(np.minimum(spread, saturation).astype(np.uint8), "P")
+    image.putpalette(_density_palette(saturation).tobytes(), rawmode="RGBA")
+    return image
+
+def _write_vector_tile(path: pathlib.Path, key: str, payload: dict):
+    """Writes one vector tile script."""
+    script = "PinGridSpy.loadTile(%s, %s);\n" % (
+        json.dumps(key), json.dumps(payload, separators=(',', ':')).replace("</", "<\\/"))
+    path.write_text(script, encoding='utf-8')
+
+def _tile_path(tiles_dir: pathlib.Path, zoom: int, key: str, suffix: str):
+    """Returns <tiles_dir>/<z>/<x>/<y><suffix>, creating the column directory."""
+    tile_x, tile_y = key.split(",")
+    column = tiles_dir / str(zoom) / tile_x
+    column.mkdir(parents=True, exist_ok=True)
+    return column / f"{tile_y}{suffix}", f"{zoom}/{tile_x}/{tile_y}"
+
+def _project_to_tiles(lats, lons, zoom: int):
+    """Returns the pixel coordinates of the points at `zoom` and their `clustering.tile_index` (order, tiles)."""
+    x, y = clustering.project(lats, lons, zoom)
+    limit = clustering.TILE_SIZE * (2 ** zoom) - 1
+    x = np.clip(np.floor(x), 0, limit).astype(np.int64)
+    y = np.clip(np.floor(y), 0, limit).astype(np.int64)
+    return x, y, clustering.tile_index(x // clustering.TILE_SIZE, y // clustering.TILE_SIZE)
+
+def encode_point_tiles(image_data_list, zoom: int, atlas: dict = None):
+    """Returns {tile key: encode_points payload of the points in that tile} at `zoom`."""
+    from .map_generator import encode_points # Imported here: map_generator imports this module
+    lats, lons = record_store.coordinates(image_data_list)
+    _, _, (order, tiles) = _project_to_tiles(lats, lons, zoom)
+    return {key: encode_points([image_data_list[i] for i in order[first:last].tolist()], atlas)
+            for key, (first, last) in tiles.items()}
+
+def export_zoom(tiles_dir: pathlib.Path, zoom: int, lats, lons, point_tiles: dict = None, cell_px: int = None):
+    """
+    Writes the density and vector tiles of one zoom level. The vector
+    tiles carry clusters, or for the deepest level the per-tile point
+    payloads of `point_tiles` (from `encode_point_tiles`), so that workers
+    only receive the coordinate arrays and the payloads they write.
+    Returns (zoom, tiles written, elapsed seconds).
+    """
+    start = time.perf_counter()
+    cell_px = cell_px or config.MAP_CLUSTER_CELL_PX
+    x, y, (order, tiles) = _project_to_tiles(lats, lons, zoom)
+
+    for key, (first, last) in tiles.items():
+        members = order[first:last]
+        png_path, _ = _tile_path(tiles_dir, zoom, key, ".png")
+        render_density_tile(x[members] % clustering.TILE_SIZE,
+                            y[members] % clustering.TILE_SIZE).save(png_path, compress_level=1)
+        if point_tiles is not None:
+            js_path, tile_key = _tile_path(tiles_dir, zoom, key, ".js")
+            _write_vector_tile(js_path, tile_key, {"points": point_tiles[key]})
+
+    if point_tiles is None:
+        level = clustering.cluster_level(lats, lons, zoom, cell_px)
+        for key, (first, last) in level["tiles"].items():
+            js_path, tile_key = _tile_path(tiles_dir, zoom, key, ".js")
+            _write_vector_tile(js_path, tile_key, {
+                "lat": level["lat"][first:last],
+                "lon": level["lon"][first:last],
+                "count": level["count"][first:last],
+            })
+    return zoom, len(tiles), time.perf_counter() - start
+
+def _check_tiles_dir(tiles_dir: pathlib.Path):
+    """Refuses a non-empty directory that does not hold a previous export."""
+    if tiles_dir.exists() and not (tiles_dir / MANIFEST_NAME).exists() and any(tiles_dir.iterdir()):
+        raise FileExistsError(f"{tiles_dir} exists and does not contain a tile pyramid; refusing to overwrite it.")
+
+def export_tile_pyramid(image_data_list: list, tiles_dir: pathlib.Path, max_zoom: int = None, workers: int = None,
+                        atlas: dict = None):
+    """
+    Exports the tile pyramid for zoom levels 0..`max_zoom` (default
+    config.MAP_TILES_MAX_ZOOM) into `tiles_dir`, replacing any previous
+    export. The pyramid is built in a sibling directory and moved into
+    place once complete, so a failed export leaves the previous one (or
+    nothing) behind. Zoom levels are rendered in parallel across `workers`
+    processes (default config.MAP_TILES_WORKERS); `workers=1` renders
+    in-process. Point popups use the sprite sheets of `atlas` when given.
+    Returns the manifest written to pyramid.json.
+    """
+    max_zoom = config.MAP_TILES_MAX_ZOOM if max_zoom is None else max_zoom
+    workers = workers or config.MAP_TILES_WORKERS or os.cpu_count() or 1
+    start = time.perf_counter()
+    tiles_dir = pathlib.Path(tiles_dir)
+    _check_tiles_dir(tiles_dir)
+    build_dir = tiles_dir.with_name(f".{tiles_dir.name}.tmp")
+    if build_dir.exists():
+        shutil.rmtree(build_dir) # Left behind by an interrupted export
+    build_dir.mkdir(parents=True)
+
+    try:
+        lats, lons = record_store.coordinates(image_data_list)
+        tile_counts = {}
+        if workers == 1:
+            outcomes = [export_zoom(build_dir, max_zoom, lats, lons,
+                                    encode_point_tiles(image_data_list, max_zoom, atlas))]
+            outcomes += (export_zoom(build_dir, zoom, lats, lons) for zoom in range(max_zoom - 1, -1, -1))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, max_zoom + 1)) as executor:
+                # The cluster levels start first; the point payloads of the deepest
+                # level are encoded here in the meantime
+                futures = [executor.submit(export_zoom, build_dir, zoom, lats, lons)
+                           for zoom in range(max_zoom - 1, -1, -1)]
+                point_tiles = encode_point_tiles(image_data_list, max_zoom, atlas)
+                futures.append(executor.submit(export_zoom, build_dir, max_zoom, lats, lons, point_tiles))
+                outcomes = [future.result() for future in concurrent.futures.as_completed(futures)]
+        for zoom, count, elapsed in outcomes:
+            tile_counts[zoom] = count
+            log.debug(f"Zoom {zoom}: {count} tiles in {elapsed:.2f}s")
+
+        manifest = {
+            "version": PYRAMID_VERSION,
+            "maxZoom": max_zoom,
+            "count": len(image_data_list),
+            "tiles": {str(zoom): tile_counts[zoom] for zoom in sorted(tile_counts)},
+        }
+        (build_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=1), encoding='utf-8')
+        if tiles_dir.exists():
+            shutil.rmtree(tiles_dir)
+        os.replace(build_dir, tiles_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    log.info(f"Exported tile pyramid for {len(image_data_list)} points (zoom 0-{max_zoom}, "
+             f"{sum(tile_counts.values())} tiles) to {tiles_dir} in {time.perf_counter() - start:.2f}s.")
+    return manifest
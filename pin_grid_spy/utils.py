@@ -20,9 +20,17 @@ INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <--------------
 
 # pin_grid_spy/utils.py
 import logging
+import math
+
+import numpy as np
+
+from . import config
 
 log = logging.getLogger(__name__)
 
+GPS_REFS = {"latitude": ("N", "S"), "longitude": ("E", "W")} # Valid hemisphere refs; the second is negative
+GPS_LIMITS = {"latitude": 90.0, "longitude": 180.0}
+
 def _dms_to_dd(degrees, minutes, seconds, direction):
     """Converts Degrees Minutes Seconds (DMS) to Decimal Degrees (DD)."""
     dd = float(degrees) + float(minutes)/60 + float(seconds)/(60*60)
@@ -30,8 +38,35 @@ def _dms_to_dd(degrees, minutes, seconds, direction):
         dd *= -1
     return dd
 
+def _dms_in_range(values):
+    """
+    Whether a DMS triple has three non-negative components and minutes and
+    seconds below 60. Missing components (the header reader's zero
+    denominators) make the triple invalid.
+    """
+    if len(values) != 3 or any(value is None for value in values):
+        return False
+    degrees, minutes, seconds = (float(value) for value in values)
+    return degrees >= 0 and 0 <= minutes < 60 and 0 <= seconds < 60
+
+def _coordinate_problem(lat: float, lon: float):
+    """Returns why a decimal coordinate pair is unusable ("invalid", "out_of_range", "null_island"), or None."""
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return "invalid"
+    if abs(lat) > GPS_LIMITS["latitude"] or abs(lon) > GPS_LIMITS["longitude"]:
+        return "out_of_range"
+    tolerance = config.GPS_NULL_ISLAND_TOLERANCE_DEG
+    if config.GPS_REJECT_NULL_ISLAND and abs(lat) <= tolerance and abs(lon) <= tolerance:
+        return "null_island"
+    return None
+
 def get_decimal_coords(tags):
-    """Extracts and converts GPS coordinates from EXIF tags to decimal degrees."""
+    """
+    Extracts and converts GPS coordinates from EXIF tags to decimal degrees.
+    Returns (None, None) when tags are missing, or when the DMS components
+    or the result are out of range or a (0, 0) placeholder (the same rules
+    as `decimal_coords_bulk`).
+    """
     lat = None
     lon = None
 
@@ -42,6 +77,9 @@ def get_decimal_coords(tags):
         gps_longitude_ref = tags.get('GPS GPSLongitudeRef')
 
         if gps_latitude and gps_latitude_ref and gps_longitude and gps_longitude_ref:
+            if not (_dms_in_range(gps_latitude.values) and _dms_in_range(gps_longitude.values)):
+                log.debug("Rejected coords with missing or out-of-range DMS components.")
+                return None, None
             lat = _dms_to_dd(
                 gps_latitude.values[0],
                 gps_latitude.values[1],
@@ -54,15 +92,144 @@ def get_decimal_coords(tags):
                 gps_longitude.values[2],
                 gps_longitude_ref.values
             )
-            log.debug(f"Converted coords: Lat {lat}, Lon {lon}")
+            problem = _coordinate_problem(lat, lon)
+            if problem:
+                log.debug("Rejected coords (%s): Lat %s, Lon %s", problem, lat, lon)
+                return None, None
+            log.debug("Converted coords: Lat %s, Lon %s", lat, lon)
         else:
              log.debug("Missing required GPS tags for coordinate conversion.")
 
     except Exception as e:
         log.error(f"Error converting GPS coordinates: {e}", exc_info=True)
+        return None, None
 
     return lat, lon
 
+# --- Bulk conversion ---
+
+def _rational(value):
+    """Splits a DMS component into (numerator, denominator); missing components give NaN."""
+    if value is None:
+        return math.nan, 1
+    if isinstance(value, tuple):
+        return value
+    numerator = getattr(value, "numerator", None) # exifread Ratio, Fraction and int
+    if numerator is not None:
+        return numerator, value.denominator
+    return value, 1
+
+def _ref(value):
+    """Normalizes a hemisphere ref (str, bytes or a tag with `.values`) to an upper-case letter."""
+    value = getattr(value, "values", value)
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "replace")
+    return value.strip().rstrip("\x00").upper() if isinstance(value, str) else None
+
+def _parse_dms(dms_values):
+    """Slow path of `dms_to_decimal_bulk` for (num, den) pairs, zero denominators and malformed triples."""
+    parts = np.full((len(dms_values), 3, 2), np.nan)
+    malformed = np.zeros(len(dms_values), dtype=bool)
+    for index, triple in enumerate(dms_values):
+        try:
+            if triple is None or len(triple) != 3:
+                raise ValueError
+            parts[index] = [_rational(component) for component in triple]
+        except (TypeError, ValueError):
+            malformed[index] = True
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return parts[..., 0] / parts[..., 1], malformed # Zero denominators give inf/NaN, i.e. invalid
+
+def dms_to_decimal_bulk(dms_values, refs, axis: str = "latitude"):
+    """
+    Converts the DMS coordinates of one axis in one NumPy pass.
+    `dms_values` holds a (degrees, minutes, seconds) triple per coordinate,
+    each component a rational (exifread Ratio, Fraction, (num, den) pair)
+    or a number; a triple or component may be None. `refs` holds "N"/"S"
+    for latitudes or "E"/"W" for longitudes.
+
+    Returns (decimal, invalid, out_of_range): float64 degrees (NaN where
+    invalid) and two boolean masks. Invalid means missing, non-numeric, a
+    zero denominator or an unknown ref; out of range means negative
+    components, minutes or seconds of 60 or more, or degrees beyond the
+    axis limit.
+    """
+    if axis not in GPS_REFS:
+        raise ValueError(f"Unknown axis '{axis}'. Expected one of {tuple(GPS_REFS)}.")
+    count = len(dms_values)
+    if len(refs) != count:
+        raise ValueError(f"Got {count} DMS values but {len(refs)} refs.")
+    try:
+        # Fast path: plain numbers (the fast EXIF reader) and Fractions convert directly
+        components = np.array(dms_values, dtype=np.float64) if count else np.empty((0, 3))
+        if components.shape != (count, 3):
+            raise ValueError
+        malformed = np.zeros(count, dtype=bool)
+    except (TypeError, ValueError, ZeroDivisionError):
+        components, malformed = _parse_dms(dms_values)
+    positive, negative = GPS_REFS[axis]
+    ref_letters = np.empty(count, dtype=object)
+    ref_letters[:] = refs
+    known = (ref_letters == positive) | (ref_letters == negative)
+    if not known.all(): # Normalize only the refs that are not plain "N"/"S" or "E"/"W" already
+        ref_letters[~known] = [_ref(ref) for ref in ref_letters[~known]]
+        known = (ref_letters == positive) | (ref_letters == negative)
+    sign = np.where(ref_letters == negative, -1.0, 1.0)
+    invalid = malformed | ~np.isfinite(components).all(axis=1) | ~known
+
+    with np.errstate(invalid="ignore"):
+        decimal = sign * (components[:, 0] + components[:, 1] / 60 + components[:, 2] / 3600)
+        out_of_range = ((components < 0).any(axis=1) | (components[:, 1:] >= 60).any(axis=1)
+                        | (np.abs(decimal) > GPS_LIMITS[axis]))
+    decimal[invalid] = np.nan
+    return decimal, invalid, out_of_range & ~invalid
+
+def coordinate_masks(lats, lons):
+    """
+    Validates decimal coordinates in bulk. Returns {"valid", "invalid",
+    "out_of_range", "null_island"} boolean masks: invalid is NaN or
+    infinite, out of range is beyond +/-90 latitude or +/-180 longitude,
+    null island is within config.GPS_NULL_ISLAND_TOLERANCE_DEG of (0, 0)
+    (only flagged while config.GPS_REJECT_NULL_ISLAND is set).
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    invalid = ~(np.isfinite(lats) & np.isfinite(lons))
+    with np.errstate(invalid="ignore"):
+        out_of_range = ((np.abs(lats) > GPS_LIMITS["latitude"]) | (np.abs(lons) > GPS_LIMITS["longitude"]))
+        tolerance = config.GPS_NULL_ISLAND_TOLERANCE_DEG
+        null_island = (np.abs(lats) <= tolerance) & (np.abs(lons) <= tolerance)
+    if not config.GPS_REJECT_NULL_ISLAND:
+        null_island[:] = False
+    return {"valid": ~(invalid | out_of_range | null_island), "invalid": invalid, "out_of_range": out_of_range,
+            "null_island": null_island}
+
+def decimal_coords_bulk(latitudes, latitude_refs, longitudes, longitude_refs):
+    """
+    Converts many raw GPS fixes at once (see `dms_to_decimal_bulk` for the
+    accepted values). Returns {"latitude", "longitude"} float64 arrays and
+    {"valid", "invalid", "out_of_range", "null_island"} boolean masks over
+    the fixes; only rows in "valid" should reach the map.
+    """
+    lats, lat_invalid, lat_range = dms_to_decimal_bulk(latitudes, latitude_refs, "latitude")
+    lons, lon_invalid, lon_range = dms_to_decimal_bulk(longitudes, longitude_refs, "longitude")
+    invalid = lat_invalid | lon_invalid
+    out_of_range = (lat_range | lon_range) & ~invalid
+    masks = coordinate_masks(lats, lons)
+    null_island = masks["null_island"] & ~out_of_range
+    return {"latitude": lats, "longitude": lons, "valid": ~(invalid | out_of_range | null_island),
+            "invalid": invalid, "out_of_range": out_of_range, "null_island": null_island}
+
+def get_decimal_coords_bulk(tag_dicts):
+    """`get_decimal_coords` for many EXIF tag dicts: see `decimal_coords_bulk` for the result."""
+    columns = ([], [], [], [])
+    names = ('GPS GPSLatitude', 'GPS GPSLatitudeRef', 'GPS GPSLongitude', 'GPS GPSLongitudeRef')
+    for tags in tag_dicts:
+        for values, name in zip(columns, names):
+            tag = tags.get(name) if tags else None
+            values.append(getattr(tag, "values", None))
+    return decimal_coords_bulk(*columns)
+
 def format_datetime(tags):
     """Safely extracts and formats DateTimeOriginal."""
     try:
@@ -0,0 +1,83 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/helpers.py
+# Record and image factories shared by several test modules.
+import io
+import struct
+
+from PIL import Image
+
+def make_records(count, prefix="/case/IMG_"):
+    """Builds synthetic image records spread around New York."""
+    return [
+        {
+            "original_path": f"{prefix}{i:05d}.jpg",
+            "thumbnail_rel_path": f"thumbnails/IMG_{i:05d}_thumb.jpg",
+            "latitude": 40.7 + (i % 100) * 0.001,
+            "longitude": -74.0 + (i // 100) * 0.001,
+            "datetime": "2023:10:27 11:10:00",
+            "model": "TestCamera S9",
+        }
+        for i in range(count)
+    ]
+
+def build_exif(embedded_thumbnail: bytes = None):
+    """
+    Builds a minimal little-endian EXIF (APP1) payload. When
+    `embedded_thumbnail` (JPEG bytes) is given it is stored in IFD1, the
+    way cameras store their preview image.
+    """
+    # IFD0 with a single Orientation entry
+    ifd0 = struct.pack('<H', 1) + struct.pack('<HHII', 0x0112, 3, 1, 1)
+    if embedded_thumbnail is None:
+        ifd0 += struct.pack('<I', 0)
+        return b'Exif\x00\x00' + b'II*\x00' + struct.pack('<I', 8) + ifd0
+
+    ifd1_offset = 8 + len(ifd0) + 4
+    ifd0 += struct.pack('<I', ifd1_offset)
+    data_offset = ifd1_offset + 2 + 2 * 12 + 4
+    ifd1 = (
+        struct.pack('<H', 2)
+        + struct.pack('<HHII', 0x0201, 4, 1, data_offset)
+        + struct.pack('<HHII', 0x0202, 4, 1, len(embedded_thumbnail))
+        + struct.pack('<I', 0)
+    )
+    return b'Exif\x00\x00' + b'II*\x00' + struct.pack('<I', 8) + ifd0 + ifd1 + embedded_thumbnail
+
+def make_photo(size: tuple, seed: int = 0):
+    """Returns a photo-like RGB test image (fractal detail compresses like a real photo)."""
+    offset = seed * 0.01
+    box = (-2.0 + offset, -1.2, 0.8 + offset, 1.2)
+    return Image.effect_mandelbrot(size, box, 64).convert('RGB')
+
+def write_jpeg(path, size: tuple, embedded_size: tuple = None, seed: int = 0, quality: int = 90, exif: bytes = None):
+    """Writes a synthetic JPEG, optionally with an embedded EXIF thumbnail of `embedded_size`."""
+    img = make_photo(size, seed)
+    if exif is None:
+        embedded = None
+        if embedded_size:
+            buffer = io.BytesIO()
+            img.resize(embedded_size).save(buffer, 'JPEG', quality=80)
+            embedded = buffer.getvalue()
+        exif = build_exif(embedded)
+    img.save(path, 'JPEG', quality=quality, exif=exif)
+    return path
@@ -0,0 +1,144 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_background.py
+import pathlib
+
+import pytest
+
+from pin_grid_spy import background
+
+SAMPLE_DATA_DIR = pathlib.Path(__file__).parent / "sample_data"
+SAMPLE_IMAGES = sorted(SAMPLE_DATA_DIR.glob("image_*.jpg"))
+
+def run_job(paths, tmp_path, post=None, **kwargs):
+    """Runs a ProcessingJob to completion and returns the events it posted."""
+    events = []
+    def collect(event, value):
+        events.append((event, value))
+        if post:
+            post(job, event, value)
+    job = background.ProcessingJob(paths, tmp_path / "thumbnails", collect, executor="serial", chunk_size=1,
+                                   use_cache=False, **kwargs)
+    job.start().join(timeout=60)
+    assert not job.is_alive()
+    return events
+
+def test_progress_meter_rate_and_eta():
+    now = [0.0]
+    meter = background.ProgressMeter(100, clock=lambda: now[0])
+    assert meter.eta is None
+    now[0] = 10.0
+    meter.advance(25)
+    assert meter.rate == 2.5
+    assert meter.eta == 30.0
+    assert meter.summary() == "25/100 images, 2.5 img/s, ETA 0:30"
+    assert background.format_duration(3725) == "1:02:05"
+
+def test_processing_job_streams_batches(tmp_path):
+    events = run_job(SAMPLE_IMAGES, tmp_path, update_interval=0)
+    batches = [value for event, value in events if event == background.PROCESS_BATCH_EVENT]
+    assert events[-1][0] == background.PROCESS_DONE_EVENT
+    done = events[-1][1]
+
+    results = [result for batch in batches for result in batch["results"]]
+    assert [path for path, _, _ in results] == SAMPLE_IMAGES # Every file reported once, in order
+    assert done["with_gps"] == sum(status == "processed" for _, _, status in results) > 0
+    assert done["done"] == done["total"] == len(SAMPLE_IMAGES)
+    assert not done["cancelled"] and done["error"] is None
+    assert batches[-1]["done"] == len(SAMPLE_IMAGES)
+
+def test_processing_job_cancel(tmp_path):
+    def cancel_on_first_batch(job, event, value):
+        if event == background.PROCESS_BATCH_EVENT:
+            job.cancel()
+    events = run_job(SAMPLE_IMAGES, tmp_path, post=cancel_on_first_batch, update_interval=0)
+    done = events[-1][1]
+    assert done["cancelled"]
+    assert done["done"] < len(SAMPLE_IMAGES)
+
+def test_processing_job_reports_errors(tmp_path, monkeypatch):
+    original = background.image_processor.iter_process_files
+    def fail_after_first(*args, **kwargs):
+        results = original(*args, **kwargs)
+        try:
+            yield next(results)
+            raise OSError("disk full")
+        finally:
+            results.close()
+    monkeypatch.setattr(background.image_processor, "iter_process_files", fail_after_first)
+    events = run_job(SAMPLE_IMAGES, tmp_path, update_interval=0)
+    assert events[-1][0] == background.PROCESS_DONE_EVENT
+    done = events[-1][1]
+    assert done["error"] == "disk full"
+    assert done["done"] == 1 and not done["cancelled"]
+
+def test_background_job_is_abstract():
+    with pytest.raises(TypeError):
+        background.BackgroundJob(lambda event, value: None)
+
+def run_scan(roots, post=None, **kwargs):
+    """Runs a DirectoryScanJob to completion and returns the events it posted."""
+    events = []
+    def collect(event, value):
+        events.append((event, value))
+        if post:
+            post(job, event, value)
+    job = background.DirectoryScanJob(roots, collect, **kwargs)
+    job.start().join(timeout=60)
+    assert not job.is_alive()
+    return events
+
+def make_tree(root):
+    """Nested folders with images and files the scan must skip."""
+    (root / "a" / "b").mkdir(parents=True)
+    for rel in ("one.jpg", "a/two.JPG", "a/b/three.png", "a/notes.txt", "a/b/clip.mp4"):
+        (root / rel).write_bytes(b"")
+    return sorted(root / rel for rel in ("one.jpg", "a/two.JPG", "a/b/three.png"))
+
+def test_directory_scan_streams_supported_files_recursively(tmp_path):
+    expected = make_tree(tmp_path)
+    events = run_scan([tmp_path], update_interval=0)
+    batches = [value for event, value in events if event == background.SCAN_BATCH_EVENT]
+    assert events[-1][0] == background.SCAN_DONE_EVENT
+    done = events[-1][1]
+
+    assert sorted(path for batch in batches for path in batch["paths"]) == expected
+    assert [batch["found"] for batch in batches] == list(range(1, len(expected) + 1)) # Running count
+    assert done["found"] == len(expected)
+    assert done["roots"] == [tmp_path]
+    assert not done["cancelled"] and done["error"] is None
+
+def test_directory_scan_batches_by_interval(tmp_path):
+    expected = make_tree(tmp_path)
+    events = run_scan([tmp_path], update_interval=60)
+    assert [event for event, _ in events] == [background.SCAN_BATCH_EVENT, background.SCAN_DONE_EVENT]
+    assert sorted(events[0][1]["paths"]) == expected
+
+def test_directory_scan_cancel(tmp_path):
+    make_tree(tmp_path)
+    def cancel_on_first_batch(job, event, value):
+        if event == background.SCAN_BATCH_EVENT:
+            job.cancel()
+    events = run_scan([tmp_path], post=cancel_on_first_batch, update_interval=0)
+    done = events[-1][1]
+    assert done["cancelled"]
+    assert done["found"] == 1
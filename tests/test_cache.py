@@ -0,0 +1,130 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_cache.py
+import os
+import shutil
+import pathlib
+
+import pytest
+
+from pin_grid_spy import config, image_processor
+from pin_grid_spy.cache import MetadataCache
+
+TEST_DIR = pathlib.Path(__file__).parent
+SAMPLE_DATA_DIR = TEST_DIR / "sample_data"
+IMG_WITH_GPS = SAMPLE_DATA_DIR / "image_with_gps.jpg"
+IMG_NO_GPS = SAMPLE_DATA_DIR / "image_no_gps.jpg"
+
+@pytest.fixture
+def case_dir(tmp_path):
+    """A small input directory with one geotagged and one untagged image."""
+    input_dir = tmp_path / "case"
+    input_dir.mkdir()
+    shutil.copy(IMG_WITH_GPS, input_dir)
+    shutil.copy(IMG_NO_GPS, input_dir)
+    return input_dir
+
+def test_rescan_uses_cache(tmp_path, case_dir, monkeypatch):
+    """Tests that unchanged files are served from the cache on a re-scan."""
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    first = image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("process_image should not run for cached files")
+    monkeypatch.setattr(image_processor, "process_image", fail)
+
+    second = image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+    assert second == first
+
+def test_cache_invalidated_on_change(tmp_path, case_dir):
+    """Tests that a modified file is treated as a cache miss."""
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+    target = case_dir / IMG_WITH_GPS.name
+    stat = target.stat()
+    os.utime(target, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    with MetadataCache.for_thumb_dir(thumb_dir) as cache:
+        hit, _, _ = cache.lookup(target)
+        assert hit is False
+        hit, record, _ = cache.lookup(case_dir / IMG_NO_GPS.name)
+        assert hit is True
+        assert record is None # Skipped images are cached too
+
+def test_failed_images_are_not_cached(tmp_path, case_dir):
+    """Tests that images that failed to process are retried, unlike images without GPS data."""
+    data = IMG_WITH_GPS.read_bytes()
+    broken = case_dir / "broken.jpg" # EXIF with GPS, but truncated image data
+    broken.write_bytes(data[:data.find(b"\xff\xda") + 20])
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+
+    with MetadataCache.for_thumb_dir(thumb_dir) as cache:
+        assert cache.lookup(broken)[0] is False
+        assert cache.lookup(case_dir / IMG_NO_GPS.name)[0] is True
+
+def test_cache_prunes_removed_files(tmp_path, case_dir):
+    """Tests that entries for deleted files are pruned on the next scan."""
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+    (case_dir / IMG_NO_GPS.name).unlink()
+
+    with MetadataCache.for_thumb_dir(thumb_dir) as cache:
+        cache.lookup(case_dir / IMG_WITH_GPS.name)
+        assert cache.prune(case_dir) == 1
+
+def test_cached_records_with_invalid_coordinates_are_dropped(tmp_path, case_dir):
+    """Tests that a cached (0, 0) record is treated like an image without GPS data on re-import."""
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    first = image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+    assert len(first) == 1
+    target = case_dir / IMG_WITH_GPS.name
+    with MetadataCache.for_thumb_dir(thumb_dir) as cache:
+        hit, record, identity = cache.lookup(target)
+        assert hit
+        cache.store(target, {**record, "latitude": 0.0, "longitude": 0.0}, identity)
+
+    assert image_processor.process_directory(case_dir, thumb_dir, executor="serial") == []
+
+def test_cache_ignores_records_without_content_hash(tmp_path, case_dir):
+    """Tests that records from before content-addressed thumbnails are reprocessed."""
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    target = case_dir / IMG_WITH_GPS.name
+    (thumb_dir / "legacy_thumb.jpg").parent.mkdir(parents=True)
+    (thumb_dir / "legacy_thumb.jpg").touch()
+    with MetadataCache.for_thumb_dir(thumb_dir) as cache:
+        _, _, identity = cache.lookup(target)
+        cache.store(target, {"original_path": str(target), "thumbnail_rel_path": "thumbnails/legacy_thumb.jpg"},
+                    identity)
+
+    with MetadataCache.for_thumb_dir(thumb_dir) as cache:
+        hit, _, _ = cache.lookup(target)
+        assert hit is False
+
+def test_cache_misses_after_thumbnail_format_change(tmp_path, case_dir, monkeypatch):
+    """Tests that changing THUMBNAIL_FORMAT regenerates cached thumbnails."""
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    first = image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+    monkeypatch.setattr(config, "THUMBNAIL_FORMAT", "webp")
+    second = image_processor.process_directory(case_dir, thumb_dir, executor="serial")
+    assert first[0]["thumbnail_rel_path"].endswith(".jpg")
+    assert second[0]["thumbnail_rel_path"].endswith(".webp")
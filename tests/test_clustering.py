@@ -0,0 +1,92 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_clustering.py
+import json
+
+import numpy as np
+import pytest
+
+from pin_grid_spy import clustering
+
+@pytest.fixture
+def points():
+    """A dense group around New York, a second around Paris and one outlier."""
+    rng = np.random.default_rng(0)
+    lats = np.concatenate([40.7 + rng.random(200) * 0.01, 48.85 + rng.random(50) * 0.01, [-33.9]])
+    lons = np.concatenate([-74.0 + rng.random(200) * 0.01, 2.35 + rng.random(50) * 0.01, [151.2]])
+    return lats, lons
+
+def test_levels_cover_every_point(points):
+    lats, lons = points
+    tree = clustering.build_cluster_tree(lats, lons, max_zoom=10, cell_px=64)
+    assert len(tree["levels"]) == 11
+    for level in tree["levels"]:
+        assert sum(level["count"]) == len(lats)
+    assert sorted(tree["pointOrder"]) == list(range(len(lats)))
+
+def test_low_zoom_groups_nearby_points(points):
+    lats, lons = points
+    level = clustering.build_cluster_tree(lats, lons, max_zoom=2, cell_px=64)["levels"][2]
+    assert sorted(level["count"]) == [1, 50, 200]
+    # The lone outlier is kept as a single point pointing back at its record
+    single = level["count"].index(1)
+    assert level["point"][single] == len(lats) - 1
+    assert all(p == -1 for c, p in zip(level["count"], level["point"]) if c > 1)
+
+def test_tile_index_matches_projection(points):
+    lats, lons = points
+    zoom = 6
+    level = clustering.build_cluster_tree(lats, lons, max_zoom=zoom, cell_px=64)["levels"][zoom]
+    for key, (start, end) in level["tiles"].items():
+        tile_x, tile_y = map(int, key.split(","))
+        x, y = clustering.project(np.array(level["lat"][start:end]), np.array(level["lon"][start:end]), zoom)
+        assert np.all(np.floor(x / clustering.TILE_SIZE) == tile_x)
+        assert np.all(np.floor(y / clustering.TILE_SIZE) == tile_y)
+
+def test_empty_input():
+    tree = clustering.build_cluster_tree([], [], max_zoom=3, cell_px=64)
+    assert [level["count"] for level in tree["levels"]] == [[], [], [], []]
+    assert tree["pointTiles"] == {}
+
+def test_invalid_cell_size():
+    with pytest.raises(ValueError):
+        clustering.build_cluster_tree([0.0], [0.0], max_zoom=1, cell_px=100)
+
+def _read_level(path):
+    script = path.read_text(encoding="utf-8")
+    prefix, payload = script.split(", ", 1)
+    assert prefix.startswith("PinGridSpy.loadClusterLevel(")
+    return int(prefix.rsplit("(", 1)[1]), json.loads(payload.rstrip().removesuffix(");"))
+
+def test_export_writes_one_script_per_level(points, tmp_path):
+    lats, lons = points
+    tree = clustering.build_cluster_tree(lats, lons, max_zoom=4, cell_px=64)
+    clusters_dir = tmp_path / "map_clusters"
+    clusters_dir.mkdir()
+    (clusters_dir / "level_9.js").write_text("stale", encoding="utf-8")
+    header = clustering.export_cluster_tree(tree, clusters_dir)
+    assert header == {"maxZoom": 4, "tileSize": clustering.TILE_SIZE}
+    assert sorted(path.name for path in clusters_dir.iterdir()) == [f"level_{zoom}.js" for zoom in range(6)]
+    zoom, level = _read_level(clusters_dir / "level_2.js")
+    assert zoom == 2 and level == tree["levels"][2]
+    zoom, level = _read_level(clusters_dir / "level_5.js")
+    assert zoom == 5 and level == {"order": tree["pointOrder"], "tiles": tree["pointTiles"]}
@@ -0,0 +1,105 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_dedup.py
+import io
+import itertools
+
+import numpy as np
+from PIL import Image
+
+from pin_grid_spy import dedup
+from tests.helpers import make_photo
+
+def bits_apart(hash_a, hash_b):
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+def test_dhash_survives_resize_and_recompression():
+    original = make_photo((800, 600), seed=1)
+    buffer = io.BytesIO()
+    original.resize((400, 300)).save(buffer, "JPEG", quality=40)
+    resaved = Image.open(buffer)
+    other = make_photo((800, 600), seed=40)
+
+    assert len(dedup.dhash(original)) == 16
+    assert bits_apart(dedup.dhash(original), dedup.dhash(resaved)) <= 6
+    assert bits_apart(dedup.dhash(original), dedup.dhash(other)) > 6
+
+def test_near_duplicate_pairs_matches_brute_force():
+    rng = np.random.default_rng(3)
+    hashes = rng.integers(0, 2**62, size=300, dtype=np.uint64)
+    # Plant near-duplicates: copies of the first 50 hashes with 1-5 bits flipped
+    flips = [sum(1 << int(bit) for bit in rng.choice(64, size=rng.integers(1, 6), replace=False)) for _ in range(50)]
+    hashes = np.concatenate([hashes, hashes[:50] ^ np.array(flips, dtype=np.uint64)])
+
+    expected = {(i, j) for i, j in itertools.combinations(range(len(hashes)), 2)
+                if bin(int(hashes[i]) ^ int(hashes[j])).count("1") <= 5}
+    assert len(expected) >= 50
+    assert dedup.near_duplicate_pairs(hashes, 5) == expected
+
+def make_record(name, phash, lat=40.0, lon=-74.0):
+    return {"original_path": name, "phash": phash, "latitude": lat, "longitude": lon}
+
+def test_group_near_duplicates():
+    records = [
+        make_record("a", "ffff0000ffff0000"),
+        make_record("b", "0123456789abcdef"),
+        make_record("a-burst", "ffff0000ffff0003"),           # 2 bits from "a"
+        make_record("a-elsewhere", "ffff0000ffff0000", lat=41.0),  # Same picture, other place
+        make_record("no-hash", None),
+    ]
+    groups = dedup.group_near_duplicates(records, max_distance=4, max_meters=100)
+    assert [[r["original_path"] for r in group] for group in groups] == [
+        ["a", "a-burst"], ["b"], ["a-elsewhere"], ["no-hash"]
+    ]
+    groups = dedup.group_near_duplicates(records, max_distance=4, max_meters=0)
+    assert [r["original_path"] for r in groups[0]] == ["a", "a-burst", "a-elsewhere"]
+
+def test_group_near_duplicates_does_not_chain_locations():
+    # Each shot is 1 bit and ~80 m from the previous one: the third is ~160 m from the first
+    step = 80 / 111195 # Degrees of latitude per 80 m
+    records = [make_record(f"burst-{i}", phash, lat=40.0 + i * step)
+               for i, phash in enumerate(["ffff0000ffff0000", "ffff0000ffff0001", "ffff0000ffff0003"])]
+    groups = dedup.group_near_duplicates(records, max_distance=4, max_meters=100)
+    assert [[record["original_path"] for record in group] for group in groups] == [
+        ["burst-0", "burst-1"], ["burst-2"]]
+    assert len(dedup.group_near_duplicates(records, max_distance=4, max_meters=0)) == 1
+
+def test_group_near_duplicates_identical_hashes_by_location():
+    # A blank frame shot at many places, a few times each, including near the poles
+    rng = np.random.default_rng(3)
+    spots = [(lat, lon) for lat, lon in zip(rng.uniform(-89.99, 89.99, 300), rng.uniform(-180, 180, 300))]
+    spots += [(89.9995, lon) for lon in (-170.0, 10.0, 100.0)] + [(40.0, -74.0), (40.0005, -74.0)]
+    records = [make_record(f"blank-{i}", "0000000000000000", lat + dy, lon)
+               for i, ((lat, lon), dy) in enumerate(itertools.product(spots, (0.0, 0.0002)))]
+
+    # Reference: every record joins the first earlier anchor within reach, as a linear scan
+    anchors, expected = [], {}
+    for record in records:
+        anchor = next((a for a in anchors if dedup._distance_m(a, record) <= 100), None)
+        if anchor is None:
+            anchors.append(record)
+            anchor = record
+        expected.setdefault(anchor["original_path"], []).append(record["original_path"])
+
+    groups = dedup.group_near_duplicates(records, max_distance=4, max_meters=100)
+    assert [[r["original_path"] for r in group] for group in groups] == list(expected.values())
+    assert len(groups) < len(spots) # The polar and New York spots merge
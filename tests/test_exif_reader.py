@@ -0,0 +1,110 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_exif_reader.py
+import io
+import pathlib
+
+import exifread
+import pytest
+from PIL import Image
+
+from pin_grid_spy import exif_reader, utils
+
+TEST_DIR = pathlib.Path(__file__).parent
+SAMPLE_DATA_DIR = TEST_DIR / "sample_data"
+NOT_AN_IMAGE = SAMPLE_DATA_DIR / "not_an_image.txt"
+
+def _summary(tags):
+    """Reduces a tag dict to the values Pin Grid Spy actually uses."""
+    return utils.get_decimal_coords(tags), utils.format_datetime(tags), utils.format_model(tags)
+
+@pytest.mark.parametrize("image_path", sorted(SAMPLE_DATA_DIR.glob("image_*.jpg")), ids=lambda p: p.name)
+def test_read_tags_matches_exifread(image_path):
+    """Tests that the fast reader extracts the same values as exifread."""
+    with open(image_path, 'rb') as f:
+        fast_tags = exif_reader.read_tags(f)
+    with open(image_path, 'rb') as f:
+        full_tags = exifread.process_file(f, details=False)
+
+    assert fast_tags is not None
+    assert _summary(fast_tags) == _summary(full_tags)
+
+def test_read_tags_png_exif_chunk():
+    """Tests reading GPS tags from a PNG eXIf chunk."""
+    exif = Image.Exif()
+    exif[0x0110] = "PngCam"
+    exif[0x8825] = {1: 'S', 2: (33.0, 52.0, 12.0), 3: 'E', 4: (151.0, 12.0, 36.0)}
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, 'PNG', exif=exif)
+    buffer.seek(0)
+
+    tags = exif_reader.read_tags(buffer)
+    lat, lon = utils.get_decimal_coords(tags)
+    assert lat == pytest.approx(-33.87)
+    assert lon == pytest.approx(151.21)
+    assert utils.format_model(tags) == "PngCam"
+
+def test_parse_tiff_big_endian():
+    """Tests Motorola (big-endian) byte order support."""
+    exif = Image.Exif()
+    exif.endian = ">"
+    exif[0x0110] = "BigCam"
+    exif[0x8769] = {0x9003: "2024:01:02 03:04:05"}
+    tags = exif_reader.parse_tiff(exif.tobytes()[len(exif_reader.EXIF_HEADER):])
+    assert utils.format_model(tags) == "BigCam"
+    assert utils.format_datetime(tags) == "2024:01:02 03:04:05"
+
+def test_read_tags_jpeg_without_exif():
+    """Tests that a JPEG without an Exif segment yields no tags."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (8, 8)).save(buffer, 'JPEG')
+    buffer.seek(0)
+    assert exif_reader.read_tags(buffer) == {}
+
+def test_read_tags_unsupported_format():
+    """Tests that unsupported files signal a fallback to exifread."""
+    with open(NOT_AN_IMAGE, 'rb') as f:
+        assert exif_reader.read_tags(f) is None
+
+def test_read_tags_truncated_block():
+    """Tests that malformed EXIF data signals a fallback instead of raising."""
+    tiff = b'II*\x00' + (8).to_bytes(4, 'little') + (5).to_bytes(2, 'little') # 5 entries, none present
+    assert exif_reader.read_tags(io.BytesIO(b'\xff\xd8\xff\xe1' + (len(tiff) + 8).to_bytes(2, 'big')
+                                            + exif_reader.EXIF_HEADER + tiff)) is None
+
+@pytest.mark.parametrize("layout", ["minimal", "camera"])
+@pytest.mark.parametrize("byte_order", ["II", "MM"])
+def test_synthetic_corpus_matches_exifread(tmp_path, layout, byte_order):
+    """Tests that the benchmark corpus carries the positions it claims, readable by both readers."""
+    from benchmarks.synthetic import generate_corpus
+    manifest = generate_corpus(tmp_path, 6, size=(64, 48), formats=("jpeg", "png"), layout=layout,
+                               byte_order=byte_order, makernote_bytes=4000, duplicate_ratio=0.34)
+    assert sum(entry["duplicate_of"] is not None for entry in manifest) == 2
+    for entry in manifest:
+        with open(entry["path"], 'rb') as f:
+            fast_tags = exif_reader.read_tags(f)
+        with open(entry["path"], 'rb') as f:
+            full_tags = exifread.process_file(f, details=False)
+        assert _summary(fast_tags) == _summary(full_tags)
+        lat, lon = utils.get_decimal_coords(fast_tags)
+        assert lat == pytest.approx(entry["latitude"], abs=1e-6)
+        assert lon == pytest.approx(entry["longitude"], abs=1e-6)
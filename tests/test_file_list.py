@@ -0,0 +1,74 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_file_list.py
+import pathlib
+
+from pin_grid_spy import file_list, image_processor
+
+def test_statuses_cover_processing_results():
+    assert file_list.STATUSES == ("pending",) + image_processor.IMAGE_STATUSES
+
+def test_add_many_keeps_order_and_skips_duplicates():
+    files = file_list.FileList()
+    assert files.add_many([pathlib.Path("b.jpg"), "a.jpg", "b.jpg"]) == 2
+    assert files.add_many(["a.jpg", "c.jpg"]) == 1
+    assert files.paths() == ["b.jpg", "a.jpg", "c.jpg"]
+    assert len(files) == 3
+    assert pathlib.Path("a.jpg") in files
+    assert "d.jpg" not in files
+
+def test_statuses_and_counts():
+    files = file_list.FileList()
+    files.add_many(["a.jpg", "b.jpg", "c.jpg", "d.jpg"])
+    files.set_status("a.jpg", "processed")
+    files.set_status(pathlib.Path("b.jpg"), "no_gps")
+    files.set_status("c.jpg", "failed")
+    files.set_status("unknown.jpg", "processed") # Ignored
+    assert files.status("b.jpg") == "no_gps"
+    assert files.paths("pending") == ["d.jpg"]
+    assert files.counts() == {"pending": 1, "processed": 1, "no_gps": 1, "failed": 1}
+    assert files.summary() == "4 files: 1 pending, 1 done, 1 no GPS, 1 failed"
+    assert files.entries() == [("a.jpg", "processed"), ("b.jpg", "no_gps"), ("c.jpg", "failed"), ("d.jpg", "pending")]
+    files.clear()
+    assert len(files) == 0 and files.summary() == "0 files"
+
+def test_row_text_shows_status_label():
+    files = file_list.FileList()
+    files.add("a.jpg", "no_gps")
+    files.add("b.jpg")
+    assert files.row_text(0) == "no GPS   a.jpg"
+    assert files.row_text(1) == "pending  b.jpg"
+
+def test_viewport_pages_and_clamps():
+    files = file_list.FileList()
+    files.add_many(f"{i:03d}.jpg" for i in range(10))
+    view = file_list.Viewport(4)
+    assert [row.split()[-1] for row in view.page(files)] == ["000.jpg", "001.jpg", "002.jpg", "003.jpg"]
+    assert view.scroll(3, len(files)) == 3
+    assert view.page(files)[0].endswith("003.jpg")
+    assert view.scroll(100, len(files)) == 6 # Last full page
+    assert view.scroll_to(-5, len(files)) == 0
+    view.scroll_to(6, len(files))
+    files.clear()
+    files.add("only.jpg")
+    assert view.page(files) == [files.row_text(0)] # Offset clamped after the list shrank
+    assert view.offset == 0
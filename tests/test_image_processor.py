@@ -22,10 +22,14 @@ INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <--------------
 
 import pytest
 import pathlib
+import shutil
 
 from PIL import Image
 
-from pin_grid_spy import image_processor, config, utils
+from pin_grid_spy import image_processor, config, utils, thumbnail_store
+from pin_grid_spy.cache import content_hash
+from pin_grid_spy.record_store import RecordStore
+from tests.helpers import write_jpeg
 
 # Define paths relative to the test file location or project root
 TEST_DIR = pathlib.Path(__file__).parent
@@ -88,6 +92,33 @@ def test_create_thumbnail_not_an_image(tmp_path):
     assert created is False
     assert not thumb_path.exists()
 
+@pytest.mark.usefixtures("sample_images_exist")
+@pytest.mark.parametrize("mode", ["fast", "quality"])
+def test_create_thumbnail_modes(tmp_path, mode):
+    """Tests that both thumbnail engine modes respect the configured bounds."""
+    thumb_path = tmp_path / f"{mode}_thumb.jpg"
+    assert image_processor.create_thumbnail(IMG_WITH_GPS, thumb_path, mode=mode) is True
+    with Image.open(thumb_path) as thumb_img:
+        assert thumb_img.width <= config.THUMBNAIL_SIZE[0]
+        assert thumb_img.height <= config.THUMBNAIL_SIZE[1]
+
+def test_create_thumbnail_uses_embedded_exif_thumbnail(tmp_path, monkeypatch):
+    """Tests that fast mode picks up a large enough embedded EXIF thumbnail."""
+    source = write_jpeg(tmp_path / "large.jpg", (1200, 800), embedded_size=(300, 200))
+    monkeypatch.setattr(config, "THUMBNAIL_USE_EMBEDDED", True)
+
+    with Image.open(source) as img:
+        embedded = image_processor._embedded_thumbnail(img, (200, 133))
+        assert embedded is not None
+        assert embedded.size == (300, 200)
+        # Too small for a larger target
+        assert image_processor._embedded_thumbnail(img, (400, 267)) is None
+
+    thumb_path = tmp_path / "large_thumb.jpg"
+    assert image_processor.create_thumbnail(source, thumb_path, mode="fast") is True
+    with Image.open(thumb_path) as thumb_img:
+        assert thumb_img.size == (200, 133)
+
 # --- Tests for process_image ---
 
 @pytest.mark.usefixtures("sample_images_exist")
@@ -115,15 +146,34 @@ def test_process_image_success(tmp_path):
     assert result["datetime"] == EXPECTED_DATETIME
     assert result["model"] == EXPECTED_MODEL
 
-    # Check relative thumbnail path calculation
-    expected_thumb_rel_path = f"thumbnails/{IMG_WITH_GPS.stem}_thumb{IMG_WITH_GPS.suffix}"
-    assert result["thumbnail_rel_path"] == expected_thumb_rel_path.replace("\\", "/") # Normalize slashes
+    # Thumbnails are named after the content hash and sharded by its leading hex pairs
+    digest = content_hash(IMG_WITH_GPS)
+    assert result["content_hash"] == digest
+    assert len(result["phash"]) == 16 # 64-bit perceptual hash
+    expected_thumb_rel_path = f"thumbnails/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+    assert result["thumbnail_rel_path"] == expected_thumb_rel_path
 
     # Check thumbnail file was actually created
     expected_thumb_abs_path = tmp_path / expected_thumb_rel_path
     assert expected_thumb_abs_path.exists()
 
 
+@pytest.mark.usefixtures("sample_images_exist")
+@pytest.mark.parametrize("fmt, suffix", [("webp", ".webp"), ("source", ".jpg")])
+def test_process_image_thumbnail_format(tmp_path, monkeypatch, fmt, suffix):
+    """Tests that THUMBNAIL_FORMAT selects the thumbnail encoding."""
+    monkeypatch.setattr(config, "THUMBNAIL_FORMAT", fmt)
+    thumb_dir = tmp_path / "thumbnails"
+    result = image_processor.process_image(IMG_WITH_GPS, thumb_dir)
+    assert result["thumbnail_rel_path"].endswith(suffix)
+    with Image.open(tmp_path / result["thumbnail_rel_path"]) as thumb_img:
+        assert thumb_img.format == ("WEBP" if fmt == "webp" else "JPEG")
+
+def test_process_directory_unknown_thumbnail_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "THUMBNAIL_FORMAT", "gif")
+    with pytest.raises(ValueError):
+        image_processor.process_directory(tmp_path, tmp_path / "thumbnails")
+
 @pytest.mark.usefixtures("sample_images_exist")
 def test_process_image_no_gps(tmp_path):
     """Tests processing an image without GPS data."""
@@ -135,8 +185,11 @@ def test_process_image_no_gps(tmp_path):
 def test_process_image_not_an_image(tmp_path):
     """Tests processing a non-image file."""
     thumb_dir = tmp_path / "thumbnails"
-    result = image_processor.process_image(NOT_AN_IMAGE, thumb_dir)
+    metrics = {}
+    result = image_processor.process_image(NOT_AN_IMAGE, thumb_dir, metrics)
     assert result is None
+    assert metrics["failed"] == [str(NOT_AN_IMAGE)]
+    assert metrics["reasons"] == {str(NOT_AN_IMAGE): "not_an_image"}
 
 def test_process_image_non_existent(tmp_path):
     """Tests processing a non-existent file path."""
@@ -153,7 +206,6 @@ def test_process_directory(tmp_path):
     input_dir = tmp_path / "test_input"
     input_dir.mkdir()
     # Copy sample files into temp input directory
-    import shutil
     shutil.copy(IMG_WITH_GPS, input_dir)
     shutil.copy(IMG_NO_GPS, input_dir)
     shutil.copy(NOT_AN_IMAGE, input_dir)
@@ -166,7 +218,7 @@ def test_process_directory(tmp_path):
     results = image_processor.process_directory(input_dir, thumb_dir)
 
     # Assertions
-    assert isinstance(results, list)
+    assert isinstance(results, RecordStore)
     assert len(results) == 1 # Only the image with GPS should be processed fully
 
     # Check the content of the result
@@ -176,7 +228,126 @@ def test_process_directory(tmp_path):
     assert result_data["longitude"] is not None
 
     # Check that only the expected thumbnail was created
-    expected_thumb_path = thumb_dir / f"{IMG_WITH_GPS.stem}_thumb{IMG_WITH_GPS.suffix}"
-    unexpected_thumb_path = thumb_dir / f"{IMG_NO_GPS.stem}_thumb{IMG_NO_GPS.suffix}"
-    assert expected_thumb_path.exists()
-    assert not unexpected_thumb_path.exists()
\ No newline at end of file
+    assert [p for p in thumb_dir.rglob("*.jpg")] == [thumb_dir.parent / result_data["thumbnail_rel_path"]]
+    manifest = thumbnail_store.read_manifest(thumb_dir)
+    assert manifest[result_data["original_path"]]["thumbnail"] == result_data["thumbnail_rel_path"]
+
+@pytest.mark.usefixtures("sample_images_exist")
+def test_process_directory_content_addressed_thumbnails(tmp_path, monkeypatch):
+    """Tests that same-named files never share a thumbnail and identical copies are rendered once."""
+    input_dir = tmp_path / "case"
+    for folder in ("a", "b", "c"):
+        (input_dir / folder).mkdir(parents=True)
+    shutil.copy(IMG_WITH_GPS, input_dir / "a" / "IMG_0001.jpg")
+    shutil.copy(IMG_WITH_GPS, input_dir / "b" / "copy.JPEG") # Same bytes, other name
+    with Image.open(IMG_WITH_GPS) as img: # Other bytes, same name
+        img.rotate(90).save(input_dir / "c" / "IMG_0001.jpg", exif=img.info["exif"])
+
+    renders = []
+    real_render = image_processor._render_thumbnail
+    monkeypatch.setattr(image_processor, "_render_thumbnail",
+                        lambda img, mode: renders.append(img) or real_render(img, mode))
+    thumb_dir = tmp_path / "output" / "thumbnails"
+    results = image_processor.process_directory(input_dir, thumb_dir, executor="serial", use_cache=False)
+
+    thumbs = {pathlib.Path(r["original_path"]).relative_to(input_dir).as_posix(): r["thumbnail_rel_path"]
+              for r in results}
+    assert thumbs["a/IMG_0001.jpg"] == thumbs["b/copy.JPEG"]
+    assert thumbs["a/IMG_0001.jpg"] != thumbs["c/IMG_0001.jpg"]
+    assert len(renders) == 2
+    assert set(thumbnail_store.read_manifest(thumb_dir)) == {r["original_path"] for r in results}
+
+@pytest.mark.usefixtures("sample_images_exist")
+def test_abandoned_scan_keeps_manifest(tmp_path):
+    """Tests that a scan stopped early leaves the previous manifest in place."""
+    input_dir = tmp_path / "case"
+    input_dir.mkdir()
+    for name in ("one.jpg", "two.jpg"):
+        shutil.copy(IMG_WITH_GPS, input_dir / name)
+    thumb_dir = tmp_path / "thumbnails"
+    image_processor.process_directory(input_dir, thumb_dir, executor="serial")
+    before = thumbnail_store.manifest_path(thumb_dir).read_text()
+
+    scan = image_processor.iter_process_directory(input_dir, thumb_dir, executor="serial", chunk_size=1)
+    next(scan)
+    scan.close()
+    assert thumbnail_store.manifest_path(thumb_dir).read_text() == before
+    assert not list(thumb_dir.glob(".*.tmp"))
+
+@pytest.mark.usefixtures("sample_images_exist")
+@pytest.mark.parametrize("executor", ["serial", "thread", "process"])
+def test_process_directory_executor_modes(tmp_path, executor):
+    """Tests that every executor mode returns the same results in the same order."""
+    input_dir = tmp_path / "test_input"
+    input_dir.mkdir()
+    for sample in sorted(SAMPLE_DATA_DIR.glob("image_*.jpg")):
+        shutil.copy(sample, input_dir)
+
+    serial = image_processor.process_directory(input_dir, tmp_path / "serial_thumbs", executor="serial")
+    results = image_processor.process_directory(
+        input_dir, tmp_path / f"{executor}_thumbs", executor=executor, workers=2, chunk_size=2
+    )
+
+    assert len(results) > 1
+    assert [r["original_path"] for r in results] == [r["original_path"] for r in serial]
+
+@pytest.mark.usefixtures("sample_images_exist")
+@pytest.mark.parametrize("executor", ["serial", "thread"])
+def test_iter_process_files(tmp_path, executor):
+    """Tests that every listed file is reported in order, skipped ones with a None record."""
+    paths = [IMG_WITH_GPS, IMG_NO_GPS, NOT_AN_IMAGE, NON_EXISTENT_FILE]
+    results = list(image_processor.iter_process_files(paths, tmp_path / "thumbnails", executor=executor,
+                                                      workers=2, chunk_size=1, use_cache=False))
+    assert [path for path, _, _ in results] == paths
+    assert results[0][1]["original_path"] == str(IMG_WITH_GPS)
+    # Files that are missing or not images at all fail; an image without GPS data does not
+    assert [(record, status) for _, record, status in results[1:]] == [
+        (None, "no_gps"), (None, "failed"), (None, "failed")]
+
+    # Stopping early cancels the queued chunks instead of waiting for them
+    scan = image_processor.iter_process_files(paths * 20, tmp_path / "thumbnails", executor=executor,
+                                              workers=1, chunk_size=1, use_cache=False)
+    next(scan)
+    scan.close()
+
+def test_process_directory_unknown_executor(tmp_path):
+    """Tests that an unknown executor mode is rejected."""
+    with pytest.raises(ValueError):
+        image_processor.process_directory(tmp_path, tmp_path / "thumbs", executor="gpu")
+
+@pytest.mark.usefixtures("sample_images_exist")
+def test_process_image_reports_bytes_read(tmp_path):
+    """Tests that the single-open pipeline records the bytes it read."""
+    metrics = {}
+    result = image_processor.process_image(IMG_WITH_GPS, tmp_path / "thumbnails", metrics)
+    assert result is not None
+    assert 0 < metrics["bytes_read"] <= IMG_WITH_GPS.stat().st_size
+
+def test_source_buffer_reads_and_seeks():
+    """Tests the shared read-only file buffer."""
+    with image_processor.SourceBuffer(NOT_AN_IMAGE) as source:
+        data = NOT_AN_IMAGE.read_bytes()
+        assert source.read(4) == data[:4]
+        source.seek(-2, 2)
+        assert source.read() == data[-2:]
+        source.seek(0)
+        source.read(4) # Re-reading the same region is not counted twice
+        assert source.bytes_read == 6
+
+@pytest.mark.usefixtures("sample_images_exist")
+def test_iter_process_directory_nested(tmp_path, caplog):
+    """Tests streaming results from nested folders, ignoring thumbnails inside the input tree."""
+    input_dir = tmp_path / "case"
+    (input_dir / "phone" / "DCIM").mkdir(parents=True)
+    shutil.copy(IMG_WITH_GPS, input_dir / "phone" / "DCIM")
+    thumb_dir = input_dir / "output" / "thumbnails"
+
+    first = list(image_processor.iter_process_directory(input_dir, thumb_dir, executor="serial", use_cache=False))
+    caplog.clear()
+    with caplog.at_level("INFO", logger="pin_grid_spy.image_processor"):
+        second = list(image_processor.iter_process_directory(input_dir, thumb_dir, executor="serial", use_cache=False))
+
+    assert [r["original_path"] for r in first] == [str(input_dir / "phone" / "DCIM" / IMG_WITH_GPS.name)]
+    assert len(second) == 1
+    # The generated thumbnail is not picked up as an input image
+    assert "Found 1 images" in caplog.text
@@ -0,0 +1,116 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+
+# tests/test_instrumentation.py
+import json
+import pathlib
+import pstats
+import threading
+
+import pytest
+
+from pin_grid_spy import image_processor, instrumentation, map_generator
+
+SAMPLE_DATA_DIR = pathlib.Path(__file__).parent / "sample_data"
+
+@pytest.fixture
+def instrumented():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+def test_disabled_stage_is_a_shared_no_op():
+    assert not instrumentation.enabled()
+    with instrumentation.stage("exif") as timer:
+        timer.add_bytes(100)
+    assert instrumentation.stage("gps") is timer
+    assert instrumentation.snapshot() == {}
+
+def test_histogram_percentiles():
+    registry = instrumentation.Registry(per_decade=20)
+    for millis in range(1, 1001): # 1 ms .. 1 s, uniform
+        registry.record("thumbnail", millis / 1000, nbytes=10)
+    summary = registry.snapshot()["thumbnail"]
+    assert summary["count"] == 1000 and summary["bytes"] == 10000
+    assert summary["min_s"] == 0.001 and summary["max_s"] == 1.0
+    for name, expected in (("p50_s", 0.5), ("p95_s", 0.95), ("p99_s", 0.99)):
+        assert summary[name] == pytest.approx(expected, rel=0.13) # Within one bucket
+
+def test_state_merges_across_registries():
+    worker, parent = instrumentation.Registry(), instrumentation.Registry()
+    worker.record("exif", 0.002, 50)
+    parent.record("exif", 0.004, 70)
+    parent.merge_state(worker.take_state())
+    assert worker.snapshot() == {}
+    summary = parent.snapshot()["exif"]
+    assert (summary["count"], summary["bytes"], summary["min_s"], summary["max_s"]) == (2, 120, 0.002, 0.004)
+
+@pytest.mark.parametrize("executor", ["serial", "process"])
+def test_pipeline_stages_are_recorded(tmp_path, instrumented, executor):
+    records = image_processor.process_directory(SAMPLE_DATA_DIR, tmp_path / "thumbnails", executor=executor,
+                                                workers=2, use_cache=False)
+    map_generator.create_map(records, tmp_path / "map.html", incremental=False)
+    stages = instrumentation.snapshot()
+    assert list(stages) == ["exif", "gps", "thumbnail", "map"]
+    image_count = len(list(SAMPLE_DATA_DIR.glob("*.jpg")))
+    assert stages["exif"]["count"] == image_count
+    assert stages["exif"]["bytes"] > 0
+    assert stages["thumbnail"]["count"] == len(records)
+    assert stages["map"]["count"] == 1
+    assert stages["map"]["bytes"] == (tmp_path / "map.html").stat().st_size
+
+def test_write_report_formats(tmp_path, instrumented):
+    with instrumentation.stage("gps"):
+        pass
+    instrumentation.write_report(tmp_path / "metrics.json")
+    assert json.loads((tmp_path / "metrics.json").read_text())["stages"]["gps"]["count"] == 1
+    instrumentation.write_report(tmp_path / "metrics.prom")
+    text = (tmp_path / "metrics.prom").read_text()
+    assert "# TYPE pin_grid_spy_stage_seconds histogram" in text
+    assert 'pin_grid_spy_stage_seconds_bucket{stage="gps",le="+Inf"} 1' in text
+    assert 'pin_grid_spy_stage_seconds_count{stage="gps"} 1' in text
+
+def test_profile_writes_pstats(tmp_path):
+    with instrumentation.profile(tmp_path / "run.pstats"):
+        sum(range(1000))
+    assert pstats.Stats(str(tmp_path / "run.pstats")).total_calls > 0
+    with pytest.raises(ValueError):
+        with instrumentation.profile(tmp_path / "x", profiler="perf"):
+            pass
+
+def busy_stage_work():
+    return sum(range(1000))
+
+def test_profile_includes_stage_threads(tmp_path):
+    def stage():
+        with instrumentation.profile_thread():
+            busy_stage_work()
+    with instrumentation.profile(tmp_path / "run.pstats"):
+        thread = threading.Thread(target=stage)
+        thread.start()
+        thread.join()
+    profiled = {name for _, _, name in pstats.Stats(str(tmp_path / "run.pstats")).stats}
+    assert "busy_stage_work" in profiled
+    with instrumentation.profile_thread(): # Not profiling: a no-op
+        busy_stage_work()
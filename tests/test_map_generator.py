@@ -0,0 +1,263 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_map_generator.py
+import json
+import pathlib
+
+import pytest
+
+from pin_grid_spy import config, map_generator
+from pin_grid_spy.record_store import RecordStore
+from tests.helpers import make_records
+
+def _chunk_mtimes(data_dir: pathlib.Path):
+    return {p.name: p.stat().st_mtime_ns for p in data_dir.glob("chunk_*.js")}
+
+def _chunk_records(data_dir: pathlib.Path):
+    records = []
+    for path in data_dir.glob("chunk_*.js"):
+        records.extend(map_generator._read_chunk_records(path))
+    return records
+
+def test_create_map_folium_markers(tmp_path):
+    """Tests the classic single-file map with the sidebar initialised after the map."""
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(make_records(3), output_file, incremental=False, render_mode="folium")
+    text = output_file.read_text(encoding="utf-8")
+    assert text.count("L.marker(") == 3
+    assert text.index("L.map(") < text.index("L.control.sidebar(")
+
+def test_create_map_incremental_layout(tmp_path):
+    """Tests that incremental mode writes a shell plus chunked marker data."""
+    output_file = tmp_path / "map.html"
+    records = make_records(200)
+    map_generator.create_map(records, output_file, incremental=True)
+
+    data_dir = tmp_path / config.MAP_DATA_DIRNAME
+    assert output_file.exists()
+    assert "TestCamera" not in output_file.read_text(encoding="utf-8") # Data lives in the chunks
+    assert (data_dir / "index.js").exists()
+    assert len(_chunk_records(data_dir)) == 200
+    manifest = json.loads((data_dir / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["count"] == 200
+
+def test_create_map_incremental_rewrites_only_changed_chunks(tmp_path):
+    """Tests that rebuilding with a few more records only touches their chunks."""
+    output_file = tmp_path / "map.html"
+    data_dir = tmp_path / config.MAP_DATA_DIRNAME
+    records = make_records(500)
+    map_generator.create_map(records, output_file, incremental=True)
+    before = _chunk_mtimes(data_dir)
+    shell_before = output_file.stat().st_mtime_ns
+
+    added = make_records(2, prefix="/case/new/IMG_")
+    map_generator.create_map(records + added, output_file, incremental=True)
+    after = _chunk_mtimes(data_dir)
+
+    changed = {name for name in after if before.get(name) != after[name]}
+    expected = {map_generator._chunk_file(map_generator._chunk_id(r["original_path"], config.MAP_DATA_CHUNKS))
+                for r in added}
+    assert changed == expected
+    assert output_file.stat().st_mtime_ns == shell_before
+
+def test_update_map_applies_delta(tmp_path):
+    """Tests adding, replacing and removing records through update_map."""
+    output_file = tmp_path / "map.html"
+    data_dir = tmp_path / config.MAP_DATA_DIRNAME
+    records = make_records(50)
+    map_generator.create_map(records, output_file, incremental=True)
+
+    moved = dict(records[0], latitude=51.5, longitude=-0.12)
+    new = make_records(1, prefix="/case/extra/IMG_")[0]
+    map_generator.update_map(output_file, added=[moved, new], removed=[records[1]["original_path"]])
+
+    by_path = {record["original_path"]: record for record in _chunk_records(data_dir)}
+    assert len(by_path) == 50
+    assert records[1]["original_path"] not in by_path
+    assert by_path[records[0]["original_path"]]["latitude"] == pytest.approx(51.5)
+    assert new["original_path"] in by_path
+    manifest = json.loads((data_dir / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["count"] == 50
+
+def test_update_map_keeps_points_when_shell_is_missing(tmp_path):
+    """Tests that a deleted map.html is regenerated without dropping the points already mapped."""
+    output_file = tmp_path / "map.html"
+    data_dir = tmp_path / config.MAP_DATA_DIRNAME
+    first = make_records(30)
+    map_generator.update_map(output_file, added=first)
+    output_file.unlink()
+    second = make_records(5, prefix="/case/extra/IMG_")
+    map_generator.update_map(output_file, added=second)
+
+    assert output_file.exists()
+    paths = {record["original_path"] for record in _chunk_records(data_dir)}
+    assert paths == {record["original_path"] for record in first + second}
+    manifest = json.loads((data_dir / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["count"] == 35
+
+
+def test_encode_points_roundtrip():
+    """Tests that the compact payload decodes back to the original records."""
+    records = make_records(5) + [dict(make_records(1)[0], original_path="C:\\case\\IMG_9.jpg", model="Other")]
+    decoded = map_generator.decode_points(map_generator.encode_points(records))
+    for record in records: # Coordinates are stored with 1e-6 degree precision
+        record["latitude"] = round(record["latitude"], 6)
+        record["longitude"] = round(record["longitude"], 6)
+    assert decoded == records
+
+def test_create_map_data_mode(tmp_path):
+    """Tests that data mode embeds one payload instead of per-point markers."""
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(make_records(50), output_file, incremental=False, render_mode="data")
+    text = output_file.read_text(encoding="utf-8")
+    assert "L.popup(" not in text # Popups are built by one JS template, not one per image
+    assert text.count("TestCamera S9") == 1 # Camera models are interned
+    assert text.index("L.map(") < text.index('"points":')
+
+def test_create_map_from_record_store(tmp_path):
+    """Tests that a columnar RecordStore maps exactly like the list of dicts it was built from."""
+    records = make_records(300)
+    store = RecordStore.from_records(records)
+    assert map_generator.encode_points(store) == map_generator.encode_points(records)
+    assert map_generator._map_view(store) == map_generator._map_view(records)
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(store, output_file, incremental=False, render_mode="clustered",
+                             bbox=(40.6995, -74.0005, 40.7045, -73.9995))
+    assert '"count":5' in output_file.read_text(encoding="utf-8")
+
+def test_create_map_unknown_render_mode(tmp_path):
+    with pytest.raises(ValueError):
+        map_generator.create_map(make_records(1), tmp_path / "map.html", render_mode="svg")
+
+@pytest.mark.parametrize("count, expected", [(10, "data"), (30, "canvas")])
+def test_create_map_auto_switches_to_canvas(tmp_path, monkeypatch, count, expected):
+    """Tests that "auto" picks the canvas renderer above the threshold."""
+    monkeypatch.setattr(config, "MAP_CANVAS_THRESHOLD", 20)
+    monkeypatch.setattr(config, "MAP_LARGE_RENDER_MODE", "canvas")
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(make_records(count), output_file, incremental=False, render_mode="auto")
+    text = output_file.read_text(encoding="utf-8")
+    assert ('"canvasStyle":null' not in text) == (expected == "canvas")
+    assert ("L.markerClusterGroup(" in text) == (expected == "data")
+
+def test_create_map_clustered(tmp_path, monkeypatch):
+    """Tests that "auto" writes the precomputed cluster levels next to the map above the threshold."""
+    monkeypatch.setattr(config, "MAP_CANVAS_THRESHOLD", 20)
+    monkeypatch.setattr(config, "MAP_CLUSTER_MAX_ZOOM", 12)
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(make_records(300), output_file, incremental=False, render_mode="auto")
+    text = output_file.read_text(encoding="utf-8")
+    assert '"maxZoom":12' in text and f'"clustersDir":"{config.MAP_CLUSTERS_DIRNAME}"' in text
+    assert "L.markerClusterGroup(" not in text
+    assert text.count("TestCamera S9") == 1
+    assert '"count":[' not in text # The levels are loaded per zoom, not embedded
+    clusters_dir = tmp_path / config.MAP_CLUSTERS_DIRNAME
+    assert sorted(path.name for path in clusters_dir.glob("level_*.js")) == sorted(
+        f"level_{zoom}.js" for zoom in range(14))
+
+def test_create_map_tiles(tmp_path, monkeypatch):
+    """Tests that the "tiles" mode keeps the points out of the HTML and exports the pyramid next to it."""
+    monkeypatch.setattr(config, "MAP_TILES_MAX_ZOOM", 6)
+    monkeypatch.setattr(config, "MAP_TILES_WORKERS", 1)
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(make_records(50), output_file, incremental=False, render_mode="tiles")
+    text = output_file.read_text(encoding="utf-8")
+    assert "TestCamera S9" not in text
+    assert '"tilesDir":"map_tiles"' in text
+    assert (tmp_path / "map_tiles" / "pyramid.json").exists()
+
+def test_create_map_thumbnail_atlas(tmp_path):
+    """Tests that popups reference sprite sheet cells when an atlas is requested."""
+    from PIL import Image
+    records = make_records(3)
+    for record in records:
+        (tmp_path / record["thumbnail_rel_path"]).parent.mkdir(exist_ok=True)
+        Image.new("RGB", (200, 150)).save(tmp_path / record["thumbnail_rel_path"])
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(records, output_file, incremental=False, render_mode="data", use_atlas=True)
+
+    payload = map_generator.encode_points(records, {"sheets": ["s.webp"], "sizes": [[1, 1]], "positions": {}})
+    assert payload["atlas"]["sheet"] == [-1, -1, -1]
+    text = output_file.read_text(encoding="utf-8")
+    assert '"sheets":["thumbnail_atlas/atlas_000.webp"]' in text
+    assert (tmp_path / "thumbnail_atlas" / "atlas_000.webp").exists()
+
+def test_create_map_groups_near_duplicates(tmp_path):
+    """Tests that near-duplicates share one marker that lists the others."""
+    records = make_records(4)
+    for record in records:
+        record["phash"] = "ffff0000ffff0000"
+        record["longitude"] = -74.0
+    records[0]["latitude"] = records[1]["latitude"] # Two copies taken at the same spot
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(records, output_file, incremental=False, render_mode="data", group_duplicates=True)
+    text = output_file.read_text(encoding="utf-8")
+    assert '"count":3' in text
+    assert '"similar":[["/case/IMG_00001.jpg"],[],[]]' in text
+
+def test_create_map_bbox_filters_records(tmp_path):
+    """Tests that only the images inside `bbox` are mapped."""
+    output_file = tmp_path / "map.html"
+    # Records 0-4 sit at latitude 40.700-40.704 in the first column of the grid
+    map_generator.create_map(make_records(300), output_file, incremental=False, render_mode="data",
+                             bbox=(40.6995, -74.0005, 40.7045, -73.9995))
+    text = output_file.read_text(encoding="utf-8")
+    assert '"count":5' in text
+    assert "IMG_00004.jpg" in text and "IMG_00005.jpg" not in text
+
+def test_create_map_leaves_out_invalid_coordinates(tmp_path):
+    """Tests that null island and out-of-range records never reach the map."""
+    records = make_records(3)
+    records[1].update(latitude=0.0, longitude=0.0)
+    records[2].update(latitude=123.0)
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(RecordStore.from_records(records), output_file, incremental=False, render_mode="data")
+    text = output_file.read_text(encoding="utf-8")
+    assert '"count":1' in text
+    assert "IMG_00000.jpg" in text and "IMG_00001.jpg" not in text and "IMG_00002.jpg" not in text
+
+def test_update_map_leaves_out_invalid_coordinates(tmp_path):
+    """Tests that the update_map delta path filters out null island and out-of-range records too."""
+    output_file = tmp_path / "map.html"
+    records = make_records(5)
+    map_generator.create_map(records, output_file, incremental=True)
+    extra = make_records(3, prefix="/case/extra/IMG_")
+    extra[0].update(latitude=0.0, longitude=0.0)
+    extra[1].update(longitude=200.0)
+    moved = dict(records[0], latitude=float("nan"))
+    map_generator.update_map(output_file, added=extra + [moved])
+
+    paths = {record["original_path"] for record in _chunk_records(tmp_path / config.MAP_DATA_DIRNAME)}
+    assert extra[2]["original_path"] in paths
+    assert not paths & {extra[0]["original_path"], extra[1]["original_path"], moved["original_path"]}
+    manifest = json.loads((tmp_path / config.MAP_DATA_DIRNAME / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["count"] == 5
+
+def test_update_map_switches_shell_renderer(tmp_path, monkeypatch):
+    """Tests that an incremental map switches to canvas once it grows past the threshold."""
+    monkeypatch.setattr(config, "MAP_CANVAS_THRESHOLD", 20)
+    output_file = tmp_path / "map.html"
+    map_generator.create_map(make_records(10), output_file, incremental=True, render_mode="auto")
+    assert "L.markerClusterGroup(" in output_file.read_text(encoding="utf-8")
+
+    map_generator.update_map(output_file, added=make_records(15, prefix="/case/more/IMG_"), render_mode="auto")
+    assert "L.markerClusterGroup(" not in output_file.read_text(encoding="utf-8")
@@ -0,0 +1,124 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+
+# tests/test_pipeline.py
+import pathlib
+import threading
+
+import pytest
+
+from pin_grid_spy import config, image_processor, map_generator, pipeline, session
+
+SAMPLE_DATA_DIR = pathlib.Path(__file__).parent / "sample_data"
+
+def interrupted_chunk(*args, **kwargs):
+    """Stands in for a worker chunk that receives Ctrl+C (top level, so process workers can unpickle it)."""
+    raise KeyboardInterrupt
+
+def run(output_dir, **kwargs):
+    return pipeline.run_batch(SAMPLE_DATA_DIR, output_dir, executor="serial", chunk_size=1, use_cache=False,
+                              **kwargs)
+
+def test_batch_run_summary_and_outputs(tmp_path):
+    summary = run(tmp_path)
+    assert summary["status"] == "complete" and summary["error"] is None
+    assert summary["found"] == summary["processed"] + summary["no_gps"] + summary["failed"]
+    assert summary["records"] == summary["processed"] > 0
+    assert set(summary["timings"]) == {"scan", "process", "checkpoint", "export", "total"}
+    assert pathlib.Path(summary["map"]).exists()
+    with session.open_session(summary["checkpoint"]) as checkpoint:
+        assert len(checkpoint.records) == summary["records"]
+        assert len(checkpoint.files()) == summary["found"]
+
+def test_batch_run_resumes_after_interrupt(tmp_path, monkeypatch):
+    stop = threading.Event()
+    original = image_processor.iter_process_files
+    def stop_after_three(*args, **kwargs):
+        for count, result in enumerate(original(*args, **kwargs), 1):
+            yield result
+            if count == 3:
+                stop.set()
+    monkeypatch.setattr(image_processor, "iter_process_files", stop_after_three)
+    first = run(tmp_path, stop=stop, checkpoint_interval=0)
+    assert first["status"] == "interrupted" and first["map"] is None
+    done_first = first["processed"] + first["no_gps"] + first["failed"]
+    assert 0 < done_first < first["found"]
+
+    monkeypatch.setattr(image_processor, "iter_process_files", original)
+    second = run(tmp_path)
+    assert second["status"] == "complete"
+    assert second["resumed"] == done_first
+    assert done_first + second["processed"] + second["no_gps"] + second["failed"] == second["found"]
+    assert second["records"] == run(tmp_path / "fresh")["records"] # Nothing lost or counted twice
+
+def test_batch_run_retries_failed_files(tmp_path, monkeypatch):
+    original = image_processor.process_image
+    def fail_one(image_path, thumb_dir, metrics=None):
+        if image_path.name == "image_with_gps_1.jpg":
+            image_processor._note_failure(metrics, image_path, "error")
+            return None
+        return original(image_path, thumb_dir, metrics)
+    monkeypatch.setattr(image_processor, "process_image", fail_one)
+    first = run(tmp_path)
+    assert first["failed"] == 1 and first["failures"][0].endswith("image_with_gps_1.jpg")
+
+    monkeypatch.setattr(image_processor, "process_image", original)
+    second = run(tmp_path)
+    assert second["resumed"] == first["found"] - 1
+    assert (second["processed"], second["failed"]) == (1, 0)
+    assert second["records"] == first["records"] + 1
+
+def test_batch_run_interrupted_in_process_worker(tmp_path, monkeypatch):
+    thread_errors = []
+    monkeypatch.setattr(threading, "excepthook", thread_errors.append)
+    monkeypatch.setattr(image_processor, "_process_chunk", interrupted_chunk)
+    summary = pipeline.run_batch(SAMPLE_DATA_DIR, tmp_path, executor="process", workers=1, chunk_size=4,
+                                 use_cache=False)
+    assert summary["status"] == "interrupted" and summary["error"] is None
+    assert summary["map"] is None
+    assert thread_errors == []
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_batch_run_exports_tiles_from_checkpoint(tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(config, "MAP_RENDER_MODE", "tiles")
+    monkeypatch.setattr(config, "MAP_TILES_MAX_ZOOM", 6)
+    monkeypatch.setattr(config, "MAP_TILES_WORKERS", workers)
+    monkeypatch.setattr(config, "SESSION_PAGE_SIZE", 2) # Several pages even for the sample data
+    summary = run(tmp_path)
+    assert summary["status"] == "complete" and summary["error"] is None
+    assert (tmp_path / config.MAP_TILES_DIRNAME / "pyramid.json").exists()
+
+def test_batch_run_reports_map_errors(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("renderer crashed")
+    monkeypatch.setattr(map_generator, "create_map", fail)
+    summary = run(tmp_path)
+    assert summary["status"] == "error" and summary["map"] is None
+    assert summary["error"] == "export: renderer crashed"
+    assert summary["records"] > 0 # The checkpoint is kept for a later run
+
+def test_batch_run_restart_and_foreign_checkpoint(tmp_path):
+    run(tmp_path / "out")
+    assert run(tmp_path / "out", restart=True)["resumed"] == 0
+    (tmp_path / "other").mkdir()
+    with pytest.raises(ValueError):
+        pipeline.run_batch(tmp_path / "other", tmp_path / "out")
@@ -0,0 +1,102 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_progress.py
+import collections
+import json
+import logging
+import pathlib
+
+from pin_grid_spy import config, image_processor, progress
+
+SAMPLE_DATA_DIR = pathlib.Path(__file__).parent / "sample_data"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_summary_counts_statuses_and_reasons():
+    clock = FakeClock()
+    reporter = progress.ProgressReporter("Test", total=4, interval=0, clock=clock)
+    reporter.record("a.jpg", "processed")
+    reporter.record("b.jpg", "no_gps", "no_exif")
+    reporter.record("c.jpg", "no_gps", "no_exif")
+    reporter.record("d.jpg", "failed", "thumbnail")
+    clock.now = 2.0
+    line = reporter.summary()
+    assert line.startswith("Test: 4/4 images, 1 processed, 2 without GPS, 1 failed, 2.0 img/s")
+    assert "failed/thumbnail: 1" in line and "no_gps/no_exif: 2" in line
+
+def test_reports_once_per_interval(caplog):
+    clock = FakeClock()
+    reporter = progress.ProgressReporter("Test", interval=10, clock=clock)
+    with caplog.at_level(logging.INFO, logger="pin_grid_spy.progress"):
+        for second in range(25):
+            clock.now = float(second)
+            reporter.record(f"{second}.jpg", "processed")
+        assert len(caplog.records) == 2 # At 10 s and 20 s
+        reporter.close()
+        assert len(caplog.records) == 3
+        assert caplog.records[-1].getMessage().startswith("Test: 25 images")
+
+def test_per_image_lines_are_debug_only(caplog):
+    with caplog.at_level(logging.INFO):
+        with progress.ProgressReporter("Test", interval=0) as reporter:
+            reporter.record("a.jpg", "no_gps")
+    assert all("a.jpg" not in record.getMessage() for record in caplog.records)
+
+def test_unexpected_errors_are_logged_up_to_the_limit(caplog, monkeypatch):
+    monkeypatch.setattr(config, "PROGRESS_MAX_ERROR_LOGS", 2)
+    monkeypatch.setattr(progress, "_unexpected", collections.Counter())
+    logger = logging.getLogger("pin_grid_spy.test")
+    with caplog.at_level(logging.DEBUG, logger="pin_grid_spy.test"):
+        for index in range(4):
+            try:
+                raise OSError(f"disk error {index}")
+            except OSError as e:
+                progress.log_unexpected(logger, "error", "Error processing image %s: %s", f"{index}.jpg", e)
+    errors = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert [record.exc_info is not None for record in errors] == [True, True, False]
+    assert "Further 'error' errors" in errors[-1].getMessage()
+    assert [record.levelno for record in caplog.records[-2:]] == [logging.DEBUG, logging.DEBUG]
+
+def test_event_log(tmp_path):
+    event_log = tmp_path / "logs" / "events.jsonl"
+    with progress.ProgressReporter(event_log=event_log) as reporter:
+        reporter.record("a.jpg", "processed")
+        reporter.record("b.jpg", "failed", "not_found")
+    events = [json.loads(line) for line in event_log.read_text(encoding="utf-8").splitlines()]
+    assert [(event["path"], event["status"], event["reason"]) for event in events] == [
+        ("a.jpg", "processed", None), ("b.jpg", "failed", "not_found")]
+
+def test_processing_reports_reasons(tmp_path, monkeypatch):
+    paths = [SAMPLE_DATA_DIR / "image_with_gps.jpg", SAMPLE_DATA_DIR / "image_no_gps.jpg",
+             SAMPLE_DATA_DIR / "not_an_image.txt", SAMPLE_DATA_DIR / "missing.jpg"]
+    event_log = tmp_path / "events.jsonl"
+    monkeypatch.setattr(config, "PROGRESS_EVENT_LOG", event_log)
+    outcomes = list(image_processor.iter_process_files(paths, tmp_path / "thumbs", executor="serial",
+                                                       use_cache=False))
+    assert [status for _, _, status in outcomes] == ["processed", "no_gps", "failed", "failed"]
+    events = [json.loads(line) for line in event_log.read_text(encoding="utf-8").splitlines()]
+    assert [event["reason"] for event in events] == [None, "no_gps", "not_an_image", "not_found"]
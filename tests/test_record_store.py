@@ -0,0 +1,86 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_record_store.py
+import pickle
+
+import numpy as np
+import pytest
+
+from pin_grid_spy.record_store import RecordStore, bbox_mask, coordinates
+
+def make_records():
+    records = [
+        {
+            "original_path": f"/case/Ünïcode/IMG_{i:03d}.jpg",
+            "thumbnail_rel_path": f"thumbnails/{i:03d}.jpg",
+            "latitude": 40.0 + i,
+            "longitude": -74.0 - i,
+            "datetime": None if i % 3 == 0 else f"2023:10:{i:02d} 11:10:00",
+            "model": ["Camera A", "Camera B", None][i % 3],
+        }
+        for i in range(6)
+    ]
+    records[1]["phash"] = "ffff0000ffff0000" # Optional fields stay absent where missing
+    records[2]["similar"] = ["/case/copy.jpg"] # Fields outside the schema are kept too
+    return records
+
+def test_rows_read_like_the_record_dicts():
+    records = make_records()
+    store = RecordStore.from_records(iter(records))
+    assert len(store) == 6
+    assert store == records
+    assert store.to_records() == records
+    assert dict(store[2]) == records[2]
+    assert store[-1]["original_path"] == "/case/Ünïcode/IMG_005.jpg"
+    assert "phash" not in store[0] and store[0].get("phash") is None
+    assert store[1]["phash"] == "ffff0000ffff0000"
+    with pytest.raises(KeyError):
+        store[0]["phash"]
+    with pytest.raises(IndexError):
+        store[6]
+
+def test_take_filter_and_slices():
+    records = make_records()
+    store = RecordStore.from_records(records)
+    assert store.take([5, 2, 0]) == [records[5], records[2], records[0]]
+    assert store[1:4] == records[1:4]
+    assert store.filter(store.bbox_mask(41.5, -80, 44.5, -70)) == records[2:5]
+    crossing = bbox_mask(records, 39.5, -75.5, 45.5, -78.5) # Crosses the antimeridian
+    assert crossing.tolist() == [True, True, False, False, False, True]
+    assert store.bbox_mask(39.5, -75.5, 45.5, -78.5).tolist() == crossing.tolist()
+    assert store.take([]) == []
+
+def test_vectorized_center_and_bounds():
+    store = RecordStore.from_records(make_records())
+    assert store.center() == pytest.approx([42.5, -76.5])
+    assert store.bounds() == (40.0, -79.0, 45.0, -74.0)
+    assert RecordStore.from_records([]).center() is None
+    lats, lons = coordinates(make_records())
+    assert np.array_equal(lats, store.lats) and np.array_equal(lons, store.lons)
+
+def test_extend_concat_and_pickle():
+    records = make_records()
+    store = RecordStore.from_records(records[:3])
+    store.extend(records[3:])
+    store.extend(RecordStore.from_records([dict(records[0], model="Camera C")]))
+    assert store == records + [dict(records[0], model="Camera C")]
+    assert pickle.loads(pickle.dumps(store)) == store
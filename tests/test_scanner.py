@@ -0,0 +1,84 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_scanner.py
+import os
+
+import pytest
+
+from pin_grid_spy import scanner
+
+@pytest.fixture
+def tree(tmp_path):
+    """Builds a small nested directory tree of (empty) image files."""
+    root = tmp_path / "tree"
+    for rel in ["a.jpg", "b.PNG", "notes.txt", "sub/c.jpeg", "sub/deeper/d.jpg", "skipme/e.jpg"]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+    return root
+
+def _names(paths):
+    return sorted(p.name for p in paths)
+
+def test_scan_recursive(tree):
+    """Tests that the scanner walks subdirectories and filters extensions."""
+    found = list(scanner.scan_images(tree, recursive=True, include=[], exclude=[]))
+    assert _names(found) == ["a.jpg", "b.PNG", "c.jpeg", "d.jpg", "e.jpg"]
+
+def test_scan_top_level_only(tree):
+    """Tests non-recursive scanning."""
+    found = list(scanner.scan_images(tree, recursive=False, include=[], exclude=[]))
+    assert _names(found) == ["a.jpg", "b.PNG"]
+
+def test_scan_include_exclude(tree):
+    """Tests include/exclude globs, including pruning of excluded directories."""
+    found = list(scanner.scan_images(tree, recursive=True, include=["*.jpg"], exclude=["skipme"]))
+    assert _names(found) == ["a.jpg", "d.jpg"]
+
+def test_scan_is_a_generator(tree):
+    """Tests that results are streamed rather than returned as a list."""
+    results = scanner.scan_images(tree)
+    assert next(results).suffix.lower() in {".jpg", ".jpeg", ".png"}
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="symlinks not supported")
+def test_scan_symlink_policies(tree, tmp_path):
+    """Tests the skip/files/follow symlink policies and loop protection."""
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "linked.jpg").touch()
+    (tree / "link_dir").symlink_to(outside, target_is_directory=True)
+    (tree / "link_file.jpg").symlink_to(tree / "a.jpg")
+    (tree / "sub" / "loop").symlink_to(tree, target_is_directory=True)
+
+    def scan(policy):
+        return _names(scanner.scan_images(tree, include=[], exclude=[], symlinks=policy))
+
+    assert "link_file.jpg" not in scan("skip")
+    assert "link_file.jpg" in scan("files")
+    assert "linked.jpg" not in scan("files")
+    followed = scan("follow")
+    assert "linked.jpg" in followed
+    assert followed.count("a.jpg") == 1 # The loop back to the root is not re-entered
+
+def test_scan_unknown_symlink_policy(tree):
+    with pytest.raises(ValueError):
+        list(scanner.scan_images(tree, symlinks="sometimes"))
@@ -0,0 +1,115 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_session.py
+import numpy as np
+import pytest
+
+from pin_grid_spy import config, map_generator, session
+from pin_grid_spy.record_store import RecordStore
+
+def make_records(count):
+    return [
+        {
+            "original_path": f"/case/IMG_{i:05d}.jpg",
+            "thumbnail_rel_path": f"thumbnails/{i:05d}.jpg",
+            "latitude": 40.7 + i * 0.001,
+            "longitude": -74.0 - i * 0.001,
+            "datetime": "2023:10:27 11:10:00" if i % 2 else None,
+            "model": f"Camera {i % 3}",
+            "content_hash": f"{i:040x}",
+            "phash": "ffffffffffffffff" if i == 0 else f"{i:016x}", # Top bit set: stored as a negative INTEGER
+        }
+        for i in range(count)
+    ]
+
+@pytest.fixture
+def small_pages(monkeypatch):
+    monkeypatch.setattr(config, "SESSION_PAGE_SIZE", 4)
+    monkeypatch.setattr(config, "SESSION_PAGE_CACHE", 2)
+
+@pytest.mark.usefixtures("small_pages")
+def test_save_and_load_round_trip(tmp_path):
+    records = make_records(10)
+    records[3]["similar"] = ["/case/copy.jpg"]
+    path = tmp_path / f"case{config.SESSION_FILE_EXTENSION}"
+    files = [("/case/IMG_00000.jpg", "processed"), ("/case/broken.jpg", "failed")]
+    assert session.save_session(path, records, files, {"MAP_RENDER_MODE": "canvas"}) == 10
+
+    with session.open_session(path) as loaded:
+        assert len(loaded.records) == 10
+        assert loaded.records[7] == records[7] # Paged in on access
+        assert loaded.records[-1] == records[-1]
+        assert list(loaded.records) == records
+        assert loaded.records[2:5] == records[2:5]
+        assert loaded.records[np.int64(9)] == records[9] # As indexed by the tile export
+        assert loaded.records[np.int64(-2)] == records[-2]
+        assert loaded.files() == files
+        assert loaded.settings() == {"MAP_RENDER_MODE": "canvas"}
+        lats, lons = loaded.records.coordinates()
+        assert lats.tolist() == [item["latitude"] for item in records]
+        assert loaded.records.column("model") == [item["model"] for item in records]
+
+@pytest.mark.usefixtures("small_pages")
+def test_append_without_rewriting(tmp_path):
+    records = make_records(9)
+    path = tmp_path / "case.pgsession"
+    session.save_session(path, records[:6])
+    with session.open_session(path) as loaded:
+        assert loaded.records[5] == records[5] # Caches the last, partial page
+        loaded.records.extend(iter(records[6:]))
+        assert len(loaded.records) == 9
+        assert list(loaded.records) == records
+        assert loaded.records[7] == records[7]
+    with session.open_session(path) as reopened:
+        assert list(reopened.records) == records
+        assert len(reopened.records.coordinates()[0]) == 9
+
+def test_checkpoint_writes_records_and_files_together(tmp_path):
+    records = make_records(4)
+    with session.SessionFile.create(tmp_path / "run.pgsession") as checkpoint:
+        assert checkpoint.checkpoint(records[:2], [("a.jpg", "processed"), ("b.jpg", "no_gps")]) == 2
+        checkpoint.checkpoint(records[2:], [("b.jpg", "failed"), ("c.jpg", "processed")])
+        assert list(checkpoint.records) == records
+        assert dict(checkpoint.files()) == {"a.jpg": "processed", "b.jpg": "failed", "c.jpg": "processed"}
+
+def test_loaded_session_maps_like_records(tmp_path):
+    records = make_records(20)
+    path = tmp_path / "case.pgsession"
+    session.save_session(path, RecordStore.from_records(records))
+    with session.open_session(path) as loaded:
+        assert map_generator.encode_points(loaded.records) == map_generator.encode_points(records)
+
+def test_open_rejects_other_files(tmp_path):
+    not_a_session = tmp_path / "notes.pgsession"
+    not_a_session.write_text("analyst notes")
+    with pytest.raises(ValueError):
+        session.open_session(not_a_session)
+    with pytest.raises(FileNotFoundError):
+        session.open_session(tmp_path / "missing.pgsession")
+
+def test_settings_round_trip(monkeypatch):
+    monkeypatch.setattr(config, "THUMBNAIL_SIZE", (200, 200))
+    saved = session.session_settings()
+    monkeypatch.setattr(config, "THUMBNAIL_SIZE", (64, 64))
+    session.apply_settings(dict(saved, THUMBNAIL_SIZE=[200, 200], UNKNOWN_SETTING=1))
+    assert config.THUMBNAIL_SIZE == (200, 200)
+    assert not hasattr(config, "UNKNOWN_SETTING")
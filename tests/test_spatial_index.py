@@ -0,0 +1,72 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_spatial_index.py
+import numpy as np
+import pytest
+
+from pin_grid_spy import spatial_index
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(7)
+    # A dense city cluster, points spread worldwide and a few at the poles/antimeridian
+    lats = np.concatenate([rng.normal(40.7, 0.05, 2000), rng.uniform(-90, 90, 2000), [90.0, -90.0, 0.0, 0.0]])
+    lons = np.concatenate([rng.normal(-74.0, 0.05, 2000), rng.uniform(-180, 180, 2000), [0.0, 0.0, 180.0, -180.0]])
+    return lats, lons
+
+def test_bbox_matches_linear_scan(points):
+    lats, lons = points
+    index = spatial_index.SpatialIndex(lats, lons, cell_deg=0.5)
+    for south, west, north, east in [(40.6, -74.1, 40.8, -73.9), (-10, -20, 30, 60), (-90, -180, 90, 180),
+                                     (-5, 170, 5, -170)]: # Last box crosses the antimeridian
+        if west > east:
+            expected = (lats >= south) & (lats <= north) & ((lons >= west) | (lons <= east))
+        else:
+            expected = (lats >= south) & (lats <= north) & (lons >= west) & (lons <= east)
+        assert index.bbox(south, west, north, east).tolist() == np.flatnonzero(expected).tolist()
+
+def test_radius_matches_linear_scan(points):
+    lats, lons = points
+    index = spatial_index.SpatialIndex(lats, lons, cell_deg=0.5)
+    for lat, lon, meters in [(40.7, -74.0, 500), (40.7, -74.0, 20000), (0.0, 179.9, 300000),
+                             (89.0, 10.0, 500000), (-30.0, 20.0, 5000000), (10.0, 10.0, 3e7)]:
+        expected = spatial_index.haversine_m(lat, lon, lats, lons) <= meters
+        assert index.radius(lat, lon, meters).tolist() == np.flatnonzero(expected).tolist()
+
+def test_nearest_matches_linear_scan(points):
+    lats, lons = points
+    index = spatial_index.SpatialIndex(lats, lons)
+    for lat, lon, k in [(40.7, -74.0, 5), (-60.0, 100.0, 3), (0.0, 0.0, 50)]:
+        indices, distances = index.nearest(lat, lon, k)
+        all_distances = spatial_index.haversine_m(lat, lon, lats, lons)
+        assert distances.tolist() == pytest.approx(np.sort(all_distances)[:k].tolist())
+        assert all_distances[indices].tolist() == pytest.approx(distances.tolist())
+    assert len(index.nearest(0.0, 0.0, len(lats) + 10)[0]) == len(lats)
+
+def test_from_records_and_select():
+    records = [{"latitude": 40.0 + i * 0.001, "longitude": -74.0, "original_path": f"/{i}.jpg"} for i in range(10)]
+    index = spatial_index.build_index(records)
+    selected = spatial_index.select(records, index.bbox(40.0015, -74.1, 40.0045, -73.9))
+    assert [item["original_path"] for item in selected] == ["/2.jpg", "/3.jpg", "/4.jpg"]
+    empty = spatial_index.build_index([])
+    assert empty.bbox(-90, -180, 90, 180).tolist() == []
+    assert empty.nearest(0.0, 0.0, 3)[0].tolist() == []
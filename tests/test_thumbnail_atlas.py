@@ -0,0 +1,62 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_thumbnail_atlas.py
+import pytest
+from PIL import Image
+
+from pin_grid_spy import config, thumbnail_atlas
+
+@pytest.fixture
+def thumbnails(tmp_path):
+    """Five solid-colour thumbnails of different sizes in output/thumbnails."""
+    paths = []
+    for i in range(5):
+        rel_path = f"thumbnails/thumb_{i}.jpg"
+        (tmp_path / rel_path).parent.mkdir(exist_ok=True)
+        Image.new("RGB", (200 - 20 * i, 150), (50 * i, 0, 0)).save(tmp_path / rel_path)
+        paths.append(rel_path)
+    return paths
+
+def test_pack_atlas(tmp_path, thumbnails, monkeypatch):
+    monkeypatch.setattr(config, "MAP_ATLAS_GRID", (2, 2))
+    atlas, stats = thumbnail_atlas.pack_atlas(thumbnails + thumbnails[:1], tmp_path, "atlas", fmt="webp")
+
+    assert stats["thumbnails"] == 5 and stats["sheets"] == 2 # Duplicates are packed once
+    assert atlas["sheets"] == ["atlas/atlas_000.webp", "atlas/atlas_001.webp"]
+    assert atlas["sizes"] == [[400, 400], [400, 200]] # Last sheet cropped to the rows in use
+
+    sheet, x, y, width, height = atlas["positions"][thumbnails[3]]
+    assert (sheet, x, y, width, height) == (0, 200, 200, 140, 150)
+    with Image.open(tmp_path / atlas["sheets"][0]) as image:
+        assert image.convert("RGB").getpixel((x + 10, y + 10))[0] == pytest.approx(150, abs=8)
+
+def test_pack_atlas_skips_unreadable_and_replaces_old_sheets(tmp_path, thumbnails):
+    (tmp_path / "atlas").mkdir()
+    (tmp_path / "atlas" / "atlas_007.jpg").touch()
+    atlas, stats = thumbnail_atlas.pack_atlas(thumbnails + ["thumbnails/missing.jpg"], tmp_path, "atlas", fmt="jpeg")
+    assert "thumbnails/missing.jpg" not in atlas["positions"]
+    assert stats["thumbnails"] == 5
+    assert sorted(p.name for p in (tmp_path / "atlas").iterdir()) == ["atlas_000.jpg"]
+
+def test_pack_atlas_unknown_format(tmp_path, thumbnails):
+    with pytest.raises(ValueError):
+        thumbnail_atlas.pack_atlas(thumbnails, tmp_path, "atlas", fmt="gif")
@@ -0,0 +1,89 @@
+"""
+Copyright (C) 2025 Kanarath.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+
+INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <----------------------------- IMPORTANT
+"""
+
+
+# tests/test_tile_pyramid.py
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pin_grid_spy import tile_pyramid
+from tests.helpers import make_records
+
+def load_tile(path):
+    """Returns (key, payload) of a vector tile script."""
+    text = path.read_text(encoding="utf-8")
+    prefix = "PinGridSpy.loadTile("
+    key, payload = text[len(prefix):-len(");\n")].split(",", 1)
+    return json.loads(key), json.loads(payload)
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_writes_every_zoom(tmp_path, workers):
+    tiles_dir = tmp_path / "map_tiles"
+    manifest = tile_pyramid.export_tile_pyramid(make_records(500), tiles_dir, max_zoom=8, workers=workers)
+    assert manifest["tiles"] == {str(zoom): 1 for zoom in range(9)} # All points fall in one tile per zoom
+    assert json.loads((tiles_dir / "pyramid.json").read_text()) == manifest
+
+    key, clusters = load_tile(next((tiles_dir / "3").rglob("*.js")))
+    assert key.startswith("3/")
+    assert sum(clusters["count"]) == 500
+
+    key, detail = load_tile(next((tiles_dir / "8").rglob("*.js")))
+    assert detail["points"]["count"] == 500
+
+    image = Image.open(next((tiles_dir / "8").rglob("*.png")))
+    assert image.size == (256, 256)
+    assert image.convert("RGBA").getextrema()[3] == (0, 255) # Transparent background, saturated centre
+
+def test_density_tile_is_transparent_without_points():
+    image = tile_pyramid.render_density_tile(np.array([10]), np.array([20]))
+    alpha = np.asarray(image.convert("RGBA"))[..., 3]
+    assert alpha[20, 10] > 0 and alpha[21, 11] > 0 # The point and its neighbourhood
+    assert alpha[100, 100] == 0
+
+def test_export_replaces_previous_pyramid(tmp_path):
+    tiles_dir = tmp_path / "map_tiles"
+    tile_pyramid.export_tile_pyramid(make_records(10), tiles_dir, max_zoom=12, workers=1)
+    tile_pyramid.export_tile_pyramid(make_records(10), tiles_dir, max_zoom=4, workers=1)
+    assert not (tiles_dir / "12").exists()
+
+def test_export_refuses_foreign_directory(tmp_path):
+    tiles_dir = tmp_path / "map_tiles"
+    tiles_dir.mkdir()
+    (tiles_dir / "notes.txt").write_text("keep me")
+    with pytest.raises(FileExistsError):
+        tile_pyramid.export_tile_pyramid(make_records(10), tiles_dir, max_zoom=2, workers=1)
+    assert (tiles_dir / "notes.txt").exists()
+
+def test_failed_export_keeps_previous_pyramid(tmp_path, monkeypatch):
+    tiles_dir = tmp_path / "map_tiles"
+    manifest = tile_pyramid.export_tile_pyramid(make_records(10), tiles_dir, max_zoom=3, workers=1)
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(tile_pyramid, "render_density_tile", fail)
+    with pytest.raises(OSError):
+        tile_pyramid.export_tile_pyramid(make_records(20), tiles_dir, max_zoom=5, workers=1)
+    assert json.loads((tiles_dir / "pyramid.json").read_text()) == manifest
+    assert [path.name for path in tmp_path.iterdir()] == ["map_tiles"] # No partial build left behind
+
+    monkeypatch.undo()
+    assert tile_pyramid.export_tile_pyramid(make_records(20), tiles_dir, max_zoom=5, workers=1)["count"] == 20
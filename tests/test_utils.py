@@ -19,6 +19,9 @@ INTRODUCE HERE PIN GRID SPY DESCRIPTION------------------------> <--------------
 """
 
 # tests/test_utils.py
+from fractions import Fraction
+
+import numpy as np
 import pytest
 from unittest.mock import MagicMock
 
@@ -76,6 +79,95 @@ def test_get_decimal_coords_empty_tags():
     assert lat is None
     assert lon is None
 
+def test_get_decimal_coords_rejects_null_island_and_bad_ranges():
+    """Tests that (0, 0) placeholders and out-of-range fixes yield no coordinates."""
+    def tags(lat, lon):
+        return {
+            'GPS GPSLatitude': create_mock_tag(lat),
+            'GPS GPSLatitudeRef': create_mock_tag('N'),
+            'GPS GPSLongitude': create_mock_tag(lon),
+            'GPS GPSLongitudeRef': create_mock_tag('E'),
+        }
+    assert utils.get_decimal_coords(tags([0, 0, 0], [0, 0, 0])) == (None, None)
+    assert utils.get_decimal_coords(tags([91, 0, 0], [10, 0, 0])) == (None, None)
+    assert utils.get_decimal_coords(tags([10, 75, 0], [10, 0, 0])) == (None, None)
+
+def test_get_decimal_coords_rejects_zero_denominators(caplog):
+    """Tests that components the header reader left as None (x/0 rationals) are invalid, not errors."""
+    tags = {
+        'GPS GPSLatitude': create_mock_tag([40, None, 0]),
+        'GPS GPSLatitudeRef': create_mock_tag('N'),
+        'GPS GPSLongitude': create_mock_tag([74, 0, 0]),
+        'GPS GPSLongitudeRef': create_mock_tag('W'),
+    }
+    assert utils.get_decimal_coords(tags) == (None, None)
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
+
+# --- Tests for the bulk conversion ---
+
+def test_decimal_coords_bulk_matches_scalar_conversion():
+    """Tests that the bulk conversion gives the same degrees as the per-record one."""
+    result = utils.decimal_coords_bulk(
+        [[Fraction(40), Fraction(44), Fraction(543, 10)], [(34, 1), (0, 1), (0, 1)], [18, 30, 0]],
+        ['N', b'S', 'N\x00'],
+        [[73, 59, 9.5], [18, 0, 0], [Fraction(1), 0, 0]],
+        ['W', 'E', 'E'])
+    expected = [utils._dms_to_dd(40, 44, 54.3, 'N'), -34.0, 18.5]
+    assert result["latitude"] == pytest.approx(expected)
+    assert result["longitude"] == pytest.approx([-73.98597222, 18.0, 1.0])
+    assert result["valid"].all()
+
+def test_decimal_coords_bulk_masks():
+    """Tests the invalid, out-of-range and null island masks."""
+    latitudes = [
+        [40, 44, 54.3],   # 0: valid
+        None,             # 1: missing
+        [(1, 0), 0, 0],   # 2: zero denominator
+        [10, None, 0],    # 3: missing component
+        [10, 0, 0],       # 4: unknown ref
+        [95, 0, 0],       # 5: beyond 90 degrees
+        [10, 60, 0],      # 6: minutes out of range
+        [0, 0, 0],        # 7: null island
+    ]
+    refs = ['N', 'N', 'N', 'N', 'X', 'N', 'N', 'N']
+    longitudes = [[73, 59, 9.5]] * 7 + [[0, 0, 0]]
+    result = utils.decimal_coords_bulk(latitudes, refs, longitudes, ['W'] * 8)
+    assert np.flatnonzero(result["valid"]).tolist() == [0]
+    assert np.flatnonzero(result["invalid"]).tolist() == [1, 2, 3, 4]
+    assert np.flatnonzero(result["out_of_range"]).tolist() == [5, 6]
+    assert np.flatnonzero(result["null_island"]).tolist() == [7]
+    assert np.isnan(result["latitude"][[1, 2, 3, 4]]).all()
+
+def test_decimal_coords_bulk_keeps_null_island_when_allowed(monkeypatch):
+    """Tests that (0, 0) fixes pass while GPS_REJECT_NULL_ISLAND is off."""
+    monkeypatch.setattr(utils.config, "GPS_REJECT_NULL_ISLAND", False)
+    result = utils.decimal_coords_bulk([[0, 0, 0]], ['N'], [[0, 0, 0]], ['E'])
+    assert result["valid"].tolist() == [True]
+
+def test_get_decimal_coords_bulk_from_tags():
+    """Tests the bulk conversion straight from EXIF tag dicts, including images without GPS tags."""
+    tags = {
+        'GPS GPSLatitude': create_mock_tag([40, 44, 54.3]),
+        'GPS GPSLatitudeRef': create_mock_tag('N'),
+        'GPS GPSLongitude': create_mock_tag([73, 59, 9.5]),
+        'GPS GPSLongitudeRef': create_mock_tag('W'),
+    }
+    result = utils.get_decimal_coords_bulk([tags, {}, None])
+    assert result["valid"].tolist() == [True, False, False]
+    assert result["latitude"][0] == pytest.approx(utils.get_decimal_coords(tags)[0])
+
+def test_coordinate_masks():
+    """Tests validation of decimal coordinates, e.g. from a cache."""
+    masks = utils.coordinate_masks([40.7, np.nan, 91.0, 0.0, 0.0], [-74.0, 1.0, 0.0, 0.0, 181.0])
+    assert masks["valid"].tolist() == [True, False, False, False, False]
+    assert masks["invalid"].tolist() == [False, True, False, False, False]
+    assert masks["out_of_range"].tolist() == [False, False, True, False, True]
+    assert masks["null_island"].tolist() == [False, False, False, True, False]
+
+def test_dms_to_decimal_bulk_unknown_axis():
+    with pytest.raises(ValueError):
+        utils.dms_to_decimal_bulk([[1, 0, 0]], ['N'], axis="altitude")
+
 # --- Tests for format_datetime ---
 
 def test_format_datetime_success():